@@ -0,0 +1,116 @@
+"""As-of quotation lookup benchmark.
+
+Seeds a SQLite database with CURRENCIES x DAYS quotations and times the
+original ORM join lookup against the Core query served by
+ix_currency_quotation_as_of_include, with and without the index.
+
+    python benchmarks/as_of_query.py --currencies 100 --days 10000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import desc, text
+
+from common import START, abb, package, report, seed, summarize
+
+database = package('database')
+models = package('models')
+repositories = package('repositories')
+
+
+def orm_join_lookup(db, currency_abb: str, date_in: date):
+    # The lookup as it was before the covering index and Core query
+    Currency = models.Currency
+    CurrencyQuotation = models.CurrencyQuotation
+
+    with db.session() as session:
+        return session.query(CurrencyQuotation, Currency).join(
+            Currency, Currency.id == CurrencyQuotation.currency_id
+        ).filter(
+            Currency.abb == currency_abb, CurrencyQuotation.date <= date_in
+        ).order_by(desc(CurrencyQuotation.date)).limit(1).first()
+
+
+def measure(name: str, lookup, probes) -> None:
+    timings = []
+    for currency_abb, date_in in probes:
+        started = time.perf_counter()
+        lookup(currency_abb, date_in)
+        timings.append(time.perf_counter() - started)
+
+    report(name, summarize(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--currencies', type=int, default=100)
+    parser.add_argument('--days', type=int, default=10000)
+    parser.add_argument('--probes', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite')
+        db = database.Database(
+            f'sqlite:///{path}', f'sqlite+aiosqlite:///{path}',
+            sqlite={'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+        )
+        db.create_database()
+
+        started = time.perf_counter()
+        seed(db, args.currencies, args.days)
+        print(
+            f'seeded {args.currencies * args.days} quotations in '
+            f'{time.perf_counter() - started:.1f} s'
+        )
+
+        abbs = [abb(i) for i in range(args.currencies)]
+        probes = [
+            (random.choice(abbs),
+             START + timedelta(days=random.randrange(args.days)))
+            for _ in range(args.probes)
+        ]
+        repository = repositories.CurrencyQuotationRepository(db.session)
+
+        with db._engine.connect() as connection:
+            plan = connection.execute(
+                text(
+                    'EXPLAIN QUERY PLAN SELECT id, exchange_rate, date '
+                    'FROM currency_quotation WHERE currency_id = 1 '
+                    'AND date <= :d ORDER BY date DESC LIMIT 1'
+                ), {'d': START.isoformat()}
+            ).fetchall()
+            print('plan:', ' | '.join(row[-1] for row in plan))
+
+        measure(
+            'orm join (before)',
+            lambda abb, d: orm_join_lookup(db, abb, d), probes
+        )
+        measure('core as-of', repository.get_by_abb_and_date, probes)
+        with db._engine.connect() as connection:
+            measure(
+                'core as-of, statement only',
+                lambda abb, d: connection.execute(
+                    *repositories.as_of_query(
+                        repository.currency_ids.get(abb), d
+                    )
+                ).first(),
+                probes
+            )
+
+        with db._engine.begin() as connection:
+            connection.execute(
+                text('DROP INDEX ix_currency_quotation_as_of_include')
+            )
+        measure(
+            'core as-of, no covering idx', repository.get_by_abb_and_date,
+            probes
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""Shared helpers for the benchmark scripts."""
+
+import asyncio
+import importlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+START = date(1994, 7, 1)
+
+
+def package(module: str):
+    return importlib.import_module(f'currency-converter.{module}')
+
+
+def abb(i: int) -> str:
+    return chr(65 + i // 676) + chr(65 + i // 26 % 26) + chr(65 + i % 26)
+
+
+def seed(db, currencies: int, days: int) -> None:
+    connection = db._engine.raw_connection()
+    cursor = connection.cursor()
+    cursor.executemany(
+        'INSERT INTO currency (id, abb, name) VALUES (?, ?, ?)',
+        [(i + 1, abb(i), f'Currency {i}') for i in range(currencies)]
+    )
+    for currency_id in range(1, currencies + 1):
+        cursor.executemany(
+            'INSERT INTO currency_quotation '
+            '(currency_id, exchange_rate, date) VALUES (?, ?, ?)',
+            [(currency_id, 1 + random.random(),
+              (START + timedelta(days=d)).isoformat())
+             for d in range(days)]
+        )
+    connection.commit()
+    cursor.execute('ANALYZE')
+    connection.close()
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    # timings in seconds; reported in microseconds
+    timings = sorted(timings)
+    count = len(timings)
+    return {
+        'count': count,
+        'mean_us': sum(timings) / count * 1e6,
+        'p50_us': timings[count // 2] * 1e6,
+        'p99_us': timings[min(count - 1, int(count * 0.99))] * 1e6,
+        'max_us': timings[-1] * 1e6,
+    }
+
+
+def report(name: str, result: Dict[str, float]) -> None:
+    print(
+        f'{name:<36} mean {result["mean_us"]:10.1f} us'
+        f'   p50 {result["p50_us"]:10.1f} us'
+        f'   p99 {result["p99_us"]:10.1f} us'
+    )
+
+
+class SeededApp(NamedTuple):
+    app: Any
+    loop: asyncio.AbstractEventLoop
+    seed_seconds: float
+    startup_seconds: float
+
+
+@contextmanager
+def seeded_app(currencies: int, days: int) -> Iterator[SeededApp]:
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The application reads config.yml and its relative database and
+        # cross rate paths from the working directory
+        shutil.copy(os.path.join(ROOT, 'config.yml'), directory)
+        os.chdir(directory)
+
+        try:
+            package('models')
+            db = package('database').Database(
+                'sqlite:///./currency-converter.sqlite',
+                'sqlite+aiosqlite:///./currency-converter.sqlite'
+            )
+            db.create_database()
+            started = time.perf_counter()
+            seed(db, currencies, days)
+            seed_seconds = time.perf_counter() - started
+            db._engine.dispose()
+
+            started = time.perf_counter()
+            app = package('application').app
+            startup_seconds = time.perf_counter() - started
+
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                yield SeededApp(app, loop, seed_seconds, startup_seconds)
+            finally:
+                # aiosqlite connections hold threads that keep the process
+                # alive
+                container = app.container
+                loop.run_until_complete(container.db()._async_engine.dispose())
+                loop.close()
+                container.db()._engine.dispose()
+        finally:
+            os.chdir(cwd)
+
+
+class ASGIClient:
+    """Calls an ASGI app directly, without sockets or an HTTP library."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def request(
+            self, method: str, path: str, query: str = '',
+            body: Optional[Any] = None
+    ) -> Tuple[int, bytes]:
+        payload = b'' if body is None else json.dumps(body).encode()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': [
+                (b'host', b'bench'),
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(payload)).encode()),
+            ],
+            'client': ('127.0.0.1', 50000),
+            'server': ('bench', 80),
+        }
+        messages = [
+            {'type': 'http.request', 'body': payload, 'more_body': False}
+        ]
+        status = []
+        chunks = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return status[0], b''.join(chunks)
@@ -0,0 +1,81 @@
+"""Dependency injection scope benchmark.
+
+Compares building repositories and services per injection (di.scope
+"factory") with building them once (di.scope "singleton"), both for the
+provider call alone and end to end through the endpoints:
+
+    python benchmarks/di_scope.py --rounds 5 --requests 2000
+"""
+
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from common import START, ASGIClient, abb, report, seeded_app, summarize
+
+SCOPES = ('factory', 'singleton')
+PROVIDERS = (
+    'currency_converter_service',
+    'currency_quotation_service',
+    'currency_quotation_repository',
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--currencies', type=int, default=10)
+    parser.add_argument('--days', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    abbs = [abb(i) for i in range(args.currencies)]
+    requests = [
+        ('POST', '/converter', '', {
+            'currency_abb_from': random.choice(abbs),
+            'currency_abb_to': random.choice(abbs),
+            'value': 100,
+            'date': str(START + timedelta(random.randrange(args.days))),
+        })
+        for _ in range(args.requests)
+    ] + [('GET', '/currencies', '', None)] * args.requests
+
+    with seeded_app(args.currencies, args.days) as seeded:
+        container = seeded.app.container
+        client = ASGIClient(seeded.app)
+        calls = {scope: {} for scope in SCOPES}
+
+        # Scopes alternate each round so that drift affects both alike
+        for _ in range(args.rounds):
+            for scope in SCOPES:
+                container.config.di.scope.from_value(scope)
+                timings = calls[scope]
+
+                for name in PROVIDERS:
+                    provider = getattr(container, name)
+                    started = time.perf_counter()
+                    for _ in range(args.calls):
+                        provider()
+                    timings.setdefault(name, []).append(
+                        (time.perf_counter() - started) / args.calls
+                    )
+
+                for method, path, query, body in requests:
+                    started = time.perf_counter()
+                    seeded.loop.run_until_complete(
+                        client.request(method, path, query, body)
+                    )
+                    timings.setdefault(f'{method} {path}', []).append(
+                        time.perf_counter() - started
+                    )
+
+        for scope in SCOPES:
+            print(f'\ndi.scope = {scope}')
+            for name, timings in calls[scope].items():
+                report(name, summarize(timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Fixed point conversion benchmark.
+
+Converts the same random amounts and rates (rates of up to 8 decimals,
+amounts of up to 6, as the API receives them) with the float path of
+CurrencyConverterService, with decimal.Decimal and with the fixed point
+engine, one at a time and as a batch. Reports the throughput of each and how
+many float results differ from the exact ones:
+
+    python benchmarks/fixed_point.py --count 100000 --rounding half_even
+"""
+
+import argparse
+import random
+import time
+from decimal import Decimal, localcontext
+from typing import Callable, List
+
+import numpy as np
+
+from common import package
+
+fixedpoint = package('fixedpoint')
+
+PLACES = 3
+
+
+def throughput(name: str, count: int, run: Callable[[], List]) -> List:
+    run()
+    started = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - started
+    print(f'{name:<36} {count / elapsed:14,.0f} conversions/s')
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument(
+        '--rounding', default='half_even', choices=fixedpoint.ROUNDING_MODES
+    )
+    args = parser.parse_args()
+    rounding = args.rounding
+    decimal_rounding = fixedpoint.ROUNDING_MODES[rounding]
+    quantum = Decimal(1).scaleb(-PLACES)
+
+    values = [
+        round(random.uniform(0, 1000000), random.randint(0, 6))
+        for _ in range(args.count)
+    ]
+    rates_from = [
+        round(random.uniform(0.01, 100), random.randint(2, 8))
+        for _ in range(args.count)
+    ]
+    rates_to = [
+        round(random.uniform(0.01, 100), random.randint(2, 8))
+        for _ in range(args.count)
+    ]
+    scaled_from = [fixedpoint.to_scaled(rate) for rate in rates_from]
+    scaled_to = [fixedpoint.to_scaled(rate) for rate in rates_to]
+    rows = list(zip(values, rates_from, rates_to))
+
+    print(f'{args.count} conversions, rounding {rounding}\n')
+
+    floats = throughput('float, one at a time', args.count, lambda: [
+        round(value * (rate_from / rate_to), PLACES)
+        for value, rate_from, rate_to in rows
+    ])
+
+    # Rates are held converted, as the fixed point ones are; amounts arrive
+    # as floats on every call
+    decimal_rows = [
+        (value, Decimal(repr(rate_from)), Decimal(repr(rate_to)))
+        for value, rate_from, rate_to in rows
+    ]
+    exact = throughput('Decimal, one at a time', args.count, lambda: [
+        float((Decimal(repr(value)) * rate_from / rate_to).quantize(
+            quantum, decimal_rounding
+        ))
+        for value, rate_from, rate_to in decimal_rows
+    ])
+    # The reference, at a precision where the division cannot round a tie
+    with localcontext() as context:
+        context.prec = 60
+        exact = [
+            float((Decimal(repr(value)) * rate_from / rate_to).quantize(
+                quantum, decimal_rounding
+            ))
+            for value, rate_from, rate_to in decimal_rows
+        ]
+
+    fixed = throughput('fixed point, one at a time', args.count, lambda: [
+        fixedpoint.from_scaled(fixedpoint.convert_value(
+            value, rate_from, rate_to, PLACES, rounding
+        ), PLACES)
+        for value, rate_from, rate_to in zip(values, scaled_from, scaled_to)
+    ])
+
+    float_from = np.array(rates_from)
+    float_to = np.array(rates_to)
+    float_batch = throughput(
+        'float, NumPy batch', args.count,
+        lambda: np.round(
+            np.asarray(values, dtype=np.float64) * float_from / float_to,
+            PLACES
+        ).tolist()
+    )
+
+    int_from = np.array(scaled_from, dtype=np.int64)
+    int_to = np.array(scaled_to, dtype=np.int64)
+    fixed_batch = throughput(
+        'fixed point, NumPy int64 batch', args.count,
+        lambda: (fixedpoint.convert_array(
+            values, int_from, int_to, PLACES, rounding
+        ) / 10 ** PLACES).tolist()
+    )
+
+    print()
+    for name, result in (('float', floats), ('float batch', float_batch),
+                         ('fixed point', fixed),
+                         ('fixed point batch', fixed_batch)):
+        wrong = sum(a != b for a, b in zip(result, exact))
+        print(f'{name:<36} {wrong:8} results differ from Decimal')
+
+
+if __name__ == '__main__':
+    main()
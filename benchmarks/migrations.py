@@ -0,0 +1,148 @@
+"""Migration benchmark.
+
+Seeds a SQLite database (WAL) with CURRENCIES x DAYS quotations, then builds
+the as-of index and backfills a scratch column with several batch sizes
+while a reader thread runs as-of lookups and a writer thread updates single
+quotations. Reports migration throughput and the latency seen by readers
+and writers meanwhile:
+
+    python benchmarks/migrations.py --currencies 100 --days 10000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, List
+
+from sqlalchemy import Column, Float
+
+from common import START, package, report, seed, summarize
+
+database = package('database')
+migrations = package('migrations')
+
+
+class Probe(threading.Thread):
+    def __init__(self, path: str, statement: Callable[[], tuple],
+                 commit: bool) -> None:
+        super().__init__(daemon=True)
+        self._path = path
+        self._statement = statement
+        self._commit = commit
+        self._stopped = threading.Event()
+        self.timings: List[float] = []
+
+    def run(self) -> None:
+        connection = sqlite3.connect(self._path, timeout=30)
+        while not self._stopped.is_set():
+            started = time.perf_counter()
+            connection.execute(*self._statement()).fetchall()
+            if self._commit:
+                connection.commit()
+            self.timings.append(time.perf_counter() - started)
+            time.sleep(0.001)
+        connection.close()
+
+    def stop(self) -> List[float]:
+        self._stopped.set()
+        self.join()
+        return self.timings
+
+
+def measured(path: str, currencies: int, days: int, name: str,
+             migration: Callable[[], None]) -> None:
+    def lookup():
+        return (
+            'SELECT id, exchange_rate, date FROM currency_quotation '
+            'WHERE currency_id = ? AND date <= ? ORDER BY date DESC LIMIT 1',
+            (random.randint(1, currencies),
+             (START + timedelta(days=random.randrange(days))).isoformat())
+        )
+
+    def write():
+        return (
+            'UPDATE currency_quotation SET exchange_rate = ? WHERE id = ?',
+            (1 + random.random(), random.randint(1, currencies * days))
+        )
+
+    reader = Probe(path, lookup, commit=False)
+    writer = Probe(path, write, commit=True)
+    reader.start()
+    writer.start()
+
+    started = time.perf_counter()
+    migration()
+    elapsed = time.perf_counter() - started
+
+    print(f'{name}: {elapsed:.2f} s')
+    report('  reader during migration', summarize(reader.stop()))
+    writes = writer.stop()
+    report('  writer during migration', summarize(writes))
+    print(f'  {"slowest write":<34} {max(writes) * 1000:10.1f} ms')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--currencies', type=int, default=100)
+    parser.add_argument('--days', type=int, default=10000)
+    parser.add_argument(
+        '--batch-sizes', type=int, nargs='+', default=[1000, 10000, 100000]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite')
+        db = database.Database(
+            f'sqlite:///{path}', f'sqlite+aiosqlite:///{path}',
+            sqlite={'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+        )
+        db.create_database()
+        operations = migrations.Operations(db.engine)
+        operations.drop_index(
+            'currency_quotation', 'ix_currency_quotation_as_of_include'
+        )
+
+        started = time.perf_counter()
+        seed(db, args.currencies, args.days)
+        rows = args.currencies * args.days
+        print(
+            f'seeded {rows} quotations in '
+            f'{time.perf_counter() - started:.1f} s'
+        )
+
+        revision = migrations.Migrator.revisions()[1]
+        measured(
+            path, args.currencies, args.days, 'as-of index build',
+            lambda: revision.upgrade(operations)
+        )
+
+        for batch_size in args.batch_sizes:
+            column = f'rate_check_{batch_size}'
+            operations.add_column(
+                'currency_quotation', Column(column, Float)
+            )
+            reports = []
+            measured(
+                path, args.currencies, args.days,
+                f'backfill, batches of {batch_size}',
+                lambda: reports.append(operations.backfill(
+                    'currency_quotation',
+                    f'{column} = exchange_rate * 2',
+                    f'{column} IS NULL',
+                    batch_size=batch_size
+                ))
+            )
+            backfill = reports[0]
+            print(
+                f'  {backfill.rows} rows in {backfill.batches} batches, '
+                f'{backfill.rows_per_second:.0f} rows/s'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Quotation store benchmark.
+
+Seeds a SQLite database with CURRENCIES x DAYS quotations and compares how
+the rate history is held in memory: one CurrencyQuotationOut per row (as the
+rate index did before) against the columnar QuotationStore, then startup
+from a full table scan against opening the snapshot, and as-of lookups
+through the repository with the database and memory read backends.
+
+    python benchmarks/quotation_store.py --currencies 170 --days 11000
+"""
+
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+from common import START, abb, package, report, seed, summarize
+
+database = package('database')
+dtos = package('dtos')
+quotations = package('quotations')
+repositories = package('repositories')
+
+
+def allocated(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del kept
+    return size
+
+
+def per_row_history(rows):
+    history = {}
+    for row in rows:
+        dates, entries = history.setdefault(row.currency_id, ([], []))
+        dates.append(row.date.toordinal())
+        entries.append(dtos.CurrencyQuotationOut.construct(
+            id=row.id, currency_id=row.currency_id,
+            exchange_rate=row.exchange_rate, date=row.date
+        ))
+
+    return history
+
+
+def columnar_history(rows):
+    store = quotations.QuotationStore()
+    store.load(rows)
+    return store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--currencies', type=int, default=170)
+    parser.add_argument('--days', type=int, default=11000)
+    parser.add_argument('--probes', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite')
+        db = database.Database(
+            f'sqlite:///{path}', f'sqlite+aiosqlite:///{path}',
+            sqlite={'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+        )
+        db.create_database()
+
+        started = time.perf_counter()
+        seed(db, args.currencies, args.days)
+        print(
+            f'seeded {args.currencies * args.days} quotations in '
+            f'{time.perf_counter() - started:.1f} s'
+        )
+
+        repository = repositories.CurrencyQuotationRepository(db.session)
+        rows = repository.get_history()
+
+        print(
+            f'{"per-row DTOs":<36} '
+            f'{allocated(lambda: per_row_history(rows)) / 2 ** 20:8.1f} MB'
+        )
+        print(
+            f'{"columnar store":<36} '
+            f'{allocated(lambda: columnar_history(rows)) / 2 ** 20:8.1f} MB'
+        )
+        del rows
+
+        snapshot_path = os.path.join(directory, 'bench.quotations')
+        store = quotations.QuotationStore(snapshot_path)
+
+        started = time.perf_counter()
+        store.load(repository.get_history(), repository.get_fingerprint())
+        print(
+            f'{"startup, table scan":<36} '
+            f'{time.perf_counter() - started:8.2f} s'
+        )
+
+        started = time.perf_counter()
+        store.save()
+        print(
+            f'{"snapshot save":<36} {time.perf_counter() - started:8.2f} s'
+            f' ({os.path.getsize(snapshot_path) / 2 ** 20:.1f} MB)'
+        )
+
+        store = quotations.QuotationStore(snapshot_path)
+        started = time.perf_counter()
+        opened = store.open(repository.get_fingerprint())
+        print(
+            f'{"startup, snapshot":<36} '
+            f'{time.perf_counter() - started:8.2f} s (opened: {opened})'
+        )
+
+        abbs = [abb(i) for i in range(args.currencies)]
+        probes = [
+            (random.choice(abbs),
+             START + timedelta(days=random.randrange(args.days)))
+            for _ in range(args.probes)
+        ]
+        for name, backend in (('database', None), ('memory', store)):
+            repository = repositories.CurrencyQuotationRepository(
+                db.session, store=backend
+            )
+            timings = []
+            for currency_abb, date_in in probes:
+                started = time.perf_counter()
+                repository.get_by_abb_and_date(currency_abb, date_in)
+                timings.append(time.perf_counter() - started)
+            report(f'as-of lookup, {name} backend', summarize(timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Routing benchmark.
+
+Builds a rate index of CURRENCIES x DAYS quotations where a share of the
+currencies is quoted against USD or EUR instead of the implicit base, and
+times CurrencyConverterService.convert_currency for pairs quoted against the
+same base and for routed pairs, with the conversion cache warm (hot pairs)
+and emptied before every call:
+
+    python benchmarks/routes.py --currencies 170 --days 3650 --routed 0.3
+"""
+
+import argparse
+import random
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+from common import START, abb, package, report, summarize
+
+caches = package('caches')
+crossrates = package('crossrates')
+dtos = package('dtos')
+indexes = package('indexes')
+routes = package('routes')
+services = package('services')
+
+
+def build_index(currencies: int, days: int, routed: float):
+    # Currency 1 is USD, quoted against the implicit base; 2 is EUR, quoted
+    # against USD; of the rest, `routed` are quoted against one of them
+    bases = {1: None, 2: 1}
+    for currency_id in range(3, currencies + 1):
+        bases[currency_id] = random.choice((1, 2)) \
+            if random.random() < routed else None
+
+    rows = [
+        SimpleNamespace(
+            id=(currency_id - 1) * days + d + 1, currency_id=currency_id,
+            date=START + timedelta(days=d),
+            exchange_rate=round(random.uniform(0.1, 10), 4),
+            base_currency_id=bases[currency_id]
+        )
+        for currency_id in range(1, currencies + 1)
+        for d in range(days)
+    ]
+
+    rate_index = indexes.RateIndex()
+    rate_index.load(
+        [SimpleNamespace(id=i, abb=abb(i)) for i in bases], rows
+    )
+    return rate_index, bases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--currencies', type=int, default=170)
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--routed', type=float, default=0.3)
+    parser.add_argument('--probes', type=int, default=20000)
+    parser.add_argument('--engine', default='fixed')
+    args = parser.parse_args()
+
+    rate_index, bases = build_index(args.currencies, args.days, args.routed)
+    cache = caches.ConversionCache(
+        caches.TableVersions(), rate_index, caches.LocalCacheBackend(), 3600
+    )
+    service = services.CurrencyConverterService(
+        rate_index, crossrates.CrossRateStore('/nonexistent/crossrates'),
+        cache, routes.ConversionGraph(rate_index.store), engine=args.engine
+    )
+
+    direct = [i for i, base in bases.items() if base is None]
+    routed = [i for i, base in bases.items() if base is not None]
+    dates = [START + timedelta(days=d) for d in range(args.days)]
+    print(f'{len(direct)} currencies on the implicit base, {len(routed)} '
+          f'on USD or EUR, {args.currencies * args.days} quotations')
+
+    for name, pairs in (('same base', (direct, direct)),
+                        ('routed', (routed, direct))):
+        hot = [
+            dtos.ConverterIn.construct(
+                currency_abb_from=abb(random.choice(pairs[0])),
+                currency_abb_to=abb(random.choice(pairs[1])),
+                date=random.choice(dates), value=100.0
+            )
+            for _ in range(20)
+        ]
+
+        for cold in (False, True):
+            timings = []
+            for _ in range(args.probes):
+                converter = random.choice(hot)
+                if cold:
+                    cache.invalidate()
+                started = time.perf_counter()
+                service.convert_currency(converter)
+                timings.append(time.perf_counter() - started)
+
+            report(
+                f'{name}, {"cache emptied" if cold else "hot pairs"}',
+                summarize(timings)
+            )
+
+
+if __name__ == '__main__':
+    main()
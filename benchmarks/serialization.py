@@ -0,0 +1,90 @@
+"""Response serialization benchmark.
+
+Times building and encoding a listing of ROWS quotations the way endpoints
+did before (validated DTOs, FastAPI's response_model pass, jsonable_encoder
+and the stdlib encoder) against construct() and DTOResponse (orjson):
+
+    python benchmarks/serialization.py --rows 10000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import timedelta
+from typing import List, Optional
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from common import START, package, report, summarize
+
+dtos = package('dtos')
+models = package('models')
+responses = package('responses')
+
+CurrencyQuotationOut = dtos.CurrencyQuotationOut
+
+
+def validated(rows) -> bytes:
+    content = [
+        CurrencyQuotationOut(
+            id=row.id, currency_id=row.currency_id,
+            exchange_rate=row.exchange_rate, date=row.date
+        )
+        for row in rows
+    ]
+    field = create_response_field(
+        name='response', type_=Optional[List[CurrencyQuotationOut]]
+    )
+    encoded = asyncio.run(
+        serialize_response(field=field, response_content=content)
+    )
+    return JSONResponse(encoded).body
+
+
+def constructed(rows) -> bytes:
+    content = [
+        CurrencyQuotationOut.construct(
+            id=row.id, currency_id=row.currency_id,
+            exchange_rate=row.exchange_rate, date=row.date
+        )
+        for row in rows
+    ]
+    return responses.DTOResponse(content).body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = [
+        models.CurrencyQuotation(
+            id=i + 1, currency_id=1, exchange_rate=1 + random.random(),
+            date=START + timedelta(days=i)
+        )
+        for i in range(args.rows)
+    ]
+    assert validated(rows) == constructed(rows)
+
+    results = {}
+    for name, render in (('validated + stdlib json', validated),
+                         ('construct + orjson', constructed)):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            render(rows)
+            timings.append(time.perf_counter() - started)
+        results[name] = summarize(timings)
+        report(f'{name} ({args.rows} rows)', results[name])
+
+    speedup = results['validated + stdlib json']['p50_us'] \
+        / results['construct + orjson']['p50_us']
+    print(f'speedup {speedup:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""Multi-process serving benchmark.
+
+Seeds a SQLite database with CURRENCIES x YEARS of daily quotations, then
+for each worker count starts gunicorn with gunicorn.conf.py (application
+preloaded in the parent) and reports the time until every worker answers,
+the memory of each process and the conversion throughput over HTTP:
+
+    python benchmarks/serving.py --workers 1 2 4 --cache-backend redis
+
+More than one worker needs the redis cache backend, reachable at REDIS_URL.
+
+Pss splits shared pages between the processes mapping them, so the gap
+between Rss and Pss is what workers share with the parent. The load client
+runs on the same machine and competes with the workers for the cores.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from common import ROOT, START, abb, package, seed
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def children(pid: int) -> List[int]:
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def memory(pid: int) -> Dict[str, float]:
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                values[name] = int(rest.split()[0]) / 1024
+
+    return {
+        'rss_mb': values['Rss'],
+        'pss_mb': values['Pss'],
+        'private_mb': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+async def request(reader, writer, port: int, body: bytes) -> int:
+    writer.write(
+        b'POST /converter HTTP/1.1\r\nHost: 127.0.0.1:%d\r\n'
+        b'Content-Type: application/json\r\nContent-Length: %d\r\n\r\n%s'
+        % (port, len(body), body)
+    )
+    await writer.drain()
+
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = next(
+        int(line.split(b':')[1]) for line in head.split(b'\r\n')
+        if line.lower().startswith(b'content-length:')
+    )
+    await reader.readexactly(length)
+    return int(head.split(b' ', 2)[1])
+
+
+async def load(port: int, bodies: List[bytes], concurrency: int,
+               seconds: float) -> float:
+    deadline = time.perf_counter() + seconds
+    done = 0
+
+    async def client() -> None:
+        nonlocal done
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            while time.perf_counter() < deadline:
+                status = await request(
+                    reader, writer, port, random.choice(bodies)
+                )
+                if status != 200:
+                    raise RuntimeError(f'POST /converter returned {status}')
+                done += 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return done / (time.perf_counter() - started)
+
+
+def wait_ready(process: subprocess.Popen, port: int, workers: int,
+               timeout: float = 300) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        if len(children(process.pid)) == workers:
+            try:
+                with socket.create_connection(('127.0.0.1', port), 1) as s:
+                    s.sendall(b'GET /metrics HTTP/1.0\r\n\r\n')
+                    if s.recv(12).endswith(b'200'):
+                        return
+            except OSError:
+                pass
+        time.sleep(0.05)
+
+    raise TimeoutError('gunicorn did not become ready')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--currencies', type=int, default=30)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--cache-backend', default='local')
+    args = parser.parse_args()
+
+    days = args.years * 365
+    abbs = [abb(i) for i in range(args.currencies)]
+    bodies = [
+        json.dumps({
+            'currency_abb_from': random.choice(abbs),
+            'currency_abb_to': random.choice(abbs),
+            'value': 100,
+            'date': (START.fromordinal(
+                START.toordinal() + random.randrange(days)
+            )).isoformat(),
+        }).encode()
+        for _ in range(1000)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copy(os.path.join(ROOT, 'config.yml'), directory)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            package('models')
+            db = package('database').Database(
+                'sqlite:///./currency-converter.sqlite',
+                'sqlite+aiosqlite:///./currency-converter.sqlite'
+            )
+            db.create_database()
+            seed(db, args.currencies, days)
+            db._engine.dispose()
+        finally:
+            os.chdir(cwd)
+        print(f'seeded {args.currencies * days} quotations')
+
+        for workers in args.workers:
+            port = free_port()
+            env = {
+                **os.environ,
+                'PYTHONPATH': ROOT,
+                'PORT': str(port),
+                'HOST': '127.0.0.1',
+                'WEB_CONCURRENCY': str(workers),
+                'CACHE_BACKEND': args.cache_backend,
+            }
+            started = time.perf_counter()
+            process = subprocess.Popen(
+                [
+                    sys.executable, '-m', 'gunicorn', '-c',
+                    os.path.join(ROOT, 'gunicorn.conf.py'),
+                    'currency-converter.application:app',
+                ],
+                cwd=directory, env=env, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_ready(process, port, workers)
+                startup = time.perf_counter() - started
+
+                rps = asyncio.run(
+                    load(port, bodies, args.concurrency, args.seconds)
+                )
+
+                parent = memory(process.pid)
+                forked = [memory(pid) for pid in children(process.pid)]
+                print(
+                    f'{workers} workers: ready in {startup:.2f} s, '
+                    f'{rps:.0f} req/s\n'
+                    f'  parent   rss {parent["rss_mb"]:7.1f} MB  '
+                    f'pss {parent["pss_mb"]:7.1f} MB  '
+                    f'private {parent["private_mb"]:7.1f} MB'
+                )
+                for worker in forked:
+                    print(
+                        f'  worker   rss {worker["rss_mb"]:7.1f} MB  '
+                        f'pss {worker["pss_mb"]:7.1f} MB  '
+                        f'private {worker["private_mb"]:7.1f} MB'
+                    )
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait(60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Cold start benchmark.
+
+Imports currency-converter.application in fresh interpreters under
+`python -X importtime`, against a seeded SQLite database, and reports the
+wall time of each process, the time spent importing and creating the
+application, and the modules with the largest cumulative import time.
+Results are written as JSON and can be compared against a previous run; the
+run fails when the median startup exceeds the budget:
+
+    python benchmarks/startup.py --budget-ms 1500
+    python benchmarks/startup.py --compare benchmarks/results/<previous>.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from common import ROOT, package, seed
+
+APPLICATION = 'currency-converter.application'
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, float]]:
+    # Lines look like "import time:  self [us] | cumulative | <indent>name"
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), depth, int(cumulative) / 1000))
+
+    return modules
+
+
+def cold_start(directory: str, docs: bool) -> Tuple[float, Dict[str, float]]:
+    env = {
+        **os.environ,
+        'PYTHONPATH': ROOT,
+        'API_DOCS': 'true' if docs else 'false',
+    }
+    started = time.perf_counter()
+    process = subprocess.run(
+        [
+            sys.executable, '-X', 'importtime', '-c',
+            f'__import__({APPLICATION!r})',
+        ],
+        cwd=directory, env=env, capture_output=True, text=True, check=True
+    )
+    wall = (time.perf_counter() - started) * 1000
+
+    # The application module creates the app while it is imported, so its
+    # cumulative time covers imports, config, wiring and index loading
+    modules = {}
+    for name, depth, cumulative in parse_importtime(process.stderr):
+        if depth <= 3 or name == APPLICATION:
+            modules[name] = modules.get(name, 0.0) + cumulative
+
+    return wall, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--currencies', type=int, default=30)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=1500.0)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results',
+        f'startup-{datetime.utcnow():%Y%m%dT%H%M%S}.json'
+    )
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copy(os.path.join(ROOT, 'config.yml'), directory)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            package('models')
+            db = package('database').Database(
+                'sqlite:///./currency-converter.sqlite',
+                'sqlite+aiosqlite:///./currency-converter.sqlite'
+            )
+            db.create_database()
+            seed(db, args.currencies, args.years * 365)
+            db._engine.dispose()
+        finally:
+            os.chdir(cwd)
+
+        # The first start writes the quotation snapshot the others open
+        cold_start(directory, docs=True)
+
+        for docs in (True, False):
+            walls = []
+            modules = defaultdict(list)
+            for _ in range(args.repeat):
+                wall, imported = cold_start(directory, docs)
+                walls.append(wall)
+                for name, cumulative in imported.items():
+                    modules[name].append(cumulative)
+
+            results['docs' if docs else 'no docs'] = {
+                'wall_ms': statistics.median(walls),
+                'application_ms': statistics.median(modules[APPLICATION]),
+                'modules_ms': {
+                    name: statistics.median(timings)
+                    for name, timings in modules.items()
+                },
+            }
+
+    for name, result in results.items():
+        print(
+            f'{name:<10} process {result["wall_ms"]:8.1f} ms   '
+            f'{APPLICATION} {result["application_ms"]:8.1f} ms'
+        )
+
+    print(f'\nslowest imports (cumulative, median of {args.repeat})')
+    modules = results['no docs']['modules_ms']
+    for name in sorted(modules, key=modules.get, reverse=True)[:args.top]:
+        print(f'  {name:<44} {modules[name]:8.1f} ms')
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'meta': vars(args), 'results': results}, f, indent=2)
+    print(f'results written to {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']['no docs']['modules_ms']
+        print(f'\ncompared with {args.compare}')
+        for name in sorted(modules, key=modules.get, reverse=True):
+            change = modules[name] - previous.get(name, 0.0)
+            if abs(change) >= 5:
+                print(f'  {name:<44} {change:+8.1f} ms')
+
+    budget = results['no docs']['application_ms']
+    if budget > args.budget_ms:
+        print(f'\nover budget: {budget:.1f} ms > {args.budget_ms:.1f} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
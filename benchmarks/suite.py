@@ -0,0 +1,263 @@
+"""Converter API benchmark and load-test suite.
+
+Seeds a SQLite database with CURRENCIES x YEARS of daily quotations, runs
+microbenchmarks of the repository lookup, the converter service and the list
+endpoints, then an in-process ASGI load test. Results are written as JSON and
+can be compared against a previous run:
+
+    python benchmarks/suite.py --currencies 30 --years 10
+    python benchmarks/suite.py --compare benchmarks/results/<previous>.json
+
+The cross rate matrix grows with days x currencies^2, so keep CURRENCIES
+moderate for long periods (30 currencies x 30 years is about 80 MB).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from common import (
+    ROOT, START, ASGIClient, abb, package, report, seeded_app, summarize
+)
+
+dtos = package('dtos')
+
+
+def time_calls(call: Callable[[Any], Any], probes: List[Any]) -> List[float]:
+    timings = []
+    for probe in probes:
+        started = time.perf_counter()
+        call(probe)
+        timings.append(time.perf_counter() - started)
+
+    return timings
+
+
+async def time_requests(
+        client: ASGIClient, requests: List[Tuple[str, str, str, Any]]
+) -> List[float]:
+    timings = []
+    for method, path, query, body in requests:
+        started = time.perf_counter()
+        status, _ = await client.request(method, path, query, body)
+        timings.append(time.perf_counter() - started)
+        if status >= 400:
+            raise RuntimeError(f'{method} {path}?{query} returned {status}')
+
+    return timings
+
+
+def random_date(days: int) -> date:
+    return START + timedelta(days=random.randrange(days))
+
+
+def converter_request(abbs: List[str], days: int) -> Dict[str, Any]:
+    return {
+        'currency_abb_from': random.choice(abbs),
+        'currency_abb_to': random.choice(abbs),
+        'value': round(random.uniform(1, 1000), 2),
+        'date': random_date(days).isoformat(),
+    }
+
+
+def load_request(
+        abbs: List[str], days: int, currencies: int
+) -> Tuple[str, str, str, Any]:
+    # Mix: conversions dominate, then quotation pages and currency listings
+    roll = random.random()
+    if roll < 0.7:
+        return 'POST', '/converter', '', converter_request(abbs, days)
+    if roll < 0.9:
+        currency_id = random.randint(1, currencies)
+        return (
+            'GET', f'/currencies/{currency_id}/quotations',
+            f'start={random_date(days)}&limit=100', None
+        )
+    return 'GET', '/currencies', '', None
+
+
+async def load_test(
+        client: ASGIClient, requests: List[Tuple[str, str, str, Any]],
+        concurrency: int
+) -> Dict[str, Any]:
+    pending = iter(requests)
+    timings = []
+    statuses = Counter()
+
+    async def worker():
+        for method, path, query, body in pending:
+            started = time.perf_counter()
+            status, _ = await client.request(method, path, query, body)
+            timings.append(time.perf_counter() - started)
+            statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(timings)
+    result['concurrency'] = concurrency
+    result['rps'] = len(timings) / elapsed
+    result['statuses'] = {str(k): v for k, v in sorted(statuses.items())}
+    return result
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline_path: str,
+            threshold: float) -> bool:
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+
+    regressed = False
+    print(f'\ncompared with {baseline_path} (threshold {threshold:.0f}%)')
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+
+        # Throughput regresses downwards, latency upwards
+        key = 'rps' if 'rps' in result else 'p50_us'
+        change = (result[key] / previous[key] - 1) * 100
+        worse = -change if key == 'rps' else change
+        flag = 'REGRESSION' if worse > threshold else ''
+        regressed = regressed or bool(flag)
+        print(
+            f'{name:<36} {key:<7} {previous[key]:10.1f} -> '
+            f'{result[key]:10.1f} ({change:+6.1f}%) {flag}'
+        )
+
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--currencies', type=int, default=30)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--probes', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    parser.add_argument('--compare')
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    days = args.years * 365
+    abbs = [abb(i) for i in range(args.currencies)]
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results',
+        f'{datetime.utcnow():%Y%m%dT%H%M%S}.json'
+    )
+    results = {}
+
+    with seeded_app(args.currencies, days) as seeded:
+        print(
+            f'seeded {args.currencies * days} quotations in '
+            f'{seeded.seed_seconds:.1f} s'
+        )
+        print(f'application started in {seeded.startup_seconds:.1f} s')
+        container = seeded.app.container
+        client = ASGIClient(seeded.app)
+        loop = seeded.loop
+
+        repository = container.currency_quotation_repository()
+        probes = [
+            (random.choice(abbs), random_date(days))
+            for _ in range(args.probes)
+        ]
+        results['repository.get_by_abb_and_date'] = summarize(time_calls(
+            lambda probe: repository.get_by_abb_and_date(*probe), probes
+        ))
+
+        service = container.currency_converter_service()
+        conversions = [
+            dtos.ConverterIn(**converter_request(abbs, days))
+            for _ in range(args.probes)
+        ]
+        results['service.convert_currency'] = summarize(
+            time_calls(service.convert_currency, conversions)
+        )
+        results['service.convert_currency (cached)'] = summarize(
+            time_calls(service.convert_currency, conversions)
+        )
+
+        endpoints = {
+            'GET /currencies': [
+                ('GET', '/currencies', '', None)
+            ] * args.probes,
+            'GET /currencies/{id}/quotations': [
+                (
+                    'GET',
+                    f'/currencies/{random.randint(1, args.currencies)}'
+                    '/quotations',
+                    f'start={random_date(days)}&limit=100', None
+                )
+                for _ in range(args.probes)
+            ],
+            'POST /converter': [
+                ('POST', '/converter', '', converter_request(abbs, days))
+                for _ in range(args.probes)
+            ],
+        }
+        for name, requests in endpoints.items():
+            results[name] = summarize(
+                loop.run_until_complete(time_requests(client, requests))
+            )
+
+        requests = [
+            load_request(abbs, days, args.currencies)
+            for _ in range(args.requests)
+        ]
+        results['load test'] = loop.run_until_complete(
+            load_test(client, requests, args.concurrency)
+        )
+
+    for name, result in results.items():
+        report(name, result)
+    load = results['load test']
+    print(
+        f'{"load test":<36} {load["rps"]:.0f} req/s at concurrency '
+        f'{load["concurrency"]}, statuses {load["statuses"]}'
+    )
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                **vars(args),
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'seed_seconds': seeded.seed_seconds,
+                'startup_seconds': seeded.startup_seconds,
+                'timestamp': datetime.utcnow().isoformat(),
+            },
+            'results': results,
+        }, f, indent=2)
+    print(f'results written to {output}')
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Write path benchmark.
+
+Times add, update_by_id and delete_by_id of the quotation repositories
+(sync and async) against a seeded SQLite database:
+
+    python benchmarks/writes.py --operations 2000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from common import START, package, report, seed, summarize
+
+database = package('database')
+dtos = package('dtos')
+repositories = package('repositories')
+
+
+def time_sync(repository, operations: int, days: int):
+    timings = {'add': [], 'update_by_id': [], 'delete_by_id': []}
+    for i in range(operations):
+        quotation = dtos.CurrencyQuotationIn(
+            exchange_rate=2.0, date=START + timedelta(days=days + i)
+        )
+        started = time.perf_counter()
+        entity = repository.add(1, quotation)
+        timings['add'].append(time.perf_counter() - started)
+
+        quotation.exchange_rate = 3.0
+        started = time.perf_counter()
+        repository.update_by_id(1, entity.id, quotation)
+        timings['update_by_id'].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        repository.delete_by_id(1, entity.id)
+        timings['delete_by_id'].append(time.perf_counter() - started)
+
+    return timings
+
+
+async def time_async(repository, operations: int, days: int):
+    timings = {'add': [], 'update_by_id': [], 'delete_by_id': []}
+    for i in range(operations):
+        quotation = dtos.CurrencyQuotationIn(
+            exchange_rate=2.0, date=START + timedelta(days=days + i)
+        )
+        started = time.perf_counter()
+        entity = await repository.add(1, quotation)
+        timings['add'].append(time.perf_counter() - started)
+
+        quotation.exchange_rate = 3.0
+        started = time.perf_counter()
+        await repository.update_by_id(1, entity.id, quotation)
+        timings['update_by_id'].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await repository.delete_by_id(1, entity.id)
+        timings['delete_by_id'].append(time.perf_counter() - started)
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--currencies', type=int, default=10)
+    parser.add_argument('--days', type=int, default=3650)
+    parser.add_argument('--operations', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.sqlite')
+        db = database.Database(
+            f'sqlite:///{path}', f'sqlite+aiosqlite:///{path}',
+            sqlite={'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+        )
+        db.create_database()
+        seed(db, args.currencies, args.days)
+
+        timings = time_sync(
+            repositories.CurrencyQuotationRepository(db.session),
+            args.operations, args.days
+        )
+        for name, values in timings.items():
+            report(f'sync {name}', summarize(values))
+
+        async def run():
+            timings = await time_async(
+                repositories.AsyncCurrencyQuotationRepository(
+                    db.async_session
+                ),
+                args.operations, args.days
+            )
+            await db._async_engine.dispose()
+            return timings
+
+        for name, values in asyncio.run(run()).items():
+            report(f'async {name}', summarize(values))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,20 @@
 """Application module."""
 
 from fastapi import FastAPI
-from fastapi.openapi.utils import get_openapi
 
 from . import endpoints
-from .containers import Container
+from .containers import CONFIG_LOADER, Container
+from .metrics import MetricsMiddleware, track_cache
+from .profiling import ProfilingMiddleware
 
 
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
 
+    # Only needed once the schema is requested
+    from fastapi.openapi.utils import get_openapi
+
     openapi_schema = get_openapi(
         title="Currency Converter",
         version="0.1.0",
@@ -24,19 +28,53 @@ def custom_openapi():
 
 def create_app() -> FastAPI:
     container = Container()
-    container.config.from_yaml('config.yml')
+    container.config.from_yaml('config.yml', loader=CONFIG_LOADER)
     container.wire(modules=[endpoints])
 
-    db = container.db()
-    db.create_database()
+    # Deployments create the schema beforehand (cli migrate)
+    if container.config.db.create_schema():
+        container.db().create_database()
+
+    index_refresh_service = container.index_refresh_service()
+    index_refresh_service.load()
+    container.invalidations().subscribe(index_refresh_service.refresh)
 
-    app = FastAPI()
-    app.openapi = custom_openapi
+    track_cache('conversion', container.conversion_cache)
+    track_cache('http', container.response_cache)
+
+    if container.config.api.docs():
+        app = FastAPI()
+        app.openapi = custom_openapi
+    else:
+        app = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
     app.container = container
+    app.add_event_handler('shutdown', index_refresh_service.save)
+    app.add_middleware(MetricsMiddleware)
+    if container.config.profiling.enabled():
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=container.config.profiling.token() or '',
+            directory=container.config.profiling.directory(),
+            header=container.config.profiling.header(),
+            limit=container.config.profiling.limit(),
+        )
     app.include_router(endpoints.currency_router)
     app.include_router(endpoints.quotation_router)
     app.include_router(endpoints.converter_router)
+    app.include_router(endpoints.metrics_router)
     return app
 
 
+def before_fork(app: FastAPI) -> None:
+    # Threads do not survive a fork; workers start their own
+    app.container.cache_backend().close()
+
+
+def after_fork(app: FastAPI) -> None:
+    container = app.container
+    container.db().dispose()
+    container.cache_backend().after_fork()
+    container.response_cache().after_fork()
+
+
 app = create_app()
@@ -0,0 +1,438 @@
+"""Caches module."""
+
+import json
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterable, List, Optional,
+    Set, Tuple
+)
+
+if TYPE_CHECKING:
+    from .indexes import RateIndex
+
+
+class TableVersions:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        # The table version each key last changed at, and the last one at
+        # which the whole table did
+        self._key_versions: Dict[Tuple[str, int], int] = {}
+        self._table_changes: Dict[str, int] = {}
+        self._listeners: List[Callable[[str, Tuple[int, ...]], None]] = []
+
+    def get(self, table: str, key: Optional[int] = None) -> int:
+        if key is None:
+            return self._versions.get(table, 0)
+
+        return max(
+            self._key_versions.get((table, key), 0),
+            self._table_changes.get(table, 0)
+        )
+
+    def bump(self, table: str, keys: Iterable[int] = ()) -> int:
+        keys = tuple(keys)
+
+        with self._lock:
+            version = self._versions.get(table, 0) + 1
+            self._versions[table] = version
+            if keys:
+                for key in keys:
+                    self._key_versions[table, key] = version
+            else:
+                self._table_changes[table] = version
+
+        for listener in self._listeners:
+            listener(table, keys)
+
+        return version
+
+    def subscribe(
+            self, listener: Callable[[str, Tuple[int, ...]], None]
+    ) -> None:
+        self._listeners.append(listener)
+
+
+class CacheBackend:
+    name = 'base'
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(
+            self, key: str, value: Any, ttl: Optional[float] = None,
+            tags: Iterable[str] = ()
+    ) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def after_fork(self) -> None:
+        pass
+
+
+class LocalCacheBackend(CacheBackend):
+    name = 'local'
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]' \
+            = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+        self._max_entries = max_entries or 4096
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+
+        if entry is None or entry[0] < time.monotonic():
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+
+        return entry[1]
+
+    def set(
+            self, key: str, value: Any, ttl: Optional[float] = None,
+            tags: Iterable[str] = ()
+    ) -> None:
+        expires = time.monotonic() + ttl if ttl else float('inf')
+        tags = tuple(tags)
+
+        with self._lock:
+            self._entries[key] = (expires, value, tags)
+            self._entries.move_to_end(key)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self._max_entries:
+                self._forget(*self._entries.popitem(last=False))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._forget(key, entry)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        with self._lock:
+            for tag in tags:
+                for key in self._keys_by_tag.pop(tag, ()):
+                    self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        # Nobody else shares this process memory
+        pass
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        pass
+
+    def _forget(self, key: str, entry: Tuple[float, Any, Tuple[str, ...]]):
+        for tag in entry[2]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+class RedisCacheBackend(CacheBackend):
+    name = 'redis'
+
+    def __init__(
+            self,
+            url: Optional[str] = None,
+            prefix: Optional[str] = None,
+            client: Optional[Any] = None
+    ) -> None:
+        if client is None:
+            # Imported here: redis takes longer to import than the rest of
+            # the cache layer, and only this backend needs it
+            try:
+                import redis
+            except ImportError:
+                raise CacheBackendError(
+                    'The redis package is required by the redis backend'
+                )
+            client = redis.Redis.from_url(url or 'redis://localhost:6379/0')
+
+        # Any client speaking the redis-py API works, e.g. fakeredis
+        self._client = client
+        self._prefix = f'{prefix or "currency-converter"}:'
+        self._channel = f'{self._prefix}invalidations'
+        self._origin = uuid.uuid4().hex
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._pubsub = None
+        self._thread = None
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self._prefix + key)
+        return None if raw is None else pickle.loads(raw)
+
+    def set(
+            self, key: str, value: Any, ttl: Optional[float] = None,
+            tags: Iterable[str] = ()
+    ) -> None:
+        key = self._prefix + key
+        px = int(ttl * 1000) if ttl else None
+
+        pipe = self._client.pipeline(transaction=False)
+        pipe.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), px=px)
+        for tag in tags:
+            tag_key = f'{self._prefix}tag:{tag}'
+            pipe.sadd(tag_key, key)
+            if px:
+                pipe.pexpire(tag_key, px)
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._prefix + key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        tag_keys = [f'{self._prefix}tag:{tag}' for tag in tags]
+        if not tag_keys:
+            return
+
+        pipe = self._client.pipeline(transaction=False)
+        for tag_key in tag_keys:
+            pipe.smembers(tag_key)
+        keys = set().union(*pipe.execute())
+
+        self._client.delete(*keys, *tag_keys)
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=f'{self._prefix}*'))
+        for chunk in range(0, len(keys), 500):
+            self._client.delete(*keys[chunk:chunk + 500])
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        self._client.publish(
+            self._channel, json.dumps({**message, 'origin': self._origin})
+        )
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        self._listeners.append(listener)
+
+        if self._thread is None:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{self._channel: self._on_message})
+            self._thread = self._pubsub.run_in_thread(
+                sleep_time=1.0, daemon=True
+            )
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+            self._pubsub.close()
+            self._thread = None
+
+    def after_fork(self) -> None:
+        # Each worker needs its own origin, or workers would ignore each
+        # other's messages, and its own listener thread
+        self._origin = uuid.uuid4().hex
+        self._pubsub = self._thread = None
+
+        listeners, self._listeners = self._listeners, []
+        for listener in listeners:
+            self.subscribe(listener)
+
+    def _on_message(self, raw: Dict[str, Any]) -> None:
+        message = json.loads(raw['data'])
+
+        # Publishers already applied their own changes
+        if message.pop('origin', None) == self._origin:
+            return
+
+        for listener in self._listeners:
+            listener(message)
+
+
+class InvalidationBus:
+    def __init__(
+            self, backend: CacheBackend, versions: TableVersions
+    ) -> None:
+        self._backend = backend
+        self._versions = versions
+        self._listeners: List[Callable[[str, Tuple[int, ...]], None]] = []
+
+        backend.subscribe(self._on_message)
+
+    def publish(self, table: str, keys: Iterable[int] = ()) -> None:
+        self._backend.publish({'table': table, 'keys': list(keys)})
+
+    def subscribe(
+            self, listener: Callable[[str, Tuple[int, ...]], None]
+    ) -> None:
+        self._listeners.append(listener)
+
+    def _on_message(self, message: Dict[str, Any]) -> None:
+        table, keys = message['table'], tuple(message['keys'])
+
+        # Refresh what other workers changed before local caches drop their
+        # entries, so that nothing is cached again from the old state
+        for listener in self._listeners:
+            listener(table, keys)
+        self._versions.bump(table, keys)
+
+
+class ConversionCache:
+    def __init__(
+            self,
+            versions: TableVersions,
+            rate_index: 'RateIndex',
+            backend: CacheBackend,
+            ttl: Optional[float] = None
+    ) -> None:
+        self._lock = threading.Lock()
+        self._backend = backend
+        self._ttl = ttl or 60.0
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+        versions.subscribe(self._on_change)
+        # The converter reads the rate index, which services update after
+        # the repository commit; entries cached in between must go as well
+        rate_index.subscribe(self.invalidate)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._backend.get(f'conversion:{key}')
+
+        # Lookups run in threadpool threads; += is not atomic
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return value
+
+    def put(
+            self,
+            key: str,
+            value: Any,
+            currency_ids: Iterable[int],
+            generation: int
+    ) -> None:
+        with self._lock:
+            # An invalidation ran while the value was being resolved
+            if generation != self._generation:
+                return
+
+            self._backend.set(
+                f'conversion:{key}', value, self._ttl,
+                [f'currency:{currency_id}' for currency_id in currency_ids]
+            )
+
+    def invalidate(self, currency_ids: Iterable[int] = ()) -> None:
+        currency_ids = tuple(currency_ids)
+
+        with self._lock:
+            self._generation += 1
+
+            if currency_ids:
+                self._backend.invalidate_tags(
+                    f'currency:{currency_id}' for currency_id in currency_ids
+                )
+            else:
+                self._backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / lookups if lookups else 0.0,
+            'ttl': self._ttl,
+            'backend': self._backend.name,
+        }
+
+    def _on_change(self, table: str, keys: Tuple[int, ...]) -> None:
+        self.invalidate(keys)
+
+
+class ResponseCache:
+    def __init__(
+            self,
+            max_entries: Optional[int] = None,
+            max_age: Optional[int] = None
+    ) -> None:
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Tuple[bytes, Dict[str, str]]]' \
+            = OrderedDict()
+        self._max_entries = max_entries or 1024
+        self.hits = 0
+        self.misses = 0
+        self._cache_control = f'max-age={max_age or 0}, must-revalidate'
+        # Counters restart with the process, so a restarted worker must not
+        # hand out ETags that a client already holds for other contents
+        self._epoch = uuid.uuid4().hex[:8]
+
+    def after_fork(self) -> None:
+        # Versions count per process; forked workers must not share an epoch
+        self._epoch = uuid.uuid4().hex[:8]
+
+    def etag(self, table: str, version: int) -> str:
+        return f'"{table}-{self._epoch}-{version}"'
+
+    @property
+    def cache_control(self) -> str:
+        return self._cache_control
+
+    def get(
+            self, key: Hashable, version: int
+    ) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        entry = self._entries.get((key, version))
+
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return entry
+
+    def put(
+            self, key: Hashable, version: int, body: bytes,
+            headers: Dict[str, str]
+    ) -> None:
+        with self._lock:
+            self._entries[(key, version)] = (body, headers)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+class CacheBackendError(Exception):
+    pass
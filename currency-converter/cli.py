@@ -0,0 +1,102 @@
+"""CLI module."""
+
+import argparse
+import logging
+import sys
+import urllib.error
+import urllib.request
+from typing import List, Optional
+
+from .containers import CONFIG_LOADER, Container
+from .dtos import QuotationImportOut
+from .migrations import Migrator
+
+
+def import_ptax(container: Container, args: argparse.Namespace) -> None:
+    if args.url:
+        print(post_ptax(args.url, args.file).json())
+        return
+
+    # Only this process learns of the import; a server running with the
+    # local cache backend keeps serving what it loaded
+    service = container.quotation_import_service()
+
+    if args.file == '-':
+        result = service.import_ptax(sys.stdin)
+    else:
+        with open(args.file, encoding='latin-1') as f:
+            result = service.import_ptax(f)
+
+    print(result.json())
+
+
+def post_ptax(url: str, file: str) -> QuotationImportOut:
+    # The file is streamed to POST /quotations/import, chunked, so that the
+    # server imports it and refreshes its own indexes and caches
+    with (sys.stdin.buffer if file == '-' else open(file, 'rb')) as body:
+        request = urllib.request.Request(
+            f'{url.rstrip("/")}/quotations/import', data=body,
+            headers={'Content-Type': 'text/csv'}, method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return QuotationImportOut.parse_raw(response.read())
+        except urllib.error.HTTPError as e:
+            raise SystemExit(
+                f'{e.code} {e.reason}: {e.read().decode(errors="replace")}'
+            )
+
+
+def migrate(container: Container, args: argparse.Namespace) -> None:
+    migrator = Migrator(container.db().engine)
+
+    for report in migrator.upgrade(args.revision):
+        print(
+            f'revision {report.revision} ({report.description}): '
+            f'{report.seconds:.2f} s'
+        )
+        for backfill in report.backfills:
+            print(
+                f'  {backfill.table}: {backfill.rows} rows in '
+                f'{backfill.batches} batches, {backfill.seconds:.2f} s, '
+                f'{backfill.rows_per_second:.0f} rows/s'
+            )
+
+    print(f'database at revision {migrator.current()}')
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='currency-converter')
+    parser.add_argument('--config', default='config.yml')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser(
+        'import-ptax', help='Import a Banco Central PTAX CSV file'
+    )
+    command.add_argument('file', help='PTAX CSV file, or - for stdin')
+    command.add_argument(
+        '--url',
+        help='Import through the server running at this URL, e.g. '
+             'http://localhost:8000, instead of writing to the database'
+    )
+    command.set_defaults(handler=import_ptax)
+
+    command = commands.add_parser(
+        'migrate', help='Apply pending schema revisions'
+    )
+    command.add_argument(
+        '--revision', type=int, help='Stop at this revision'
+    )
+    command.set_defaults(handler=migrate)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    container = Container()
+    container.config.from_yaml(args.config, loader=CONFIG_LOADER)
+
+    args.handler(container, args)
+
+
+if __name__ == '__main__':
+    main()
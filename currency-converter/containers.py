@@ -1,41 +1,191 @@
 """Containers module."""
 
+import yaml
 from dependency_injector import containers, providers
 
+from .caches import (
+    ConversionCache, InvalidationBus, LocalCacheBackend, RedisCacheBackend,
+    ResponseCache, TableVersions
+)
+from .crossrates import CrossRateStore
 from .database import Database
-from .repositories import CurrencyRepository, CurrencyQuotationRepository
+from .indexes import RateIndex
+from .quotations import QuotationStore
+from .repositories import (
+    CurrencyIdCache, CurrencyRepository, CurrencyQuotationRepository,
+    AsyncCurrencyRepository, AsyncCurrencyQuotationRepository
+)
+from .routes import ConversionGraph
 from .services import (
     CurrencyService, CurrencyQuotationService,
-    CurrencyConverterService
+    CurrencyConverterService, IndexRefreshService, QuotationImportService
 )
 
+# libyaml parses the config several times faster when it is available
+CONFIG_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def scoped(scope, provides, *args, **kwargs) -> providers.Selector:
+    # Repositories and services keep no per-request state; with the
+    # "singleton" scope they are built once instead of on every injection
+    return providers.Selector(
+        scope,
+        factory=providers.Factory(provides, *args, **kwargs),
+        singleton=providers.Singleton(provides, *args, **kwargs),
+    )
+
 
 class Container(containers.DeclarativeContainer):
     config = providers.Configuration()
 
-    db = providers.Singleton(Database, db_url=config.db.url)
+    db = providers.Singleton(
+        Database,
+        db_url=config.db.url,
+        async_db_url=config.db.async_url,
+        echo=config.db.echo,
+        pool_size=config.db.pool_size,
+        max_overflow=config.db.max_overflow,
+        pool_pre_ping=config.db.pool_pre_ping,
+        pool_recycle=config.db.pool_recycle,
+        sqlite=config.db.sqlite,
+    )
+
+    quotation_store = providers.Singleton(
+        QuotationStore, snapshot_path=config.quotations.snapshot_path
+    )
+
+    rate_index = providers.Singleton(RateIndex, store=quotation_store)
+
+    conversion_graph = providers.Singleton(
+        ConversionGraph, store=quotation_store
+    )
+
+    quotation_read_backend = providers.Selector(
+        config.quotations.read_backend,
+        database=providers.Object(None),
+        memory=quotation_store,
+    )
+
+    cache_backend = providers.Selector(
+        config.cache.backend,
+        local=providers.Singleton(
+            LocalCacheBackend, max_entries=config.cache.max_entries
+        ),
+        redis=providers.Singleton(
+            RedisCacheBackend,
+            url=config.cache.url,
+            prefix=config.cache.prefix,
+        ),
+    )
+
+    table_versions = providers.Singleton(TableVersions)
+
+    invalidations = providers.Singleton(
+        InvalidationBus, backend=cache_backend, versions=table_versions
+    )
+
+    currency_id_cache = providers.Singleton(
+        CurrencyIdCache, backend=cache_backend, versions=table_versions
+    )
+
+    response_cache = providers.Singleton(
+        ResponseCache,
+        max_entries=config.http_cache.max_entries,
+        max_age=config.http_cache.max_age,
+    )
+
+    conversion_cache = providers.Singleton(
+        ConversionCache,
+        versions=table_versions,
+        rate_index=rate_index,
+        backend=cache_backend,
+        ttl=config.conversion_cache.ttl,
+    )
 
-    currency_repository = providers.Factory(
+    cross_rates = providers.Singleton(
+        CrossRateStore, path=config.crossrates.path
+    )
+
+    currency_repository = scoped(
+        config.di.scope,
         CurrencyRepository,
         session_factory=db.provided.session,
+        currency_ids=currency_id_cache,
+        versions=table_versions,
     )
 
-    currency_service = providers.Factory(
+    async_currency_repository = scoped(
+        config.di.scope,
+        AsyncCurrencyRepository,
+        session_factory=db.provided.async_session,
+        currency_ids=currency_id_cache,
+        versions=table_versions,
+    )
+
+    currency_service = scoped(
+        config.di.scope,
         CurrencyService,
-        currency_repository=currency_repository,
+        currency_repository=async_currency_repository,
+        rate_index=rate_index,
+        invalidations=invalidations,
     )
 
-    currency_quotation_repository = providers.Factory(
+    currency_quotation_repository = scoped(
+        config.di.scope,
         CurrencyQuotationRepository,
         session_factory=db.provided.session,
+        currency_ids=currency_id_cache,
+        versions=table_versions,
+        store=quotation_read_backend,
     )
 
-    currency_quotation_service = providers.Factory(
+    async_currency_quotation_repository = scoped(
+        config.di.scope,
+        AsyncCurrencyQuotationRepository,
+        session_factory=db.provided.async_session,
+        currency_ids=currency_id_cache,
+        versions=table_versions,
+        store=quotation_read_backend,
+    )
+
+    currency_quotation_service = scoped(
+        config.di.scope,
         CurrencyQuotationService,
+        currency_quotation_repo=async_currency_quotation_repository,
+        rate_index=rate_index,
+        cross_rates=cross_rates,
+        invalidations=invalidations,
+    )
+
+    quotation_import_service = scoped(
+        config.di.scope,
+        QuotationImportService,
+        currency_repository=currency_repository,
         currency_quotation_repo=currency_quotation_repository,
+        rate_index=rate_index,
+        cross_rates=cross_rates,
+        invalidations=invalidations,
+        chunk_size=config.importer.chunk_size,
+        base_abb=config.importer.base_abb,
     )
 
-    currency_converter_service = providers.Factory(
-        CurrencyConverterService,
+    index_refresh_service = scoped(
+        config.di.scope,
+        IndexRefreshService,
+        currency_repository=currency_repository,
         currency_quotation_repo=currency_quotation_repository,
+        rate_index=rate_index,
+        cross_rates=cross_rates,
+    )
+
+    currency_converter_service = scoped(
+        config.di.scope,
+        CurrencyConverterService,
+        rate_index=rate_index,
+        cross_rates=cross_rates,
+        conversion_cache=conversion_cache,
+        conversion_graph=conversion_graph,
+        engine=config.converter.engine,
+        rounding=config.converter.rounding,
+        places=config.converter.places,
     )
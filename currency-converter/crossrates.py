@@ -0,0 +1,221 @@
+"""Cross rates module."""
+
+import json
+import os
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from .indexes import RateIndex
+
+
+# The file is only ever written whole by rebuild() and swapped in with
+# os.replace. Each process maps it copy-on-write: its updates stay in its own
+# pages, computed from its own index, and never reach another worker's.
+class CrossRateStore:
+    _chunk_size = 256
+    # Slices allocated past the last date, for the days appended later
+    _headroom = 64
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._state: Optional[
+            Tuple[Dict[int, int], List[int], np.ndarray]
+        ] = None
+
+    @property
+    def _meta_path(self) -> str:
+        return f'{self._path}.json'
+
+    @property
+    def _matrix_path(self) -> str:
+        return f'{self._path}.npy'
+
+    def load(self) -> bool:
+        try:
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            matrix = np.load(self._matrix_path, mmap_mode='c')
+        except (OSError, ValueError):
+            return False
+
+        positions = {
+            currency_id: pos
+            for pos, currency_id in enumerate(meta['currency_ids'])
+        }
+        if matrix.ndim != 3 or len(matrix) < len(meta['dates']) \
+                or matrix.shape[1:] != (len(positions), len(positions)):
+            return False
+
+        self._state = (positions, meta['dates'], matrix)
+        return True
+
+    def rebuild(self, rate_index: RateIndex) -> None:
+        with self._lock:
+            series = rate_index.series()
+            currency_ids = sorted(series)
+            dates = sorted(set().union(*(d for d, _ in series.values())))
+            positions = {
+                currency_id: pos
+                for pos, currency_id in enumerate(currency_ids)
+            }
+
+            # Unique per rebuild: stores of other processes, or of this one,
+            # may be rebuilding from the same path
+            tmp_path = f'{self._path}.{os.getpid()}.{uuid.uuid4().hex}.tmp'
+            tmp_matrix_path = f'{tmp_path}.npy'
+            matrix = open_memmap(
+                tmp_matrix_path, mode='w+', dtype=np.float64,
+                shape=(len(dates) + self._headroom, len(currency_ids),
+                       len(currency_ids))
+            )
+            self._fill(matrix, series, positions, dates, 0, len(dates))
+            matrix.flush()
+            del matrix
+
+            tmp_meta_path = f'{tmp_path}.json'
+            with open(tmp_meta_path, 'w') as f:
+                json.dump({'currency_ids': currency_ids, 'dates': dates}, f)
+
+            # Mapped before the swap: another process may replace the file
+            # right after, with a matrix of its own history
+            matrix = np.load(tmp_matrix_path, mmap_mode='c')
+            os.replace(tmp_matrix_path, self._matrix_path)
+            os.replace(tmp_meta_path, self._meta_path)
+
+            self._state = (positions, dates, matrix)
+
+    def update(
+            self,
+            rate_index: RateIndex,
+            changes: Iterable[Tuple[int, date]]
+    ) -> None:
+        # Only the dates between a changed quotation and the currency's next
+        # one are affected; a new currency or date changes the shape
+        state = self._state
+        if state is None or not state[1]:
+            return self.rebuild(rate_index)
+
+        positions, dates, _ = state
+        series = rate_index.series()
+        if any(d not in positions for d in series):
+            return self.rebuild(rate_index)
+
+        # Dates after the last one, as with the first quotation of each new
+        # day, go to the headroom instead of rewriting the whole matrix
+        changes = list(changes)
+        last = dates[-1]
+        appended = sorted({
+            date_in.toordinal() for _, date_in in changes
+            if date_in.toordinal() > last
+        })
+        if appended:
+            if not self._append(series, appended):
+                return self.rebuild(rate_index)
+            positions, dates, _ = self._state
+
+        ranges = []
+        for currency_id, date_in in changes:
+            ordinal = date_in.toordinal()
+            if ordinal > last:
+                # In an appended slice, filled already
+                continue
+
+            start = bisect_left(dates, ordinal)
+            if currency_id not in positions or start == len(dates) \
+                    or dates[start] != ordinal:
+                return self.rebuild(rate_index)
+
+            currency_dates = series.get(currency_id, ([], []))[0]
+            stop = bisect_right(currency_dates, ordinal)
+            stop = bisect_left(dates, currency_dates[stop]) \
+                if stop < len(currency_dates) else len(dates)
+            ranges.append((start, stop))
+
+        merged = []
+        for start, stop in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+            else:
+                merged.append((start, stop))
+
+        with self._lock:
+            positions, dates, matrix = self._state
+            for start, stop in merged:
+                self._fill(matrix, series, positions, dates, start, stop)
+
+    def _append(
+            self,
+            series: Dict[int, Tuple[List[int], List[float]]],
+            new_dates: List[int]
+    ) -> bool:
+        # The slices are filled before the dates that reach them are set
+        with self._lock:
+            positions, dates, matrix = self._state
+            dates = dates + new_dates
+            if len(dates) > len(matrix):
+                return False
+
+            self._fill(
+                matrix, series, positions, dates,
+                len(dates) - len(new_dates), len(dates)
+            )
+            self._state = (positions, dates, matrix)
+
+        return True
+
+    def get_rate(
+            self,
+            currency_id_from: int,
+            currency_id_to: int,
+            date_in: Optional[date] = None
+    ) -> Optional[float]:
+        state = self._state
+        if state is None:
+            return None
+
+        positions, dates, matrix = state
+        i = positions.get(currency_id_from)
+        j = positions.get(currency_id_to)
+        if i is None or j is None:
+            return None
+
+        ordinal = date_in.toordinal() if date_in else date.max.toordinal()
+        slot = bisect_right(dates, ordinal) - 1
+        if slot < 0:
+            return None
+
+        rate = matrix[slot, i, j]
+        return None if np.isnan(rate) else float(rate)
+
+    def _fill(
+            self,
+            matrix: np.ndarray,
+            series: Dict[int, Tuple[List[int], List[float]]],
+            positions: Dict[int, int],
+            dates: List[int],
+            start: int,
+            stop: int
+    ) -> None:
+        slots = np.asarray(dates[start:stop], dtype=np.int64)
+        rates = np.full((len(slots), len(positions)), np.nan)
+
+        for currency_id, (currency_dates, currency_rates) in series.items():
+            if not currency_dates:
+                continue
+            idx = np.searchsorted(currency_dates, slots, side='right') - 1
+            valid = idx >= 0
+            rates[valid, positions[currency_id]] = \
+                np.asarray(currency_rates)[idx[valid]]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for offset in range(0, len(slots), self._chunk_size):
+                chunk = rates[offset:offset + self._chunk_size]
+                matrix[start + offset:start + offset + len(chunk)] = \
+                    chunk[:, :, None] / chunk[:, None, :]
@@ -1,21 +1,62 @@
 """Database module."""
 
 import logging
-from contextlib import contextmanager, AbstractContextManager
-from typing import Callable
+import time
+from contextlib import (
+    asynccontextmanager, contextmanager, AbstractAsyncContextManager,
+    AbstractContextManager
+)
+from typing import Any, Callable, Dict, List, Optional
 
 from sqlalchemy import create_engine, orm, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .metrics import db_query_duration, db_sessions
+from .migrations import Migrator, RevisionReport
+from .profiling import captured_statements
 
 logger = logging.getLogger(__name__)
 Base = declarative_base()
 
 
 class Database:
-    def __init__(self, db_url: str) -> None:
-        self._engine = create_engine(db_url, echo=True)
-        self._conf_fk()
+    def __init__(
+            self,
+            db_url: str,
+            async_db_url: str,
+            echo: bool = False,
+            pool_size: Optional[int] = None,
+            max_overflow: Optional[int] = None,
+            pool_pre_ping: bool = False,
+            pool_recycle: Optional[int] = None,
+            sqlite: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        pool_options = {
+            'echo': bool(echo),
+            'pool_pre_ping': bool(pool_pre_ping),
+        }
+        if pool_size is not None:
+            pool_options['pool_size'] = pool_size
+        if max_overflow is not None:
+            pool_options['max_overflow'] = max_overflow
+        if pool_recycle is not None:
+            pool_options['pool_recycle'] = pool_recycle
+
+        self._sqlite_pragmas = sqlite or {}
+        self._engine = create_engine(
+            db_url, **self._engine_options(db_url, QueuePool, pool_options)
+        )
+        self._async_engine = create_async_engine(
+            async_db_url,
+            **self._engine_options(
+                async_db_url, AsyncAdaptedQueuePool, pool_options
+            )
+        )
+        self._conf_connect(db_url, async_db_url)
         self._session_factory = orm.scoped_session(
             orm.sessionmaker(
                 autocommit=False,
@@ -23,13 +64,32 @@ class Database:
                 bind=self._engine,
             ),
         )
+        self._async_session_factory = orm.sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            bind=self._async_engine,
+            class_=AsyncSession,
+        )
+
+    @property
+    def engine(self) -> Engine:
+        return self._engine
+
+    def create_database(self) -> List[RevisionReport]:
+        # The schema is whatever the revisions build, not Base.metadata
+        return Migrator(self._engine).upgrade()
 
-    def create_database(self) -> None:
-        Base.metadata.create_all(self._engine)
+    def dispose(self) -> None:
+        # In a forked worker: forget the connections inherited from the
+        # parent without closing them under its feet
+        self._engine.dispose(close=False)
+        self._async_engine.sync_engine.dispose(close=False)
 
     @contextmanager
     def session(self) -> Callable[..., AbstractContextManager[Session]]:
         session: Session = self._session_factory()
+        db_sessions.inc('sync')
 
         try:
             yield session
@@ -40,9 +100,75 @@ class Database:
         finally:
             session.close()
 
-    def _conf_fk(self):
-        event.listen(self._engine, 'connect', self._fk_pragma_on_connect)
+    @asynccontextmanager
+    async def async_session(
+            self
+    ) -> Callable[..., AbstractAsyncContextManager[AsyncSession]]:
+        session: AsyncSession = self._async_session_factory()
+        db_sessions.inc('async')
+
+        try:
+            yield session
+        except Exception:
+            logger.exception('Session rollback because of exception')
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    @staticmethod
+    def _engine_options(
+            db_url: str, poolclass: type, pool_options: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        options = dict(pool_options)
+
+        # SQLAlchemy defaults file-based SQLite to NullPool, which reopens
+        # the file (and reruns the pragmas) on every checkout
+        if make_url(db_url).get_backend_name() == 'sqlite':
+            options['poolclass'] = poolclass
+            options['connect_args'] = {'check_same_thread': False}
+
+        return options
+
+    def _conf_connect(self, db_url: str, async_db_url: str):
+        # Pragmas, foreign_keys included, are SQLite statements
+        for engine, url in ((self._engine, db_url),
+                            (self._async_engine.sync_engine, async_db_url)):
+            if make_url(url).get_backend_name() == 'sqlite':
+                event.listen(engine, 'connect', self._pragma_on_connect)
+
+        for engine, label in ((self._engine, 'sync'),
+                              (self._async_engine.sync_engine, 'async')):
+            event.listen(
+                engine, 'before_cursor_execute', self._before_execute
+            )
+            event.listen(
+                engine, 'after_cursor_execute', self._after_execute(label)
+            )
+
+    @staticmethod
+    def _before_execute(conn, cursor, statement, parameters, context,
+                        executemany):
+        context._query_start = time.perf_counter()
 
     @staticmethod
-    def _fk_pragma_on_connect(dbapi_con, con_record):
-        dbapi_con.execute('pragma foreign_keys=ON')
+    def _after_execute(label: str):
+        def after_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+            elapsed = time.perf_counter() - context._query_start
+            db_query_duration.observe(
+                elapsed, label, statement.split(None, 1)[0].upper()
+            )
+
+            statements = captured_statements.get()
+            if statements is not None:
+                statements.append((elapsed, statement, executemany))
+
+        return after_execute
+
+    def _pragma_on_connect(self, dbapi_con, con_record):
+        cursor = dbapi_con.cursor()
+        cursor.execute('pragma foreign_keys=ON')
+        for pragma, value in self._sqlite_pragmas.items():
+            cursor.execute(f'pragma {pragma}={value}')
+        cursor.close()
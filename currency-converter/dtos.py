@@ -1,7 +1,20 @@
 from datetime import date
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, constr
+from pydantic import BaseModel, constr, root_validator, validator
+
+from .fixedpoint import RATE_PLACES, to_scaled
+
+
+def check_exchange_rate(value: float) -> float:
+    # Rates are stored at RATE_PLACES decimals and divided by, so a rate
+    # rounding to 0 there is refused
+    if to_scaled(value) <= 0:
+        raise ValueError(
+            f'must be positive at {RATE_PLACES} decimals, got {value}'
+        )
+
+    return value
 
 
 class CurrencyIn(BaseModel):
@@ -18,6 +31,11 @@ class CurrencyOut(BaseModel):
 class CurrencyQuotationIn(BaseModel):
     exchange_rate: float
     date: Optional[date]
+    base_currency_id: Optional[int]
+
+    _check_exchange_rate = validator(
+        'exchange_rate', allow_reuse=True
+    )(check_exchange_rate)
 
 
 class CurrencyQuotationOut(BaseModel):
@@ -25,6 +43,7 @@ class CurrencyQuotationOut(BaseModel):
     exchange_rate: float
     date: Optional[date]
     id: int
+    base_currency_id: Optional[int]
 
 
 class ConverterIn(BaseModel):
@@ -38,3 +57,71 @@ class ConverterOut(BaseModel):
     CurrencyQuotationFrom: CurrencyQuotationOut
     CurrencyQuotationTo: CurrencyQuotationOut
     value: float
+
+
+class ConverterBatchIn(BaseModel):
+    currency_abb_from: List[constr(regex='^[A-Z]{3}$')]
+    currency_abb_to: List[constr(regex='^[A-Z]{3}$')]
+    date: Optional[List[Optional[date]]]
+    value: List[float]
+
+    @root_validator(skip_on_failure=True)
+    def check_lengths(cls, values):
+        size = len(values['value'])
+        columns = ['currency_abb_from', 'currency_abb_to']
+        if values.get('date') is not None:
+            columns.append('date')
+
+        for column in columns:
+            if len(values[column]) != size:
+                raise ValueError(f'{column} must have {size} items')
+
+        return values
+
+
+class ConverterBatchOut(BaseModel):
+    value: List[float]
+
+
+class ConverterSeriesOut(BaseModel):
+    currency_abb_from: str
+    currency_abb_to: str
+    date: List[date]
+    rate: List[float]
+
+
+class ConverterCacheOut(BaseModel):
+    hits: int
+    misses: int
+    hit_ratio: float
+    ttl: float
+    backend: str
+
+
+class QuotationImportOut(BaseModel):
+    read: int
+    imported: int
+    skipped: int
+
+
+class QuotationBulkIn(BaseModel):
+    currency_abb: constr(regex='^[A-Z]{3}$')
+    exchange_rate: float
+    date: Optional[date]
+    base_currency_abb: Optional[constr(regex='^[A-Z]{3}$')]
+
+    _check_exchange_rate = validator(
+        'exchange_rate', allow_reuse=True
+    )(check_exchange_rate)
+
+
+class QuotationBulkConflict(BaseModel):
+    index: int
+    currency_abb: str
+    date: Optional[date]
+    reason: str
+
+
+class QuotationBulkOut(BaseModel):
+    quotations: List[CurrencyQuotationOut]
+    conflicts: List[QuotationBulkConflict]
@@ -1,47 +1,164 @@
 """Endpoints module."""
 
-from typing import Optional, List
+import asyncio
+from datetime import date
+from typing import (
+    Awaitable, Callable, Dict, Hashable, Iterator, Optional, List, Tuple,
+    Union
+)
 
 from dependency_injector.wiring import inject, Provide
-from fastapi import APIRouter, Depends, Response, status
-from fastapi.responses import PlainTextResponse
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from . import metrics
+from .caches import ResponseCache, TableVersions
 
 from .containers import Container
 from .dtos import (
     CurrencyIn, CurrencyOut, CurrencyQuotationIn,
-    CurrencyQuotationOut, ConverterIn, ConverterOut
+    CurrencyQuotationOut, ConverterIn, ConverterOut,
+    ConverterBatchIn, ConverterBatchOut, ConverterCacheOut, ConverterSeriesOut,
+    QuotationImportOut,
+    QuotationBulkIn, QuotationBulkOut
 )
+from .importers import ImportFormatError
+from .models import Currency, CurrencyQuotation
+from .responses import DTOResponse
 from .repositories import NotFoundError, DataBaseIntegrityError
 from .services import (
     CurrencyService, CurrencyQuotationService,
-    CurrencyConverterService
+    CurrencyConverterService, QuotationImportService, InvalidCursorError
 )
 
 currency_router = APIRouter(tags=['currency'])
 quotation_router = APIRouter(tags=['currency_quotation'])
 converter_router = APIRouter(tags=['converter'])
+metrics_router = APIRouter(tags=['metrics'])
+
+STREAMING_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Request chunks (of about 64 KB) read ahead of a PTAX import
+IMPORT_QUEUE_SIZE = 64
+
+
+async def feed_lines(request: Request, queue: asyncio.Queue) -> None:
+    # PTAX files are latin-1, one byte per character, so chunks decode on
+    # their own; a line cut between two chunks waits for the next one
+    try:
+        pending = ''
+        async for chunk in request.stream():
+            lines = (pending + chunk.decode('latin-1')).split('\n')
+            pending = lines.pop()
+            await queue.put(lines)
+
+        await queue.put([pending])
+        await queue.put(None)
+    except Exception as e:
+        # The reader takes the error next, in place of lines it no longer
+        # needs
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(e)
+
+
+def queued_lines(
+        queue: asyncio.Queue, loop: asyncio.AbstractEventLoop
+) -> Iterator[str]:
+    # Runs in a worker thread, waiting on the event loop for each chunk
+    while True:
+        lines = asyncio.run_coroutine_threadsafe(queue.get(), loop).result()
+        if lines is None:
+            return
+        if isinstance(lines, Exception):
+            raise lines
+
+        yield from lines
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # '*' or a list of tags, compared weakly: W/"x" matches "x"
+    if if_none_match is None:
+        return False
+
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return tags == ['*'] or any(
+        (tag[2:] if tag.startswith('W/') else tag) == etag for tag in tags
+    )
+
+
+async def cached_response(
+        request: Request,
+        response_cache: ResponseCache,
+        key: Hashable,
+        table: str,
+        version: int,
+        render: Callable[[], Awaitable[Tuple[object, Dict[str, str]]]]
+) -> Response:
+    etag = response_cache.etag(table, version)
+    headers = {'ETag': etag, 'Cache-Control': response_cache.cache_control}
+
+    # Rendered even for a 304, which carries the same headers, such as
+    # X-Next-Cursor
+    entry = response_cache.get(key, version)
+    if entry is None:
+        content, extra_headers = await render()
+        body = DTOResponse(content).body
+        response_cache.put(key, version, body, extra_headers)
+        entry = body, extra_headers
+
+    body, extra_headers = entry
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={**headers, **extra_headers}
+        )
+
+    return Response(
+        content=body, media_type='application/json',
+        headers={**headers, **extra_headers}
+    )
 
 
 @currency_router.get('/currencies', response_model=Optional[List[CurrencyOut]])
 @inject
-def get_list(
+async def get_list(
+        request: Request,
         currency_service: CurrencyService = Depends(
             Provide[Container.currency_service]
         ),
+        table_versions: TableVersions = Depends(
+            Provide[Container.table_versions]
+        ),
+        response_cache: ResponseCache = Depends(
+            Provide[Container.response_cache]
+        ),
 ):
-    return currency_service.get_currencies()
+    async def render():
+        return await currency_service.get_currencies(), {}
+
+    return await cached_response(
+        request, response_cache, 'currencies', Currency.__tablename__,
+        table_versions.get(Currency.__tablename__), render
+    )
 
 
 @currency_router.get('/currencies/{currency_id}', response_model=CurrencyOut)
 @inject
-def get_by_id(
+async def get_by_id(
         currency_id: int,
         currency_service: CurrencyService = Depends(
             Provide[Container.currency_service]
         ),
 ):
     try:
-        return currency_service.get_currency_by_id(currency_id)
+        return DTOResponse(
+            await currency_service.get_currency_by_id(currency_id)
+        )
     except NotFoundError:
         return Response(status_code=status.HTTP_404_NOT_FOUND)
 
@@ -51,14 +168,17 @@ def get_by_id(
     response_model=CurrencyOut
 )
 @inject
-def add(
+async def add(
         currency: CurrencyIn,
         currency_service: CurrencyService = Depends(
             Provide[Container.currency_service]
         ),
 ):
     try:
-        return currency_service.create_currency(currency)
+        return DTOResponse(
+            await currency_service.create_currency(currency),
+            status_code=status.HTTP_201_CREATED
+        )
     except DataBaseIntegrityError as e:
         return PlainTextResponse(
             str(e), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -67,7 +187,7 @@ def add(
 
 @currency_router.put('/currencies/{currency_id}', response_model=CurrencyOut)
 @inject
-def update(
+async def update(
         currency_id: int,
         currency: CurrencyIn,
         currency_service: CurrencyService = Depends(
@@ -75,7 +195,9 @@ def update(
         ),
 ):
     try:
-        return currency_service.update_currency(currency_id, currency)
+        return DTOResponse(
+            await currency_service.update_currency(currency_id, currency)
+        )
     except DataBaseIntegrityError as e:
         return PlainTextResponse(
             str(e), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -88,14 +210,14 @@ def update(
     '/currencies/{currency_id}', status_code=status.HTTP_204_NO_CONTENT
 )
 @inject
-def remove(
+async def remove(
         currency_id: int,
         currency_service: CurrencyService = Depends(
             Provide[Container.currency_service]
         ),
 ):
     try:
-        currency_service.delete_currency_by_id(currency_id)
+        await currency_service.delete_currency_by_id(currency_id)
     except NotFoundError:
         return Response(status_code=status.HTTP_404_NOT_FOUND)
     else:
@@ -107,13 +229,62 @@ def remove(
     response_model=Optional[List[CurrencyQuotationOut]]
 )
 @inject
-def get_list(
+async def get_list(
         currency_id: int,
+        request: Request,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = Query(None, ge=1),
+        output_format: str = Query(
+            'json', alias='format', regex='^(json|ndjson|csv)$'
+        ),
         currency_quotation_service: CurrencyQuotationService = Depends(
             Provide[Container.currency_quotation_service]
         ),
+        table_versions: TableVersions = Depends(
+            Provide[Container.table_versions]
+        ),
+        response_cache: ResponseCache = Depends(
+            Provide[Container.response_cache]
+        ),
 ):
-    return currency_quotation_service.get_currency_quotations(currency_id)
+    try:
+        currency_quotation_service.parse_cursor(cursor)
+    except InvalidCursorError as e:
+        return PlainTextResponse(
+            str(e), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    if output_format != 'json':
+        return StreamingResponse(
+            currency_quotation_service.stream_currency_quotations(
+                currency_id, output_format, start, end, cursor, limit
+            ),
+            media_type=STREAMING_MEDIA_TYPES[output_format]
+        )
+
+    async def render():
+        currency_quotations = \
+            await currency_quotation_service.get_currency_quotations(
+                currency_id, start, end, cursor, limit
+            )
+
+        headers = {}
+        if limit is not None and len(currency_quotations) == limit:
+            headers['X-Next-Cursor'] = currency_quotation_service.make_cursor(
+                currency_quotations[-1]
+            )
+
+        return currency_quotations, headers
+
+    return await cached_response(
+        request, response_cache,
+        ('quotations', currency_id, start, end, cursor, limit),
+        f'{CurrencyQuotation.__tablename__}-{currency_id}',
+        table_versions.get(CurrencyQuotation.__tablename__, currency_id),
+        render
+    )
 
 
 @quotation_router.get(
@@ -121,7 +292,7 @@ def get_list(
     response_model=CurrencyQuotationOut
 )
 @inject
-def get_by_id(
+async def get_by_id(
         currency_id: int,
         quotation_id: int,
         currency_quotation_service: CurrencyQuotationService = Depends(
@@ -129,8 +300,10 @@ def get_by_id(
         ),
 ):
     try:
-        return currency_quotation_service.get_currency_quotation_by_id(
-            currency_id, quotation_id
+        return DTOResponse(
+            await currency_quotation_service.get_currency_quotation_by_id(
+                currency_id, quotation_id
+            )
         )
     except NotFoundError:
         return Response(status_code=status.HTTP_404_NOT_FOUND)
@@ -142,7 +315,7 @@ def get_by_id(
     response_model=CurrencyQuotationOut
 )
 @inject
-def add(
+async def add(
         currency_id: int,
         currency_quotation: CurrencyQuotationIn,
         currency_quotation_service: CurrencyQuotationService = Depends(
@@ -150,8 +323,11 @@ def add(
         ),
 ):
     try:
-        return currency_quotation_service.create_currency_quotation(
-            currency_id, currency_quotation
+        return DTOResponse(
+            await currency_quotation_service.create_currency_quotation(
+                currency_id, currency_quotation
+            ),
+            status_code=status.HTTP_201_CREATED
         )
     except DataBaseIntegrityError as e:
         return PlainTextResponse(
@@ -164,7 +340,7 @@ def add(
     response_model=CurrencyQuotationOut
 )
 @inject
-def update(
+async def update(
         currency_id: int,
         quotation_id: int,
         currency_quotation: CurrencyQuotationIn,
@@ -173,8 +349,10 @@ def update(
         ),
 ):
     try:
-        return currency_quotation_service.update_currency_quotation(
-            currency_id, quotation_id, currency_quotation
+        return DTOResponse(
+            await currency_quotation_service.update_currency_quotation(
+                currency_id, quotation_id, currency_quotation
+            )
         )
     except DataBaseIntegrityError as e:
         return PlainTextResponse(
@@ -189,7 +367,7 @@ def update(
     status_code=status.HTTP_204_NO_CONTENT
 )
 @inject
-def remove(
+async def remove(
         currency_id: int,
         quotation_id: int,
         currency_quotation_service: CurrencyQuotationService = Depends(
@@ -197,7 +375,7 @@ def remove(
         ),
 ):
     try:
-        currency_quotation_service.delete_currency_quotation_by_id(
+        await currency_quotation_service.delete_currency_quotation_by_id(
             currency_id, quotation_id
         )
     except NotFoundError:
@@ -206,17 +384,120 @@ def remove(
         return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
+@quotation_router.post('/quotations/bulk', response_model=QuotationBulkOut)
+@inject
+async def bulk_upsert(
+        currency_quotations: List[QuotationBulkIn],
+        currency_quotation_service: CurrencyQuotationService = Depends(
+            Provide[Container.currency_quotation_service]
+        ),
+):
+    return DTOResponse(
+        await currency_quotation_service.upsert_currency_quotations(
+            currency_quotations
+        )
+    )
+
+
+@quotation_router.post(
+    '/quotations/import', response_model=QuotationImportOut
+)
+@inject
+async def import_ptax(
+        request: Request,
+        quotation_import_service: QuotationImportService = Depends(
+            Provide[Container.quotation_import_service]
+        ),
+):
+    # The upload is imported as it arrives, never held whole in memory
+    queue = asyncio.Queue(maxsize=IMPORT_QUEUE_SIZE)
+    feeder = asyncio.ensure_future(feed_lines(request, queue))
+
+    try:
+        return await run_in_threadpool(
+            quotation_import_service.import_ptax,
+            queued_lines(queue, asyncio.get_running_loop())
+        )
+    except ImportFormatError as e:
+        return PlainTextResponse(
+            str(e), status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    finally:
+        feeder.cancel()
+
+
 @converter_router.post('/converter', response_model=ConverterOut)
 @inject
-def converter(
+async def converter(
         converter_in: ConverterIn,
         currency_converter_service: CurrencyConverterService = Depends(
             Provide[Container.currency_converter_service]
         ),
 ):
     try:
-        return currency_converter_service.convert_currency(converter_in)
+        return DTOResponse(
+            currency_converter_service.convert_currency(converter_in)
+        )
+    except NotFoundError as e:
+        return PlainTextResponse(
+            str(e), status_code=status.HTTP_404_NOT_FOUND
+        )
+
+
+@converter_router.get('/converter/cache', response_model=ConverterCacheOut)
+@inject
+async def converter_cache(
+        currency_converter_service: CurrencyConverterService = Depends(
+            Provide[Container.currency_converter_service]
+        ),
+):
+    return currency_converter_service.get_cache_stats()
+
+
+@converter_router.post('/converter/batch', response_model=ConverterBatchOut)
+@inject
+async def converter_batch(
+        converter_in: Union[List[ConverterIn], ConverterBatchIn],
+        currency_converter_service: CurrencyConverterService = Depends(
+            Provide[Container.currency_converter_service]
+        ),
+):
+    try:
+        return DTOResponse(
+            currency_converter_service.convert_currency_batch(converter_in)
+        )
+    except NotFoundError as e:
+        return PlainTextResponse(
+            str(e), status_code=status.HTTP_404_NOT_FOUND
+        )
+
+
+@converter_router.get('/converter/series', response_model=ConverterSeriesOut)
+@inject
+async def converter_series(
+        currency_abb_from: str = Query(
+            ..., alias='from', regex='^[A-Z]{3}$'
+        ),
+        currency_abb_to: str = Query(..., alias='to', regex='^[A-Z]{3}$'),
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        currency_converter_service: CurrencyConverterService = Depends(
+            Provide[Container.currency_converter_service]
+        ),
+):
+    try:
+        return DTOResponse(currency_converter_service.get_series(
+            currency_abb_from, currency_abb_to, start, end
+        ))
     except NotFoundError as e:
         return PlainTextResponse(
             str(e), status_code=status.HTTP_404_NOT_FOUND
         )
+
+
+@metrics_router.get('/metrics', include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type='text/plain; version=0.0.4'
+    )
@@ -0,0 +1,230 @@
+"""Fixed point module."""
+
+from decimal import (
+    Decimal, ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, ROUND_HALF_DOWN,
+    ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_UP
+)
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+# Rates are held as integers in units of 10 ** -RATE_PLACES; int64 leaves
+# room for rates up to 9.2e10
+RATE_PLACES = 8
+RATE_SCALE = 10 ** RATE_PLACES
+
+# Batches scale amounts to at most this many decimals in int64; amounts with
+# more are converted one by one
+MAX_AMOUNT_PLACES = 9
+
+# How far from an integer a float scaled by a power of ten may land through
+# representation and multiplication error alone
+_ULPS = 2 ** -50
+
+# The modes of decimal, by name; half_up and up round away from zero
+ROUNDING_MODES = {
+    'half_even': ROUND_HALF_EVEN,
+    'half_up': ROUND_HALF_UP,
+    'half_down': ROUND_HALF_DOWN,
+    'up': ROUND_UP,
+    'down': ROUND_DOWN,
+    'ceiling': ROUND_CEILING,
+    'floor': ROUND_FLOOR,
+}
+
+Number = Union[int, float, str, Decimal]
+
+
+def check_rounding(rounding: str) -> str:
+    if rounding not in ROUNDING_MODES:
+        raise RoundingModeError(rounding)
+
+    return rounding
+
+
+def to_scaled(
+        value: Number, places: int = RATE_PLACES, rounding: str = 'half_even'
+) -> int:
+    if isinstance(value, float):
+        # Exact when the value has no more than `places` decimals and fits
+        # the float mantissa, which is the common case
+        scaled = value * 10 ** places
+        units = round(scaled)
+        if abs(scaled - units) <= abs(scaled) * _ULPS \
+                and abs(scaled) < 2 ** 53:
+            return units
+
+        # repr is the shortest decimal that reads back as the same float,
+        # i.e. the digits the client sent, not the binary approximation
+        value = repr(value)
+
+    return int(Decimal(value).scaleb(places).to_integral_value(
+        ROUNDING_MODES[rounding]
+    ))
+
+
+def from_scaled(units: int, places: int) -> float:
+    # The nearest float to the decimal, so it prints as that decimal
+    return units / 10 ** places
+
+
+def divide(numerator: int, denominator: int, rounding: str) -> int:
+    # denominator > 0; divmod floors, whatever the sign of numerator
+    quotient, remainder = divmod(numerator, denominator)
+    if not remainder or rounding == 'floor':
+        return quotient
+    if rounding == 'ceiling':
+        return quotient + 1
+    if rounding == 'down':
+        return quotient + (numerator < 0)
+    if rounding == 'up':
+        return quotient + (numerator > 0)
+
+    twice = 2 * remainder
+    if twice != denominator:
+        return quotient + (twice > denominator)
+    if rounding == 'half_up':
+        return quotient + (numerator > 0)
+    if rounding == 'half_down':
+        return quotient + (numerator < 0)
+
+    return quotient + (quotient & 1)
+
+
+def divide_array(
+        numerator: np.ndarray, denominator: np.ndarray, rounding: str
+) -> np.ndarray:
+    # divide() over int64 arrays
+    quotient, remainder = np.divmod(numerator, denominator)
+    inexact = remainder != 0
+    if rounding == 'floor':
+        return quotient
+    if rounding == 'ceiling':
+        return quotient + inexact
+    if rounding == 'down':
+        return quotient + (inexact & (numerator < 0))
+    if rounding == 'up':
+        return quotient + (inexact & (numerator > 0))
+
+    twice = 2 * remainder
+    result = quotient + (twice > denominator)
+    half = twice == denominator
+    if rounding == 'half_up':
+        return result + (half & (numerator > 0))
+    if rounding == 'half_down':
+        return result + (half & (numerator < 0))
+
+    return result + (half & (quotient & 1 == 1))
+
+
+def split(value: Number) -> Tuple[int, int]:
+    # The decimal the client sent, as (units, places): 10.0005 is
+    # (100005, 4)
+    if isinstance(value, float):
+        value = repr(value)
+
+    digits = Decimal(value)
+    exponent = digits.as_tuple().exponent
+    if exponent >= 0:
+        return int(digits), 0
+
+    return int(digits.scaleb(-exponent)), -exponent
+
+
+def convert(
+        units: int, units_places: int, rate_from: int, rate_to: int,
+        places: int, rounding: str
+) -> int:
+    # units * 10 ** -units_places * rate_from / rate_to at `places`
+    # decimals, exactly, then rounded once
+    numerator = units * rate_from
+    denominator = rate_to
+    if places >= units_places:
+        numerator *= 10 ** (places - units_places)
+    else:
+        denominator *= 10 ** (units_places - places)
+
+    return divide(numerator, denominator, rounding)
+
+
+def convert_value(
+        value: Number, rate_from: int, rate_to: int, places: int,
+        rounding: str
+) -> int:
+    return convert(*split(value), rate_from, rate_to, places, rounding)
+
+
+def scale_array(
+        values: np.ndarray, places: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    # values * 10 ** places as int64, and where that is exact (as in
+    # to_scaled)
+    scaled = values * 10 ** places
+    units = np.rint(scaled)
+    exact = (np.abs(scaled - units) <= np.abs(scaled) * _ULPS) & \
+        (np.abs(scaled) < 2 ** 53)
+
+    return np.where(exact, units, 0).astype(np.int64), exact
+
+
+def convert_array(
+        values: Sequence[float], rates_from: Sequence[int],
+        rates_to: Sequence[int], places: int, rounding: str
+) -> np.ndarray:
+    # convert_value() over a batch, with int64 wherever it cannot overflow
+    try:
+        rates_from = np.asarray(rates_from, dtype=np.int64)
+        rates_to = np.asarray(rates_to, dtype=np.int64)
+    except OverflowError:
+        # Rates along a route are products of several; without int64 rates
+        # the whole batch goes through Python integers
+        return np.array([
+            convert_value(value, rate_from, rate_to, places, rounding)
+            for value, rate_from, rate_to in zip(values, rates_from, rates_to)
+        ], dtype=object)
+
+    # Each amount is scaled to the fewest decimals holding it exactly
+    values = np.asarray(values, dtype=np.float64)
+    units = np.zeros(len(values), dtype=np.int64)
+    units_places = np.zeros(len(values), dtype=np.int64)
+    exact = np.zeros(len(values), dtype=bool)
+    for candidate in range(MAX_AMOUNT_PLACES + 1):
+        scaled, found = scale_array(values, candidate)
+        found &= ~exact
+        units[found] = scaled[found]
+        units_places[found] = candidate
+        exact |= found
+        if exact.all():
+            break
+
+    powers = 10 ** np.arange(MAX_AMOUNT_PLACES + places + 1, dtype=np.int64)
+    numerator_scale = powers[np.maximum(places - units_places, 0)]
+    denominator_scale = powers[np.maximum(units_places - places, 0)]
+
+    # Bounds in float64, which cannot overflow; 2 ** 62 leaves room for its
+    # rounding. Other rows are converted with Python integers
+    safe = exact & \
+        (np.abs(units) * rates_from.astype(np.float64) * numerator_scale
+         < 2 ** 62) & \
+        (rates_to.astype(np.float64) * denominator_scale < 2 ** 62)
+
+    result = np.empty(len(values), dtype=np.int64)
+    result[safe] = divide_array(
+        units[safe] * rates_from[safe] * numerator_scale[safe],
+        rates_to[safe] * denominator_scale[safe], rounding
+    )
+    for i in np.flatnonzero(~safe):
+        result[i] = convert_value(
+            float(values[i]), int(rates_from[i]), int(rates_to[i]), places,
+            rounding
+        )
+
+    return result
+
+
+class RoundingModeError(ValueError):
+    def __init__(self, rounding: str) -> None:
+        super().__init__(
+            f'Unknown rounding mode {rounding!r}, expected one of '
+            f'{", ".join(ROUNDING_MODES)}'
+        )
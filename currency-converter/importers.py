@@ -0,0 +1,104 @@
+"""Importers module."""
+
+from datetime import date, datetime
+from typing import Iterable, Iterator, NamedTuple
+
+from .dtos import QuotationImportOut
+from .fixedpoint import to_scaled
+from .repositories import (
+    CurrencyRepository, CurrencyQuotationRepository, chunked
+)
+
+
+class PtaxRow(NamedTuple):
+    date: date
+    abb: str
+    buy_rate: float
+    sell_rate: float
+
+
+def read_ptax_csv(lines: Iterable[str]) -> Iterator[PtaxRow]:
+    # DDMMYYYY;code;type;abb;buy rate;sell rate;buy parity;sell parity
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+
+        fields = line.split(';')
+        try:
+            yield PtaxRow(
+                date=datetime.strptime(fields[0], '%d%m%Y').date(),
+                abb=fields[3].strip(),
+                buy_rate=float(fields[4].replace(',', '.')),
+                sell_rate=float(fields[5].replace(',', '.')),
+            )
+        except (IndexError, ValueError):
+            raise ImportFormatError(line_number, line)
+
+
+class QuotationImporter:
+    def __init__(
+            self,
+            currency_repository: CurrencyRepository,
+            currency_quotation_repository: CurrencyQuotationRepository,
+            chunk_size: int = 5000,
+            base_abb: str = 'BRL'
+    ) -> None:
+        self._currency_repository = currency_repository
+        self._currency_quotation_repository = currency_quotation_repository
+        self._chunk_size = chunk_size
+        self._base_abb = base_abb
+
+    def run(self, rows: Iterable[PtaxRow]) -> QuotationImportOut:
+        currency_ids = {
+            currency.abb: currency.id
+            for currency in self._currency_repository.get_all()
+        }
+        base_id = currency_ids.get(self._base_abb)
+        read = imported = skipped = 0
+
+        for chunk in chunked(rows, self._chunk_size):
+            values = []
+            dates = set()
+
+            for row in chunk:
+                read += 1
+                currency_id = currency_ids.get(row.abb)
+                if currency_id is None or to_scaled(row.sell_rate) <= 0:
+                    skipped += 1
+                    continue
+
+                # PTAX rates are against the implicit base; a quotation
+                # replaced here no longer is against the one it named
+                values.append({
+                    'currency_id': currency_id,
+                    'date': row.date,
+                    'exchange_rate': row.sell_rate,
+                    'base_currency_id': None,
+                })
+                dates.add(row.date)
+
+            # The BRL rows are not in the file and not counted as imported
+            imported += len(values)
+
+            # PTAX rates are quoted in BRL, which is worth 1 on every date
+            if base_id is not None:
+                values.extend(
+                    {
+                        'currency_id': base_id, 'date': d,
+                        'exchange_rate': 1.0, 'base_currency_id': None,
+                    }
+                    for d in sorted(dates)
+                )
+
+            if values:
+                self._currency_quotation_repository.upsert_many(values)
+
+        return QuotationImportOut(
+            read=read, imported=imported, skipped=skipped
+        )
+
+
+class ImportFormatError(Exception):
+    def __init__(self, line_number: int, line: str):
+        super().__init__(f'Invalid PTAX row at line {line_number}: {line}')
@@ -0,0 +1,167 @@
+"""Indexes module."""
+
+import threading
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .dtos import CurrencyQuotationOut
+from .models import Currency, CurrencyQuotation
+from .quotations import (
+    Column, Fingerprint, Quotation, QuotationHistory, QuotationStore
+)
+from .repositories import NotFoundError
+
+
+class RateIndex:
+    def __init__(self, store: Optional[QuotationStore] = None) -> None:
+        self._lock = threading.Lock()
+        self._currency_ids: Dict[str, int] = {}
+        self._currency_abbs: Dict[int, str] = {}
+        # An empty store is falsy
+        self._store = QuotationStore() if store is None else store
+        self._listeners: List[Callable[[Tuple[int, ...]], None]] = []
+
+    @property
+    def store(self) -> QuotationStore:
+        return self._store
+
+    def subscribe(self, listener: Callable[[Tuple[int, ...]], None]) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, *currency_ids: int) -> None:
+        for listener in self._listeners:
+            listener(currency_ids)
+
+    def load(
+            self,
+            currencies: Iterable[Currency],
+            quotations: Optional[Iterable[CurrencyQuotation]] = None,
+            fingerprint: Optional[Fingerprint] = None
+    ) -> None:
+        # quotations must come ordered by (currency_id, date); without them
+        # the store keeps its history, e.g. one opened from a snapshot
+        currency_ids, currency_abbs = self._currency_maps(currencies)
+        if quotations is not None:
+            self._store.load(quotations, fingerprint)
+
+        with self._lock:
+            self._currency_ids = currency_ids
+            self._currency_abbs = currency_abbs
+
+        self._notify()
+
+    def refresh(
+            self,
+            currencies: Iterable[Currency],
+            quotations: Iterable[CurrencyQuotation],
+            currency_ids: Iterable[int]
+    ) -> None:
+        # Replaces the history of the given currencies only; quotations must
+        # be all of theirs, ordered by (currency_id, date)
+        currency_ids = tuple(currency_ids)
+        abb_ids, currency_abbs = self._currency_maps(currencies)
+        self._store.refresh(quotations, currency_ids)
+
+        with self._lock:
+            self._currency_ids = abb_ids
+            self._currency_abbs = currency_abbs
+
+        self._notify(*currency_ids)
+
+    @staticmethod
+    def _currency_maps(
+            currencies: Iterable[Currency]
+    ) -> Tuple[Dict[str, int], Dict[int, str]]:
+        currency_ids = {}
+        currency_abbs = {}
+        for currency in currencies:
+            currency_ids[currency.abb] = currency.id
+            currency_abbs[currency.id] = currency.abb
+
+        return currency_ids, currency_abbs
+
+    def currency_id(self, currency_abb: str) -> Optional[int]:
+        return self._currency_ids.get(currency_abb)
+
+    def quotation(
+            self, currency_abb: str, date_in: Optional[date] = None
+    ) -> Quotation:
+        currency_id = self._currency_ids.get(currency_abb)
+        ordinal = date_in.toordinal() if date_in else date.max.toordinal()
+        quotation = self._store.as_of(currency_id, ordinal)
+
+        if quotation is None:
+            raise NotFoundError(RateIndex.__name__)
+
+        return quotation
+
+    def get(
+            self, currency_abb: str, date_in: Optional[date] = None
+    ) -> CurrencyQuotationOut:
+        return to_dto(self.quotation(currency_abb, date_in))
+
+    def history(self, currency_abb: str) -> QuotationHistory:
+        history = self._store.history(
+            self._currency_ids.get(currency_abb)
+        )
+
+        if not history or not history.dates:
+            raise NotFoundError(RateIndex.__name__)
+
+        return history
+
+    def series(self) -> Dict[int, Tuple[Column, Column]]:
+        return self._store.series()
+
+    def put_currency(self, currency_id: int, currency_abb: str) -> None:
+        with self._lock:
+            old_abb = self._currency_abbs.get(currency_id)
+            if old_abb is not None and old_abb != currency_abb:
+                self._currency_ids.pop(old_abb, None)
+
+            self._currency_abbs[currency_id] = currency_abb
+            self._currency_ids[currency_abb] = currency_id
+
+        self._notify(currency_id)
+
+    def remove_currency(self, currency_id: int) -> None:
+        with self._lock:
+            abb = self._currency_abbs.pop(currency_id, None)
+            if abb is not None:
+                self._currency_ids.pop(abb, None)
+
+        self._store.remove_currency(currency_id)
+        self._notify(currency_id)
+
+    def put_quotation(
+            self, quotation: CurrencyQuotationOut
+    ) -> Optional[CurrencyQuotationOut]:
+        previous = self._store.put(Quotation(
+            quotation.id, quotation.currency_id, quotation.date.toordinal(),
+            quotation.exchange_rate,
+            base_currency_id=quotation.base_currency_id
+        ))
+
+        self._notify(quotation.currency_id)
+        return None if previous is None else to_dto(previous)
+
+    def remove_quotation(
+            self, currency_id: int, quotation_id: int
+    ) -> Optional[CurrencyQuotationOut]:
+        previous = self._store.remove(currency_id, quotation_id)
+
+        if previous is None:
+            return None
+
+        self._notify(currency_id)
+        return to_dto(previous)
+
+
+def to_dto(quotation: Quotation) -> CurrencyQuotationOut:
+    return CurrencyQuotationOut.construct(
+        id=quotation.id,
+        currency_id=quotation.currency_id,
+        exchange_rate=quotation.exchange_rate,
+        date=date.fromordinal(quotation.date),
+        base_currency_id=quotation.base_currency_id
+    )
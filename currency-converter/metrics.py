@@ -0,0 +1,278 @@
+"""Metrics module."""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0
+)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(
+            self, name: str, documentation: str,
+            labelnames: Iterable[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, Tuple[str, ...], float]]:
+        for labels, value in list(self._values.items()):
+            yield self.name, labels, value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(
+            self, name: str, documentation: str,
+            labelnames: Iterable[str] = (),
+            buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # Per label set: [count per bucket (last is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        slot = bisect_left(self.buckets, value)
+
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = (
+                    [0] * (len(self.buckets) + 1), [0.0]
+                )
+            entry[0][slot] += 1
+            entry[1][0] += value
+
+    def time(self, *labels: str) -> '_Timer':
+        return _Timer(self, labels)
+
+    def samples(self) -> Iterable[Tuple[str, Tuple[str, ...], float]]:
+        for labels, (counts, total) in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket', labels + (_format(bound),),
+                    cumulative
+                )
+            yield f'{self.name}_sum', labels, total[0]
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Gauge:
+    kind = 'gauge'
+
+    def __init__(
+            self, name: str, documentation: str,
+            labelnames: Iterable[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._callbacks: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set_function(
+            self, callback: Callable[[], float], *labels: str
+    ) -> None:
+        self._callbacks[labels] = callback
+
+    def samples(self) -> Iterable[Tuple[str, Tuple[str, ...], float]]:
+        # Values are read when scraped, so the hot path pays nothing
+        for labels, callback in list(self._callbacks.items()):
+            yield self.name, labels, callback()
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+
+    def counter(
+            self, name: str, documentation: str,
+            labelnames: Iterable[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+            self, name: str, documentation: str,
+            labelnames: Iterable[str] = (),
+            buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(
+            Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def gauge(
+            self, name: str, documentation: str,
+            labelnames: Iterable[str] = ()
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def render(self) -> str:
+        lines = []
+
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+
+            for name, labels, value in metric.samples():
+                labelnames = metric.labelnames
+                if name.endswith('_bucket'):
+                    labelnames += ('le',)
+
+                if labels:
+                    pairs = ','.join(
+                        f'{labelname}="{_escape(label)}"'
+                        for labelname, label in zip(labelnames, labels)
+                    )
+                    lines.append(f'{name}{{{pairs}}} {_format(value)}')
+                else:
+                    lines.append(f'{name} {_format(value)}')
+
+        lines.append('')
+        return '\n'.join(lines)
+
+    def _register(self, metric):
+        # Containers may be built more than once, metrics must not
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+
+        self._metrics[metric.name] = metric
+        return metric
+
+
+class MetricsMiddleware:
+    def __init__(self, app, histogram: Optional[Histogram] = None) -> None:
+        self.app = app
+        self._histogram = histogram or http_request_duration
+        self._routes: Dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status = ['500']
+
+        async def send_wrapper(message) -> None:
+            if message['type'] == 'http.response.start':
+                status[0] = str(message['status'])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched endpoint in the scope; labels use
+            # the path template so that ids do not explode the series count
+            self._histogram.observe(
+                time.perf_counter() - start, scope['method'],
+                self._route(scope), status[0]
+            )
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get('endpoint')
+        if endpoint is None:
+            return 'unmatched'
+
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = next(
+                (
+                    r.path for r in scope['app'].routes
+                    if getattr(r, 'endpoint', None) is endpoint
+                ),
+                'unmatched'
+            )
+            self._routes[endpoint] = route
+
+        return route
+
+
+class _Timer:
+    __slots__ = ('_histogram', '_labels', '_start')
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(
+            time.perf_counter() - self._start, *self._labels
+        )
+
+
+def track_cache(name: str, cache_provider: Callable[[], Any]) -> None:
+    def ratio() -> float:
+        cache = cache_provider()
+        lookups = cache.hits + cache.misses
+        return cache.hits / lookups if lookups else 0.0
+
+    cache_hits.set_function(lambda: cache_provider().hits, name)
+    cache_misses.set_function(lambda: cache_provider().misses, name)
+    cache_hit_ratio.set_function(ratio, name)
+
+
+def _format(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route',
+    ('method', 'route', 'status')
+)
+db_sessions = registry.counter(
+    'db_sessions_total', 'Database sessions opened', ('kind',)
+)
+db_query_duration = registry.histogram(
+    'db_query_duration_seconds', 'SQL statement execution time',
+    ('engine', 'statement')
+)
+dto_construction_duration = registry.histogram(
+    'dto_construction_seconds', 'Time spent building response DTOs',
+    ('dto',),
+    buckets=(
+        0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005,
+        0.025, 0.1
+    )
+)
+cache_hits = registry.gauge(
+    'cache_hits', 'Cache lookups answered from the cache', ('cache',)
+)
+cache_misses = registry.gauge(
+    'cache_misses', 'Cache lookups that missed', ('cache',)
+)
+cache_hit_ratio = registry.gauge(
+    'cache_hit_ratio', 'Share of cache lookups that hit', ('cache',)
+)
@@ -0,0 +1,10 @@
+"""Migrations package."""
+
+from .migrator import (
+    BackfillReport, MigrationError, Migrator, Operations, RevisionReport
+)
+
+__all__ = [
+    'BackfillReport', 'MigrationError', 'Migrator', 'Operations',
+    'RevisionReport',
+]
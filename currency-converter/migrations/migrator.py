@@ -0,0 +1,247 @@
+"""Migrator module."""
+
+import importlib
+import logging
+import pkgutil
+import time
+from datetime import datetime
+from types import ModuleType
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, MetaData, String, Table, inspect,
+    select, text
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn
+
+from . import versions
+
+logger = logging.getLogger(__name__)
+
+schema_version = Table(
+    'schema_version', MetaData(),
+    Column('revision', Integer, primary_key=True),
+    Column('description', String),
+    Column('applied_at', DateTime),
+    Column('seconds', Float),
+)
+
+
+class BackfillReport(NamedTuple):
+    table: str
+    rows: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class RevisionReport(NamedTuple):
+    revision: int
+    description: str
+    seconds: float
+    backfills: List[BackfillReport]
+
+
+class Operations:
+    # Each operation commits on its own: a revision may run for a long time
+    # over a large table, and must not hold one transaction throughout
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.backfills: List[BackfillReport] = []
+
+    def has_table(self, table_name: str) -> bool:
+        return inspect(self.engine).has_table(table_name)
+
+    def has_column(self, table_name: str, column_name: str) -> bool:
+        return any(
+            column['name'] == column_name
+            for column in inspect(self.engine).get_columns(table_name)
+        )
+
+    def has_index(self, table_name: str, index_name: str) -> bool:
+        return any(
+            index['name'] == index_name
+            for index in inspect(self.engine).get_indexes(table_name)
+        )
+
+    def foreign_keys(self, table_name: str) -> List[Dict[str, Any]]:
+        return inspect(self.engine).get_foreign_keys(table_name)
+
+    def execute(
+            self, statement: Any, parameters: Optional[Dict] = None
+    ) -> None:
+        with self.engine.begin() as connection:
+            connection.execute(
+                text(statement) if isinstance(statement, str) else statement,
+                parameters or {}
+            )
+
+    def create_table(self, table: Table) -> None:
+        table.create(self.engine, checkfirst=True)
+
+    def add_column(self, table_name: str, column: Column) -> None:
+        if self.has_column(table_name, column.name):
+            return
+
+        ddl = CreateColumn(column).compile(dialect=self.engine.dialect)
+        self.execute(f'ALTER TABLE {table_name} ADD COLUMN {ddl}')
+
+    def create_index(self, index: Index) -> None:
+        # Without blocking readers: PostgreSQL builds it concurrently, which
+        # cannot run in a transaction; SQLite in WAL mode keeps serving reads
+        # while the build holds the write lock
+        if self.has_index(index.table.name, index.name):
+            return
+
+        if self.dialect == 'postgresql':
+            index.dialect_options['postgresql']['concurrently'] = True
+            with self.engine.connect() as connection:
+                connection.execution_options(
+                    isolation_level='AUTOCOMMIT'
+                ).execute(index.create_ddl())
+            return
+
+        index.create(self.engine)
+
+    def drop_index(self, table_name: str, index_name: str) -> None:
+        if not self.has_index(table_name, index_name):
+            return
+
+        if self.dialect == 'postgresql':
+            with self.engine.connect() as connection:
+                connection.execution_options(
+                    isolation_level='AUTOCOMMIT'
+                ).execute(text(f'DROP INDEX CONCURRENTLY {index_name}'))
+            return
+
+        self.execute(f'DROP INDEX {index_name}')
+
+    def backfill(
+            self,
+            table_name: str,
+            assignments: str,
+            pending: str,
+            batch_size: int = 10000,
+            key: str = 'id'
+    ) -> BackfillReport:
+        # Rewrites rows by primary key ranges, one short transaction each;
+        # `pending` selects rows still to do, so an interrupted backfill
+        # resumes where it stopped
+        with self.engine.connect() as connection:
+            low, high = connection.execute(
+                text(f'SELECT min({key}), max({key}) FROM {table_name}')
+            ).one()
+
+        statement = text(
+            f'UPDATE {table_name} SET {assignments} '
+            f'WHERE {key} > :low AND {key} <= :high AND ({pending})'
+        )
+        rows = batches = 0
+        started = time.perf_counter()
+        last_report = started
+
+        if low is not None:
+            for start in range(low - 1, high, batch_size):
+                with self.engine.begin() as connection:
+                    rows += connection.execute(statement, {
+                        'low': start, 'high': start + batch_size
+                    }).rowcount
+                batches += 1
+
+                now = time.perf_counter()
+                if now - last_report >= 5:
+                    last_report = now
+                    logger.info(
+                        'backfill %s: %d rows, %.0f rows/s', table_name,
+                        rows, rows / (now - started)
+                    )
+
+        report = BackfillReport(
+            table_name, rows, batches, time.perf_counter() - started
+        )
+        self.backfills.append(report)
+        return report
+
+
+class Migrator:
+    def __init__(self, engine: Engine) -> None:
+        self._engine = engine
+
+    @staticmethod
+    def revisions() -> List[ModuleType]:
+        modules = [
+            importlib.import_module(f'{versions.__name__}.{module.name}')
+            for module in pkgutil.iter_modules(versions.__path__)
+        ]
+        modules.sort(key=lambda module: module.revision)
+
+        numbers = [module.revision for module in modules]
+        if numbers != list(range(1, len(numbers) + 1)):
+            raise MigrationError(f'Revisions are not consecutive: {numbers}')
+
+        return modules
+
+    def current(self) -> int:
+        with self._engine.connect() as connection:
+            return self._current(connection)
+
+    def pending(self) -> List[ModuleType]:
+        current = self.current()
+        return [
+            module for module in self.revisions()
+            if module.revision > current
+        ]
+
+    def upgrade(self, target: Optional[int] = None) -> List[RevisionReport]:
+        schema_version.create(self._engine, checkfirst=True)
+
+        reports = []
+        for module in self.pending():
+            if target is not None and module.revision > target:
+                break
+
+            logger.info(
+                'applying revision %d: %s', module.revision,
+                module.description
+            )
+            operations = Operations(self._engine)
+            started = time.perf_counter()
+            # Revisions check what exists, so that a revision interrupted
+            # halfway can run again
+            module.upgrade(operations)
+            seconds = time.perf_counter() - started
+
+            with self._engine.begin() as connection:
+                connection.execute(schema_version.insert().values(
+                    revision=module.revision,
+                    description=module.description,
+                    applied_at=datetime.utcnow(),
+                    seconds=seconds,
+                ))
+
+            reports.append(RevisionReport(
+                module.revision, module.description, seconds,
+                operations.backfills
+            ))
+
+        return reports
+
+    @staticmethod
+    def _current(connection: Connection) -> int:
+        if not inspect(connection).has_table(schema_version.name):
+            return 0
+
+        return connection.execute(
+            select(schema_version.c.revision)
+            .order_by(schema_version.c.revision.desc()).limit(1)
+        ).scalar() or 0
+
+
+class MigrationError(Exception):
+    pass
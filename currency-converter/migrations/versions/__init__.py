@@ -0,0 +1,6 @@
+"""Revisions package.
+
+Each module holds one revision: a consecutive `revision` number, a
+`description` and `upgrade(operations)`. Revisions describe the tables as
+they were at that point instead of importing the models, which keep moving.
+"""
@@ -0,0 +1,34 @@
+"""Baseline revision."""
+
+from sqlalchemy import (
+    Column, Date, Float, ForeignKeyConstraint, Integer, MetaData, String,
+    Table, UniqueConstraint
+)
+
+revision = 1
+description = 'currency and currency_quotation tables'
+
+metadata = MetaData()
+
+currency = Table(
+    'currency', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('abb', String, unique=True),
+    Column('name', String),
+)
+
+currency_quotation = Table(
+    'currency_quotation', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('currency_id', Integer),
+    Column('exchange_rate', Float(precision=3)),
+    Column('date', Date),
+    UniqueConstraint('currency_id', 'date'),
+    ForeignKeyConstraint(['currency_id'], ['currency.id']),
+)
+
+
+def upgrade(operations) -> None:
+    # Databases created before migrations already have these tables
+    operations.create_table(currency)
+    operations.create_table(currency_quotation)
@@ -0,0 +1,23 @@
+"""As-of index revision."""
+
+from sqlalchemy import Column, Date, Float, Index, Integer, MetaData, Table
+
+revision = 2
+description = 'covering index for as-of quotation lookups'
+
+currency_quotation = Table(
+    'currency_quotation', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('currency_id', Integer),
+    Column('exchange_rate', Float(precision=3)),
+    Column('date', Date),
+)
+
+
+def upgrade(operations) -> None:
+    operations.create_index(Index(
+        'ix_currency_quotation_as_of',
+        currency_quotation.c.currency_id,
+        currency_quotation.c.date.desc(),
+        currency_quotation.c.exchange_rate,
+    ))
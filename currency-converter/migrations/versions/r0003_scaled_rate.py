@@ -0,0 +1,23 @@
+"""Scaled rate revision."""
+
+from sqlalchemy import BigInteger, Column
+
+revision = 3
+description = 'exchange rates as fixed point integers'
+
+# fixedpoint.RATE_SCALE when the revision was written
+RATE_SCALE = 10 ** 8
+
+
+def upgrade(operations) -> None:
+    operations.add_column(
+        'currency_quotation', Column('exchange_rate_scaled', BigInteger)
+    )
+    # Stored rates are floats read from decimals of at most 8 places, so
+    # rounding recovers the decimal exactly
+    operations.backfill(
+        'currency_quotation',
+        f'exchange_rate_scaled = '
+        f'CAST(round(exchange_rate * {RATE_SCALE}) AS BIGINT)',
+        'exchange_rate_scaled IS NULL',
+    )
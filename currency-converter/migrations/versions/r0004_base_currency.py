@@ -0,0 +1,13 @@
+"""Base currency revision."""
+
+from sqlalchemy import Column, Integer
+
+revision = 4
+description = 'quotations against a currency other than the implicit base'
+
+
+def upgrade(operations) -> None:
+    # NULL for the implicit base, which every existing quotation is against
+    operations.add_column(
+        'currency_quotation', Column('base_currency_id', Integer)
+    )
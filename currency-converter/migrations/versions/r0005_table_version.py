@@ -0,0 +1,57 @@
+"""Table version revision."""
+
+from sqlalchemy import BigInteger, Column, MetaData, String, Table
+
+revision = 5
+description = 'change counter for currency_quotation, bumped by triggers'
+
+table_version = Table(
+    'table_version', MetaData(),
+    Column('table_name', String, primary_key=True),
+    Column('version', BigInteger, nullable=False),
+)
+
+BUMP = (
+    "UPDATE table_version SET version = version + 1 "
+    "WHERE table_name = 'currency_quotation'"
+)
+
+
+def upgrade(operations) -> None:
+    operations.create_table(table_version)
+    operations.execute(
+        "INSERT INTO table_version (table_name, version) "
+        "SELECT 'currency_quotation', 0 WHERE NOT EXISTS ("
+        "SELECT 1 FROM table_version "
+        "WHERE table_name = 'currency_quotation')"
+    )
+
+    # Triggers count every write, including those made outside the
+    # application (imports, manual upserts), which the quotation snapshot
+    # must notice
+    if operations.dialect == 'postgresql':
+        operations.execute(
+            'CREATE OR REPLACE FUNCTION bump_currency_quotation_version() '
+            'RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN '
+            f'{BUMP}; RETURN NULL; END $$'
+        )
+        operations.execute(
+            'DROP TRIGGER IF EXISTS currency_quotation_version '
+            'ON currency_quotation'
+        )
+        operations.execute(
+            'CREATE TRIGGER currency_quotation_version '
+            'AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE '
+            'ON currency_quotation FOR EACH STATEMENT '
+            'EXECUTE FUNCTION bump_currency_quotation_version()'
+        )
+        return
+
+    # SQLite has row triggers only, one per kind of write
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        operations.execute(
+            f'CREATE TRIGGER IF NOT EXISTS '
+            f'currency_quotation_version_{event.lower()} '
+            f'AFTER {event} ON currency_quotation '
+            f'BEGIN {BUMP}; END'
+        )
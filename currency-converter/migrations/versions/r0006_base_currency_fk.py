@@ -0,0 +1,54 @@
+"""Base currency foreign key revision."""
+
+revision = 6
+description = 'base_currency_id references currency'
+
+CONSTRAINT = 'fk_currency_quotation_base_currency_id'
+
+# What SQLite raises for a violated foreign key
+MISSING = (
+    "SELECT RAISE(ABORT, 'FOREIGN KEY constraint failed') "
+    "WHERE {base} IS NOT NULL "
+    "AND NOT EXISTS (SELECT 1 FROM currency WHERE id = {base})"
+)
+
+
+def upgrade(operations) -> None:
+    if operations.dialect == 'postgresql':
+        if any(
+            foreign_key['name'] == CONSTRAINT
+            for foreign_key in operations.foreign_keys('currency_quotation')
+        ):
+            return
+
+        # NOT VALID takes effect at once without scanning the table;
+        # VALIDATE then checks existing rows without blocking writes
+        operations.execute(
+            f'ALTER TABLE currency_quotation ADD CONSTRAINT {CONSTRAINT} '
+            f'FOREIGN KEY (base_currency_id) REFERENCES currency (id) '
+            f'NOT VALID'
+        )
+        operations.execute(
+            f'ALTER TABLE currency_quotation VALIDATE CONSTRAINT {CONSTRAINT}'
+        )
+        return
+
+    # SQLite cannot add a constraint to an existing column without
+    # rebuilding the table; triggers enforce the same rule
+    operations.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {CONSTRAINT}_insert '
+        f'BEFORE INSERT ON currency_quotation '
+        f'BEGIN {MISSING.format(base="NEW.base_currency_id")}; END'
+    )
+    operations.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {CONSTRAINT}_update '
+        f'BEFORE UPDATE OF base_currency_id ON currency_quotation '
+        f'BEGIN {MISSING.format(base="NEW.base_currency_id")}; END'
+    )
+    operations.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {CONSTRAINT}_delete '
+        f'BEFORE DELETE ON currency '
+        f'WHEN EXISTS (SELECT 1 FROM currency_quotation '
+        f'WHERE base_currency_id = OLD.id) '
+        f"BEGIN SELECT RAISE(ABORT, 'FOREIGN KEY constraint failed'); END"
+    )
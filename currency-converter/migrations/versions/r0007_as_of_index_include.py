@@ -0,0 +1,29 @@
+"""As-of index with included id revision."""
+
+from sqlalchemy import Column, Date, Float, Index, Integer, MetaData, Table
+
+revision = 7
+description = 'as-of index including id on PostgreSQL'
+
+currency_quotation = Table(
+    'currency_quotation', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('currency_id', Integer),
+    Column('exchange_rate', Float(precision=3)),
+    Column('date', Date),
+)
+
+
+def upgrade(operations) -> None:
+    # SQLite keeps the rowid, which id aliases, in every index; PostgreSQL
+    # reads id from the table unless the index includes it. Both get the
+    # same index, under a new name, so that the schema does not depend on
+    # the database
+    operations.create_index(Index(
+        'ix_currency_quotation_as_of_include',
+        currency_quotation.c.currency_id,
+        currency_quotation.c.date.desc(),
+        currency_quotation.c.exchange_rate,
+        postgresql_include=['id'],
+    ))
+    operations.drop_index('currency_quotation', 'ix_currency_quotation_as_of')
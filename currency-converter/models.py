@@ -1,8 +1,8 @@
 """Models module."""
 
 from sqlalchemy import (
-    Column, String, Integer, Float, ForeignKeyConstraint,
-    Date, UniqueConstraint
+    Column, String, Integer, BigInteger, Float, ForeignKeyConstraint,
+    Date, UniqueConstraint, Index
 )
 
 from .database import Base
@@ -24,12 +24,17 @@ class CurrencyQuotation(Base):
     __tablename__ = 'currency_quotation'
     __table_args__ = (
         UniqueConstraint('currency_id', 'date'),
-        ForeignKeyConstraint(['currency_id'], ['currency.id'])
+        ForeignKeyConstraint(['currency_id'], ['currency.id']),
+        ForeignKeyConstraint(['base_currency_id'], ['currency.id'])
     )
 
     id = Column(Integer, primary_key=True)
     currency_id = Column(Integer)
     exchange_rate = Column(Float(precision=3))
+    # exchange_rate * fixedpoint.RATE_SCALE, exact
+    exchange_rate_scaled = Column(BigInteger)
+    # The currency exchange_rate is quoted in; NULL for the implicit base
+    base_currency_id = Column(Integer)
     date = Column(Date)
 
     def __repr__(self):
@@ -37,3 +42,20 @@ class CurrencyQuotation(Base):
                f'currency_id="{self.currency_id}", ' \
                f'exchange_rate="{self.exchange_rate}", ' \
                f'date="{self.date}")>'
+
+
+class TableVersion(Base):
+    # Bumped by database triggers on every write to the table, whoever
+    # makes it
+    __tablename__ = 'table_version'
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False)
+
+
+Index(
+    'ix_currency_quotation_as_of_include',
+    CurrencyQuotation.currency_id,
+    CurrencyQuotation.date.desc(),
+    CurrencyQuotation.exchange_rate,
+    postgresql_include=['id'],
+)
@@ -0,0 +1,166 @@
+"""Profiling module."""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+# Statements executed while a profiled request runs: (seconds, sql, many)
+captured_statements: ContextVar[
+    Optional[List[Tuple[float, str, bool]]]
+] = ContextVar('captured_statements', default=None)
+
+# First matching fragment of the code path wins
+CATEGORIES = (
+    ('dependency injection', ('dependency_injector',)),
+    ('sqlalchemy orm', ('sqlalchemy/orm', 'sqlalchemy/ext/asyncio')),
+    ('sqlalchemy core', ('sqlalchemy',)),
+    ('sqlite driver', ('sqlite3', 'aiosqlite')),
+    ('pydantic', ('pydantic',)),
+    ('fastapi', ('fastapi',)),
+    ('starlette', ('starlette', 'anyio')),
+    ('application', ('currency-converter',)),
+    ('asyncio', ('asyncio',)),
+)
+
+
+class ProfilingMiddleware:
+    def __init__(
+            self,
+            app,
+            token: str,
+            directory: str,
+            header: str = 'X-Profile',
+            limit: int = 40
+    ) -> None:
+        self.app = app
+        self._token = token.encode()
+        self._directory = directory
+        self._header = header.lower().encode()
+        self._limit = limit
+        self._busy = False
+
+    async def __call__(self, scope, receive, send) -> None:
+        # Only one profiler can be active per thread; concurrent requests
+        # run unprofiled instead of failing
+        if scope['type'] != 'http' or self._busy \
+                or not self._is_trusted(scope):
+            return await self.app(scope, receive, send)
+
+        report_id = uuid.uuid4().hex[:12]
+
+        async def send_wrapper(message) -> None:
+            if message['type'] == 'http.response.start':
+                message['headers'] = [
+                    *message.get('headers', []),
+                    (b'x-profile-id', report_id.encode()),
+                ]
+            await send(message)
+
+        statements = []
+        token = captured_statements.set(statements)
+        profile = cProfile.Profile()
+        self._busy = True
+        started = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profile.disable()
+        finally:
+            elapsed = time.perf_counter() - started
+            self._busy = False
+            captured_statements.reset(token)
+            self._store(report_id, scope, elapsed, profile, statements)
+
+    def _is_trusted(self, scope) -> bool:
+        if not self._token:
+            return False
+
+        for name, value in scope['headers']:
+            if name == self._header:
+                return hmac.compare_digest(value, self._token)
+
+        return False
+
+    def _store(
+            self,
+            report_id: str,
+            scope,
+            elapsed: float,
+            profile: cProfile.Profile,
+            statements: List[Tuple[float, str, bool]]
+    ) -> None:
+        os.makedirs(self._directory, exist_ok=True)
+        path = os.path.join(self._directory, report_id)
+        profile.dump_stats(f'{path}.prof')
+
+        with open(f'{path}.txt', 'w') as f:
+            f.write(render_report(
+                f'{scope["method"]} {scope["path"]}'
+                f'{"?" if scope["query_string"] else ""}'
+                f'{scope["query_string"].decode("latin-1")}',
+                elapsed, profile, statements, self._limit
+            ))
+
+
+def render_report(
+        request: str,
+        elapsed: float,
+        profile: cProfile.Profile,
+        statements: List[Tuple[float, str, bool]],
+        limit: int = 40
+) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out)
+
+    out.write(f'{request}\nwall time {elapsed * 1000:.3f} ms\n\n')
+
+    # Other requests running on the event loop meanwhile are profiled too
+    out.write('time by component (own time)\n')
+    for category, seconds in breakdown(stats).items():
+        out.write(f'  {category:<28} {seconds * 1000:10.3f} ms\n')
+
+    sql_seconds = sum(seconds for seconds, _, _ in statements)
+    out.write(
+        f'\nsql: {len(statements)} statements, '
+        f'{sql_seconds * 1000:.3f} ms\n'
+    )
+    for seconds, statement, executemany in statements:
+        statement = ' '.join(statement.split())
+        many = ' (executemany)' if executemany else ''
+        out.write(f'  {seconds * 1000:8.3f} ms{many}  {statement}\n')
+
+    out.write('\n')
+    stats.sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
+
+
+def breakdown(stats: pstats.Stats) -> Dict[str, float]:
+    totals = {category: 0.0 for category, _ in CATEGORIES}
+    totals['builtins and c extensions'] = totals['other'] = 0.0
+
+    for (filename, _, _), (_, _, tottime, _, _) in stats.stats.items():
+        # Compiled code (pydantic v1 and dependency_injector are built with
+        # Cython) only shows up as '~' entries of whoever calls it
+        if filename == '~':
+            totals['builtins and c extensions'] += tottime
+            continue
+
+        filename = filename.replace(os.sep, '/')
+        category = next(
+            (
+                category for category, fragments in CATEGORIES
+                if any(fragment in filename for fragment in fragments)
+            ),
+            'other'
+        )
+        totals[category] += tottime
+
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
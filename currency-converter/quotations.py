@@ -0,0 +1,391 @@
+"""Quotations module."""
+
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import (
+    Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+)
+
+import numpy as np
+
+from .fixedpoint import to_scaled
+
+Column = Union[array, memoryview]
+
+# (count(id), max(id), table version) of currency_quotation; the version is
+# bumped by triggers on every write
+Fingerprint = Tuple[int, Optional[int], int]
+
+# Native byte order: snapshots are a local cache, not an exchange format
+_HEADER = struct.Struct('=4sIQqqQ')
+_MAGIC = b'CQS4'
+_MARKER = 0x01020304
+
+
+class QuotationHistory(NamedTuple):
+    # One currency, ordered by date; columns are never mutated in place
+    ids: Column
+    dates: Column
+    rates: Column
+    # rates as fixed point integers, see fixedpoint.RATE_SCALE
+    scaled_rates: Column
+    # The currency each rate is quoted in, 0 for the implicit base
+    bases: Column
+
+
+class Quotation(NamedTuple):
+    id: int
+    currency_id: int
+    date: int
+    exchange_rate: float
+    # Derived from exchange_rate when not given
+    scaled_rate: Optional[int] = None
+    # None for the implicit base
+    base_currency_id: Optional[int] = None
+
+
+class QuotationStore:
+    def __init__(self, snapshot_path: Optional[str] = None) -> None:
+        self._lock = threading.Lock()
+        self._history: Dict[int, QuotationHistory] = {}
+        self._snapshot_path = snapshot_path
+        self._snapshot: Optional[mmap.mmap] = None
+        self._dirty = True
+        self._fingerprint: Optional[Fingerprint] = None
+
+    def __len__(self) -> int:
+        return sum(len(history.ids) for history in self._history.values())
+
+    @property
+    def snapshot_path(self) -> Optional[str]:
+        return self._snapshot_path
+
+    @property
+    def fingerprint(self) -> Optional[Fingerprint]:
+        # The table the history was read from, None once it has changed here
+        return self._fingerprint
+
+    def load(
+            self, quotations: Iterable,
+            fingerprint: Optional[Fingerprint] = None
+    ) -> None:
+        # quotations must come ordered by (currency_id, date); fingerprint
+        # is the table's, taken before reading them
+        history = self._build(quotations)
+
+        with self._lock:
+            self._history = history
+            self._changed()
+            self._fingerprint = fingerprint
+
+    def refresh(
+            self, quotations: Iterable, currency_ids: Iterable[int]
+    ) -> None:
+        # Replaces the history of the given currencies only
+        changed = self._build(quotations)
+
+        with self._lock:
+            history = dict(self._history)
+            for currency_id in currency_ids:
+                history.pop(currency_id, None)
+            history.update(changed)
+
+            self._history = history
+            self._changed()
+
+    def history(self, currency_id: int) -> Optional[QuotationHistory]:
+        return self._history.get(currency_id)
+
+    def series(self) -> Dict[int, Tuple[Column, Column]]:
+        return {
+            currency_id: (history.dates, history.rates)
+            for currency_id, history in self._history.items()
+        }
+
+    def as_of(self, currency_id: int, ordinal: int) -> Optional[Quotation]:
+        history = self._history.get(currency_id)
+        if history is None:
+            return None
+
+        pos = bisect_right(history.dates, ordinal)
+        if not pos:
+            return None
+
+        return _quotation(history, currency_id, pos - 1)
+
+    def get(self, currency_id: int, quotation_id: int) -> Optional[Quotation]:
+        history = self._history.get(currency_id)
+        pos = _position(history, quotation_id)
+        if pos is None:
+            return None
+
+        return _quotation(history, currency_id, pos)
+
+    def page(
+            self,
+            currency_id: int,
+            start: Optional[int] = None,
+            end: Optional[int] = None,
+            after: Optional[Tuple[int, int]] = None,
+            limit: Optional[int] = None
+    ) -> List[Quotation]:
+        # Dates are ordinals; ordered by (date, id) as the database pages
+        # them, which is date order with one quotation per date
+        history = self._history.get(currency_id)
+        if history is None:
+            return []
+
+        dates = history.dates
+        low = 0 if start is None else bisect_left(dates, start)
+        high = len(dates) if end is None else bisect_right(dates, end)
+        if after is not None:
+            pos = bisect_right(dates, after[0])
+            if pos and dates[pos - 1] == after[0] \
+                    and history.ids[pos - 1] > after[1]:
+                pos -= 1
+            low = max(low, pos)
+        if limit is not None:
+            high = min(high, low + limit)
+
+        return [
+            _quotation(history, currency_id, pos) for pos in range(low, high)
+        ]
+
+    def put(self, quotation: Quotation) -> Optional[Quotation]:
+        # A quotation never moves to another currency, so a previous version
+        # can only be in the history it goes to
+        with self._lock:
+            previous = self._remove(quotation.currency_id, quotation.id)
+            history = self._history.get(quotation.currency_id) or \
+                QuotationHistory(
+                    array('q'), array('i'), array('d'), array('q'), array('i')
+                )
+            scaled_rate = quotation.scaled_rate
+            if scaled_rate is None:
+                scaled_rate = to_scaled(quotation.exchange_rate)
+
+            pos = bisect_right(history.dates, quotation.date)
+            self._history[quotation.currency_id] = QuotationHistory(
+                _insert('q', history.ids, pos, quotation.id),
+                _insert('i', history.dates, pos, quotation.date),
+                _insert('d', history.rates, pos, quotation.exchange_rate),
+                _insert('q', history.scaled_rates, pos, scaled_rate),
+                _insert(
+                    'i', history.bases, pos, quotation.base_currency_id or 0
+                ),
+            )
+            self._changed()
+
+        return previous
+
+    def remove(
+            self, currency_id: int, quotation_id: int
+    ) -> Optional[Quotation]:
+        with self._lock:
+            previous = self._remove(currency_id, quotation_id)
+            if previous is not None:
+                self._changed()
+
+        return previous
+
+    def remove_currency(self, currency_id: int) -> None:
+        with self._lock:
+            if self._history.pop(currency_id, None) is not None:
+                self._changed()
+
+    def open(self, fingerprint: Fingerprint) -> bool:
+        # Loads the snapshot if it was saved from the table as it is now
+        if self._snapshot_path is None:
+            return False
+
+        try:
+            with open(self._snapshot_path, 'rb') as f:
+                snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+
+        try:
+            history = self._read(snapshot, fingerprint)
+        except (struct.error, TypeError, ValueError):
+            history = None
+
+        if history is None:
+            snapshot.close()
+            return False
+
+        with self._lock:
+            # Columns are views into the mapping, which is shared with every
+            # process opening the same file
+            self._history = history
+            self._snapshot = snapshot
+            self._dirty = False
+            self._fingerprint = fingerprint
+
+        return True
+
+    def save(self) -> bool:
+        # Only a history known to match the table is saved: a snapshot is
+        # trusted as long as the table's fingerprint has not changed, and
+        # without a table version nothing tells that it has
+        if self._snapshot_path is None or not self._dirty \
+                or self._fingerprint is None or self._fingerprint[2] is None:
+            return False
+
+        with self._lock:
+            histories = sorted(self._history.items())
+            rows, max_id, version = self._fingerprint
+            self._dirty = False
+
+        currency_ids = array('q', (item[0] for item in histories))
+        offsets = array('q', [0])
+        for _, history in histories:
+            offsets.append(offsets[-1] + len(history.ids))
+
+        # 8-byte columns first so that every column stays aligned
+        tmp_path = f'{self._snapshot_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(
+                _MAGIC, _MARKER, rows, -1 if max_id is None else max_id,
+                version, len(currency_ids)
+            ))
+            f.write(currency_ids)
+            f.write(offsets)
+            for column in ('ids', 'scaled_rates', 'rates', 'dates', 'bases'):
+                for _, history in histories:
+                    f.write(getattr(history, column))
+
+        os.replace(tmp_path, self._snapshot_path)
+        return True
+
+    def _changed(self) -> None:
+        # The snapshot on disk no longer matches; it goes away so that a
+        # crash before the next save cannot leave a stale one behind
+        if not self._dirty and self._snapshot_path is not None:
+            try:
+                os.unlink(self._snapshot_path)
+            except FileNotFoundError:
+                pass
+        self._dirty = True
+        self._fingerprint = None
+
+    def _remove(
+            self, currency_id: int, quotation_id: int
+    ) -> Optional[Quotation]:
+        history = self._history.get(currency_id)
+        pos = _position(history, quotation_id)
+        if pos is None:
+            return None
+
+        self._history[currency_id] = QuotationHistory(
+            _delete('q', history.ids, pos),
+            _delete('i', history.dates, pos),
+            _delete('d', history.rates, pos),
+            _delete('q', history.scaled_rates, pos),
+            _delete('i', history.bases, pos),
+        )
+
+        return _quotation(history, currency_id, pos)
+
+    @staticmethod
+    def _build(quotations: Iterable) -> Dict[int, QuotationHistory]:
+        history = {}
+        for quotation in quotations:
+            columns = history.get(quotation.currency_id)
+            if columns is None:
+                columns = history[quotation.currency_id] = QuotationHistory(
+                    array('q'), array('i'), array('d'), array('q'), array('i')
+                )
+            columns.ids.append(quotation.id)
+            columns.dates.append(quotation.date.toordinal())
+            columns.rates.append(quotation.exchange_rate)
+            # Rows written before the column existed and not backfilled yet
+            scaled_rate = getattr(quotation, 'exchange_rate_scaled', None)
+            columns.scaled_rates.append(
+                to_scaled(quotation.exchange_rate) if scaled_rate is None
+                else scaled_rate
+            )
+            columns.bases.append(
+                getattr(quotation, 'base_currency_id', None) or 0
+            )
+
+        return history
+
+    @staticmethod
+    def _read(
+            snapshot: mmap.mmap, fingerprint: Fingerprint
+    ) -> Optional[Dict[int, QuotationHistory]]:
+        magic, marker, rows, max_id, version, currencies = \
+            _HEADER.unpack_from(snapshot)
+        if magic != _MAGIC or marker != _MARKER \
+                or (rows, None if max_id < 0 else max_id, version) \
+                != fingerprint:
+            return None
+
+        view = memoryview(snapshot)
+        offset = _HEADER.size
+
+        def column(typecode: str, length: int) -> memoryview:
+            nonlocal offset
+            size = length * array(typecode).itemsize
+            if offset + size > len(view):
+                raise ValueError('Truncated quotation snapshot')
+            data = view[offset:offset + size].cast(typecode)
+            offset += size
+            return data
+
+        currency_ids = column('q', currencies)
+        offsets = column('q', currencies + 1)
+        ids = column('q', rows)
+        scaled_rates = column('q', rows)
+        rates = column('d', rows)
+        dates = column('i', rows)
+        bases = column('i', rows)
+
+        return {
+            currency_id: QuotationHistory(
+                ids[start:stop], dates[start:stop], rates[start:stop],
+                scaled_rates[start:stop], bases[start:stop]
+            )
+            for currency_id, start, stop in zip(
+                currency_ids, offsets, offsets[1:]
+            )
+        }
+
+
+def _quotation(
+        history: QuotationHistory, currency_id: int, pos: int
+) -> Quotation:
+    return Quotation(
+        history.ids[pos], currency_id, history.dates[pos], history.rates[pos],
+        history.scaled_rates[pos], history.bases[pos] or None
+    )
+
+
+def _position(
+        history: Optional[QuotationHistory], quotation_id: int
+) -> Optional[int]:
+    if history is None or not history.ids:
+        return None
+
+    found = np.flatnonzero(
+        np.frombuffer(history.ids, dtype=np.int64) == quotation_id
+    )
+    return int(found[0]) if len(found) else None
+
+
+def _insert(typecode: str, column: Column, pos: int, value) -> array:
+    # Readers never lock, so columns are replaced instead of mutated
+    result = array(typecode, column[:pos])
+    result.append(value)
+    result.extend(column[pos:])
+    return result
+
+
+def _delete(typecode: str, column: Column, pos: int) -> array:
+    result = array(typecode, column[:pos])
+    result.extend(column[pos + 1:])
+    return result
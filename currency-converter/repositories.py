@@ -1,23 +1,81 @@
 """Repositories module."""
 
-from contextlib import AbstractContextManager
+from contextlib import AbstractAsyncContextManager, AbstractContextManager
 from datetime import date, datetime
-from typing import Callable, Iterator, Optional
-
-from sqlalchemy import desc
+from itertools import islice
+from typing import (
+    Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional,
+    Tuple, TypeVar
+)
+
+from sqlalchemy import (
+    bindparam, delete, desc, func, insert, select, tuple_, update
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from .caches import CacheBackend, LocalCacheBackend, TableVersions
 from .dtos import CurrencyIn, CurrencyQuotationIn
-from .models import Currency, CurrencyQuotation
+from .fixedpoint import to_scaled
+from .models import Currency, CurrencyQuotation, TableVersion
+from .quotations import Fingerprint, Quotation, QuotationStore
+
+T = TypeVar('T')
+
+
+class CurrencyIdCache:
+    _key = 'currency_ids'
+
+    def __init__(
+            self,
+            backend: Optional[CacheBackend] = None,
+            versions: Optional[TableVersions] = None
+    ) -> None:
+        self._ids: Optional[Dict[str, int]] = None
+        self._backend = backend or LocalCacheBackend()
+
+        # Writes from other workers arrive as version bumps
+        if versions is not None:
+            versions.subscribe(self._on_change)
+
+    def get(self, currency_abb: str) -> Optional[int]:
+        return (self._ids or {}).get(currency_abb)
+
+    def is_stale(self, currency_abb: str) -> bool:
+        if self._ids is None:
+            self._ids = self._backend.get(self._key)
+
+        return self._ids is None or currency_abb not in self._ids
+
+    def fill(self, rows: Iterable[Tuple[str, int]]) -> None:
+        self._ids = {abb: currency_id for abb, currency_id in rows}
+        self._backend.set(self._key, self._ids)
+
+    def invalidate(self) -> None:
+        self._ids = None
+        self._backend.delete(self._key)
+
+    def _on_change(self, table: str, keys: Tuple[int, ...]) -> None:
+        if table == Currency.__tablename__:
+            self._ids = None
+
+    @staticmethod
+    def query():
+        return select(Currency.abb, Currency.id)
 
 
 class CurrencyRepository:
     def __init__(
             self, session_factory: Callable[
-                ..., AbstractContextManager[Session]]
+                ..., AbstractContextManager[Session]],
+            currency_ids: Optional[CurrencyIdCache] = None,
+            versions: Optional[TableVersions] = None
     ) -> None:
         self.session_factory = session_factory
+        self.currency_ids = currency_ids or CurrencyIdCache()
+        self.versions = versions or TableVersions()
 
     def get_all(self) -> Iterator[Currency]:
         with self.session_factory() as session:
@@ -36,55 +94,132 @@ class CurrencyRepository:
 
     def add(self, currency: CurrencyIn) -> Currency:
         with self.session_factory() as session:
-            currency = Currency(abb=currency.abb, name=currency.name)
-
             try:
-                session.add(currency)
+                result = session.execute(
+                    INSERT_CURRENCY,
+                    {'abb': currency.abb, 'name': currency.name}
+                )
                 session.commit()
-                session.refresh(currency)
-
-                return currency
             except IntegrityError as e:
                 raise DataBaseIntegrityError(e)
 
+            currency = Currency(
+                id=result.inserted_primary_key[0],
+                abb=currency.abb,
+                name=currency.name
+            )
+            self.versions.bump(Currency.__tablename__, (currency.id,))
+            self.currency_ids.invalidate()
+
+            return currency
+
     def update_by_id(self, currency_id: int, currency: CurrencyIn) -> Currency:
         with self.session_factory() as session:
-            entity: Currency = self.get_by_id(currency_id)
-            entity.abb = currency.abb
-            entity.name = currency.name
-
             try:
-                session.add(entity)
+                result = session.execute(UPDATE_CURRENCY, {
+                    'currency_id': currency_id,
+                    'currency_abb': currency.abb,
+                    'currency_name': currency.name,
+                })
                 session.commit()
-                session.refresh(entity)
-
-                return entity
             except IntegrityError as e:
                 raise DataBaseIntegrityError(e)
 
+            if not result.rowcount:
+                raise NotFoundError(CurrencyRepository.__name__)
+
+            self.versions.bump(Currency.__tablename__, (currency_id,))
+            self.currency_ids.invalidate()
+
+            return Currency(
+                id=currency_id, abb=currency.abb, name=currency.name
+            )
+
     def delete_by_id(self, currency_id: int) -> None:
         with self.session_factory() as session:
-            entity: Currency = self.get_by_id(currency_id)
-            session.delete(entity)
+            result = session.execute(
+                DELETE_CURRENCY, {'currency_id': currency_id}
+            )
             session.commit()
 
+            if not result.rowcount:
+                raise NotFoundError(CurrencyRepository.__name__)
+
+            self.versions.bump(Currency.__tablename__, (currency_id,))
+            self.currency_ids.invalidate()
+
 
 class CurrencyQuotationRepository:
     def __init__(
             self, session_factory: Callable[
-                ..., AbstractContextManager[Session]]
+                ..., AbstractContextManager[Session]],
+            currency_ids: Optional[CurrencyIdCache] = None,
+            versions: Optional[TableVersions] = None,
+            store: Optional[QuotationStore] = None
     ) -> None:
         self.session_factory = session_factory
+        self.currency_ids = currency_ids or CurrencyIdCache()
+        self.versions = versions or TableVersions()
+        # Reads are served from the in-memory history when there is one;
+        # writes always go to the database
+        self.store = store
 
     def get_all(self, currency_id: int) -> Iterator[CurrencyQuotation]:
+        if self.store is not None:
+            history = self.store.history(currency_id)
+            if history is None:
+                return []
+
+            return [
+                _quotation(Quotation(
+                    quotation_id, currency_id, ordinal, rate, scaled_rate,
+                    base or None
+                ))
+                for quotation_id, ordinal, rate, scaled_rate, base
+                in zip(*history)
+            ]
+
         with self.session_factory() as session:
             return session.query(CurrencyQuotation).filter(
                 CurrencyQuotation.currency_id == currency_id
             ).all()
 
+    def get_history(
+            self, currency_ids: Optional[Iterable[int]] = None
+    ) -> Iterator[CurrencyQuotation]:
+        with self.session_factory() as session:
+            query = session.query(CurrencyQuotation)
+            if currency_ids is not None:
+                query = query.filter(
+                    CurrencyQuotation.currency_id.in_(list(currency_ids))
+                )
+
+            return query.order_by(
+                CurrencyQuotation.currency_id, CurrencyQuotation.date
+            ).all()
+
+    def get_fingerprint(self) -> Fingerprint:
+        with self.session_factory() as session:
+            count, max_id, version = session.execute(select(
+                func.count(CurrencyQuotation.id),
+                func.max(CurrencyQuotation.id),
+                select(TableVersion.version).where(
+                    TableVersion.table_name == CurrencyQuotation.__tablename__
+                ).scalar_subquery()
+            )).one()
+
+            return count, max_id, version
+
     def get_by_id(
             self, currency_id: int, quotation_id: int
     ) -> CurrencyQuotation:
+        if self.store is not None:
+            quotation = self.store.get(currency_id, quotation_id)
+            if quotation is None:
+                raise NotFoundError(CurrencyQuotationRepository.__name__)
+
+            return _quotation(quotation)
+
         with self.session_factory() as session:
             currency_quotation = session.query(CurrencyQuotation).filter(
                 CurrencyQuotation.currency_id == currency_id,
@@ -102,46 +237,72 @@ class CurrencyQuotationRepository:
             date_in: Optional[date] = None
     ) -> CurrencyQuotation:
         with self.session_factory() as session:
-            res = session.query(CurrencyQuotation, Currency).join(
-                Currency, Currency.id == CurrencyQuotation.currency_id
-            )
-
-            res = res.filter(Currency.abb == currency_abb)
-
-            if date_in is not None:
-                res = res.filter(CurrencyQuotation.date <= date_in)
-
-            res = res.order_by(desc(CurrencyQuotation.date)).limit(1).first()
-
-            if res is None:
+            if self.currency_ids.is_stale(currency_abb):
+                self.currency_ids.fill(
+                    session.execute(CurrencyIdCache.query())
+                )
+            currency_id = self.currency_ids.get(currency_abb)
+
+            row = None
+            if currency_id is not None and self.store is not None:
+                quotation = self.store.as_of(
+                    currency_id,
+                    date_in.toordinal() if date_in else date.max.toordinal()
+                )
+                if quotation is not None:
+                    return _quotation(quotation)
+            elif currency_id is not None:
+                row = session.execute(
+                    *as_of_query(currency_id, date_in)
+                ).first()
+
+            if row is None:
                 raise NotFoundError(CurrencyQuotationRepository.__name__)
 
             return CurrencyQuotation(
-                id=res.CurrencyQuotation.id,
-                currency_id=res.CurrencyQuotation.currency_id,
-                exchange_rate=res.CurrencyQuotation.exchange_rate,
-                date=res.CurrencyQuotation.date,
+                id=row.id,
+                currency_id=currency_id,
+                exchange_rate=row.exchange_rate,
+                date=row.date,
             )
 
     def add(
             self, currency_id: int, currency_quotation: CurrencyQuotationIn
     ) -> CurrencyQuotation:
         with self.session_factory() as session:
-            currency_quotation = CurrencyQuotation(
-                currency_id=currency_id,
-                exchange_rate=currency_quotation.exchange_rate,
-                date=currency_quotation.date or date.today()
-            )
+            values = {
+                'currency_id': currency_id,
+                'exchange_rate': currency_quotation.exchange_rate,
+                'exchange_rate_scaled':
+                    to_scaled(currency_quotation.exchange_rate),
+                'base_currency_id': currency_quotation.base_currency_id,
+                'date': currency_quotation.date or date.today(),
+            }
 
             try:
-                session.add(currency_quotation)
+                result = session.execute(INSERT_QUOTATION, values)
                 session.commit()
-                session.refresh(currency_quotation)
-
-                return currency_quotation
             except IntegrityError as e:
                 raise DataBaseIntegrityError(e)
 
+            self.versions.bump(CurrencyQuotation.__tablename__, (currency_id,))
+
+            return CurrencyQuotation(
+                id=result.inserted_primary_key[0], **values
+            )
+
+    def upsert_many(self, values: List[Dict[str, Any]]) -> None:
+        with self.session_factory() as session:
+            session.execute(
+                upsert_quotations(session.get_bind().dialect.name),
+                _scaled_rates(values)
+            )
+            session.commit()
+            self.versions.bump(
+                CurrencyQuotation.__tablename__,
+                {value['currency_id'] for value in values}
+            )
+
     def update_by_id(
             self,
             currency_id: int,
@@ -149,31 +310,512 @@ class CurrencyQuotationRepository:
             currency_quotation: CurrencyQuotationIn
     ) -> CurrencyQuotation:
         with self.session_factory() as session:
-            entity: CurrencyQuotation = self.get_by_id(
-                currency_id, quotation_id
-            )
-
-            current_date = date.today()
-            entity.date = currency_quotation.date or current_date
-            entity.exchange_rate = currency_quotation.exchange_rate
+            quotation_date = currency_quotation.date or date.today()
 
             try:
-                session.add(entity)
+                result = session.execute(UPDATE_QUOTATION, {
+                    'quotation_id': quotation_id,
+                    'quotation_currency_id': currency_id,
+                    'quotation_exchange_rate':
+                        currency_quotation.exchange_rate,
+                    'quotation_exchange_rate_scaled':
+                        to_scaled(currency_quotation.exchange_rate),
+                    'quotation_base_currency_id':
+                        currency_quotation.base_currency_id,
+                    'quotation_date': quotation_date,
+                })
                 session.commit()
-                session.refresh(entity)
-
-                return entity
             except IntegrityError as e:
                 raise DataBaseIntegrityError(e)
 
+            if not result.rowcount:
+                raise NotFoundError(CurrencyQuotationRepository.__name__)
+
+            self.versions.bump(CurrencyQuotation.__tablename__, (currency_id,))
+
+            return CurrencyQuotation(
+                id=quotation_id,
+                currency_id=currency_id,
+                exchange_rate=currency_quotation.exchange_rate,
+                base_currency_id=currency_quotation.base_currency_id,
+                date=quotation_date
+            )
+
     def delete_by_id(self, currency_id: int, quotation_id: int) -> None:
         with self.session_factory() as session:
-            entity: CurrencyQuotation = self.get_by_id(
-                currency_id, quotation_id
-            )
-            session.delete(entity)
+            result = session.execute(DELETE_QUOTATION, {
+                'quotation_id': quotation_id,
+                'quotation_currency_id': currency_id,
+            })
             session.commit()
 
+            if not result.rowcount:
+                raise NotFoundError(CurrencyQuotationRepository.__name__)
+
+            self.versions.bump(CurrencyQuotation.__tablename__, (currency_id,))
+
+
+# Writes go through the tables: one statement each, no ORM refresh. The
+# generated id comes from inserted_primary_key, which uses RETURNING where the
+# dialect supports it and the cursor's lastrowid on SQLite
+INSERT_CURRENCY = insert(Currency.__table__)
+UPDATE_CURRENCY = update(Currency.__table__).where(
+    Currency.id == bindparam('currency_id')
+).values(abb=bindparam('currency_abb'), name=bindparam('currency_name'))
+DELETE_CURRENCY = delete(Currency.__table__).where(
+    Currency.id == bindparam('currency_id')
+)
+
+INSERT_QUOTATION = insert(CurrencyQuotation.__table__)
+UPDATE_QUOTATION = update(CurrencyQuotation.__table__).where(
+    CurrencyQuotation.id == bindparam('quotation_id'),
+    CurrencyQuotation.currency_id == bindparam('quotation_currency_id')
+).values(
+    exchange_rate=bindparam('quotation_exchange_rate'),
+    exchange_rate_scaled=bindparam('quotation_exchange_rate_scaled'),
+    base_currency_id=bindparam('quotation_base_currency_id'),
+    date=bindparam('quotation_date')
+)
+DELETE_QUOTATION = delete(CurrencyQuotation.__table__).where(
+    CurrencyQuotation.id == bindparam('quotation_id'),
+    CurrencyQuotation.currency_id == bindparam('quotation_currency_id')
+)
+
+
+def _as_of_query(with_date: bool):
+    # Served from ix_currency_quotation_as_of_include alone: it includes id
+    # on PostgreSQL, and SQLite has the rowid, which id aliases, in every
+    # index. PostgreSQL still visits pages not marked all-visible by VACUUM
+    query = select(
+        CurrencyQuotation.id,
+        CurrencyQuotation.exchange_rate,
+        CurrencyQuotation.date,
+    ).where(CurrencyQuotation.currency_id == bindparam('currency_id'))
+
+    if with_date:
+        query = query.where(CurrencyQuotation.date <= bindparam('date_in'))
+
+    return query.order_by(desc(CurrencyQuotation.date)).limit(1)
+
+
+# Built once: the per-call cost is binding, not statement construction
+AS_OF_QUERY = _as_of_query(with_date=True)
+LATEST_QUERY = _as_of_query(with_date=False)
+
+
+def as_of_query(currency_id: int, date_in: Optional[date] = None):
+    if date_in is None:
+        return LATEST_QUERY, {'currency_id': currency_id}
+
+    return AS_OF_QUERY, {'currency_id': currency_id, 'date_in': date_in}
+
+
+def upsert_quotations(dialect_name: str):
+    insert = postgresql.insert if dialect_name == 'postgresql' \
+        else sqlite.insert
+    statement = insert(CurrencyQuotation)
+
+    return statement.on_conflict_do_update(
+        index_elements=['currency_id', 'date'],
+        set_={
+            'exchange_rate': statement.excluded.exchange_rate,
+            'exchange_rate_scaled': statement.excluded.exchange_rate_scaled,
+            'base_currency_id': statement.excluded.base_currency_id,
+        },
+    )
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _quotation(quotation: Quotation) -> CurrencyQuotation:
+    return CurrencyQuotation(
+        id=quotation.id,
+        currency_id=quotation.currency_id,
+        exchange_rate=quotation.exchange_rate,
+        exchange_rate_scaled=quotation.scaled_rate,
+        base_currency_id=quotation.base_currency_id,
+        date=date.fromordinal(quotation.date),
+    )
+
+
+def _scaled_rates(values: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Upserted rows carry the exact rate alongside the float one
+    return [
+        {**value, 'exchange_rate_scaled': to_scaled(value['exchange_rate'])}
+        for value in values
+    ]
+
+
+class AsyncCurrencyRepository:
+    def __init__(
+            self, session_factory: Callable[
+                ..., AbstractAsyncContextManager[AsyncSession]],
+            currency_ids: Optional[CurrencyIdCache] = None,
+            versions: Optional[TableVersions] = None
+    ) -> None:
+        self.session_factory = session_factory
+        self.currency_ids = currency_ids or CurrencyIdCache()
+        self.versions = versions or TableVersions()
+
+    async def get_all(self) -> List[Currency]:
+        async with self.session_factory() as session:
+            result = await session.execute(select(Currency))
+            return result.scalars().all()
+
+    async def get_by_id(self, currency_id: int) -> Currency:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Currency).where(Currency.id == currency_id)
+            )
+            currency = result.scalars().first()
+
+            if not currency:
+                raise NotFoundError(CurrencyRepository.__name__)
+
+            return currency
+
+    async def add(self, currency: CurrencyIn) -> Currency:
+        async with self.session_factory() as session:
+            try:
+                result = await session.execute(
+                    INSERT_CURRENCY,
+                    {'abb': currency.abb, 'name': currency.name}
+                )
+                await session.commit()
+            except IntegrityError as e:
+                raise DataBaseIntegrityError(e)
+
+            currency = Currency(
+                id=result.inserted_primary_key[0],
+                abb=currency.abb,
+                name=currency.name
+            )
+            self.versions.bump(Currency.__tablename__, (currency.id,))
+            self.currency_ids.invalidate()
+
+            return currency
+
+    async def update_by_id(
+            self, currency_id: int, currency: CurrencyIn
+    ) -> Currency:
+        async with self.session_factory() as session:
+            try:
+                result = await session.execute(UPDATE_CURRENCY, {
+                    'currency_id': currency_id,
+                    'currency_abb': currency.abb,
+                    'currency_name': currency.name,
+                })
+                await session.commit()
+            except IntegrityError as e:
+                raise DataBaseIntegrityError(e)
+
+            if not result.rowcount:
+                raise NotFoundError(CurrencyRepository.__name__)
+
+            self.versions.bump(Currency.__tablename__, (currency_id,))
+            self.currency_ids.invalidate()
+
+            return Currency(
+                id=currency_id, abb=currency.abb, name=currency.name
+            )
+
+    async def delete_by_id(self, currency_id: int) -> None:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                DELETE_CURRENCY, {'currency_id': currency_id}
+            )
+            await session.commit()
+
+            if not result.rowcount:
+                raise NotFoundError(CurrencyRepository.__name__)
+
+            self.versions.bump(Currency.__tablename__, (currency_id,))
+            self.currency_ids.invalidate()
+
+
+class AsyncCurrencyQuotationRepository:
+    # 5 bound parameters per row (currency_id, exchange_rate,
+    # exchange_rate_scaled, base_currency_id, date) stays below SQLite's 999
+    # variable limit
+    upsert_chunk_size = 199
+    stream_chunk_size = 1000
+
+    def __init__(
+            self, session_factory: Callable[
+                ..., AbstractAsyncContextManager[AsyncSession]],
+            currency_ids: Optional[CurrencyIdCache] = None,
+            versions: Optional[TableVersions] = None,
+            store: Optional[QuotationStore] = None
+    ) -> None:
+        self.session_factory = session_factory
+        self.currency_ids = currency_ids or CurrencyIdCache()
+        self.versions = versions or TableVersions()
+        # As in CurrencyQuotationRepository; streams still read the table
+        self.store = store
+
+    async def get_all(
+            self,
+            currency_id: int,
+            start: Optional[date] = None,
+            end: Optional[date] = None,
+            after: Optional[Tuple[date, int]] = None,
+            limit: Optional[int] = None
+    ) -> List[CurrencyQuotation]:
+        if self.store is not None:
+            return [
+                _quotation(quotation)
+                for quotation in self.store.page(
+                    currency_id,
+                    start.toordinal() if start else None,
+                    end.toordinal() if end else None,
+                    (after[0].toordinal(), after[1]) if after else None,
+                    limit
+                )
+            ]
+
+        async with self.session_factory() as session:
+            result = await session.execute(
+                self._page_query(
+                    select(CurrencyQuotation),
+                    currency_id, start, end, after, limit
+                )
+            )
+            return result.scalars().all()
+
+    async def stream_all(
+            self,
+            currency_id: int,
+            start: Optional[date] = None,
+            end: Optional[date] = None,
+            after: Optional[Tuple[date, int]] = None,
+            limit: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, int, float, date, Optional[int]]]:
+        query = self._page_query(
+            select(
+                CurrencyQuotation.id,
+                CurrencyQuotation.currency_id,
+                CurrencyQuotation.exchange_rate,
+                CurrencyQuotation.date,
+                CurrencyQuotation.base_currency_id,
+            ),
+            currency_id, start, end, after, limit
+        ).execution_options(yield_per=self.stream_chunk_size)
+
+        async with self.session_factory() as session:
+            result = await session.stream(query)
+            async for row in result:
+                yield row
+
+    @staticmethod
+    def _page_query(
+            query, currency_id: int,
+            start: Optional[date],
+            end: Optional[date],
+            after: Optional[Tuple[date, int]],
+            limit: Optional[int]
+    ):
+        query = query.where(CurrencyQuotation.currency_id == currency_id)
+
+        if start is not None:
+            query = query.where(CurrencyQuotation.date >= start)
+        if end is not None:
+            query = query.where(CurrencyQuotation.date <= end)
+        if after is not None:
+            query = query.where(
+                tuple_(CurrencyQuotation.date, CurrencyQuotation.id)
+                > tuple_(*after)
+            )
+
+        query = query.order_by(CurrencyQuotation.date, CurrencyQuotation.id)
+
+        return query.limit(limit) if limit is not None else query
+
+    async def get_by_id(
+            self, currency_id: int, quotation_id: int
+    ) -> CurrencyQuotation:
+        if self.store is not None:
+            quotation = self.store.get(currency_id, quotation_id)
+            if quotation is None:
+                raise NotFoundError(CurrencyQuotationRepository.__name__)
+
+            return _quotation(quotation)
+
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(CurrencyQuotation).where(
+                    CurrencyQuotation.currency_id == currency_id,
+                    CurrencyQuotation.id == quotation_id
+                )
+            )
+            currency_quotation = result.scalars().first()
+
+            if not currency_quotation:
+                raise NotFoundError(CurrencyQuotationRepository.__name__)
+
+            return currency_quotation
+
+    async def get_by_abb_and_date(
+            self,
+            currency_abb: str,
+            date_in: Optional[date] = None
+    ) -> CurrencyQuotation:
+        async with self.session_factory() as session:
+            if self.currency_ids.is_stale(currency_abb):
+                self.currency_ids.fill(
+                    await session.execute(CurrencyIdCache.query())
+                )
+            currency_id = self.currency_ids.get(currency_abb)
+
+            row = None
+            if currency_id is not None and self.store is not None:
+                quotation = self.store.as_of(
+                    currency_id,
+                    date_in.toordinal() if date_in else date.max.toordinal()
+                )
+                if quotation is not None:
+                    return _quotation(quotation)
+            elif currency_id is not None:
+                result = await session.execute(
+                    *as_of_query(currency_id, date_in)
+                )
+                row = result.first()
+
+            if row is None:
+                raise NotFoundError(CurrencyQuotationRepository.__name__)
+
+            return CurrencyQuotation(
+                id=row.id,
+                currency_id=currency_id,
+                exchange_rate=row.exchange_rate,
+                date=row.date,
+            )
+
+    async def add(
+            self, currency_id: int, currency_quotation: CurrencyQuotationIn
+    ) -> CurrencyQuotation:
+        async with self.session_factory() as session:
+            values = {
+                'currency_id': currency_id,
+                'exchange_rate': currency_quotation.exchange_rate,
+                'exchange_rate_scaled':
+                    to_scaled(currency_quotation.exchange_rate),
+                'base_currency_id': currency_quotation.base_currency_id,
+                'date': currency_quotation.date or date.today(),
+            }
+
+            try:
+                result = await session.execute(INSERT_QUOTATION, values)
+                await session.commit()
+            except IntegrityError as e:
+                raise DataBaseIntegrityError(e)
+
+            self.versions.bump(CurrencyQuotation.__tablename__, (currency_id,))
+
+            return CurrencyQuotation(
+                id=result.inserted_primary_key[0], **values
+            )
+
+    async def upsert_many(
+            self, values: List[Dict[str, Any]]
+    ) -> List[CurrencyQuotation]:
+        # Rows already in the table for a (currency_id, date) are
+        # overwritten. PostgreSQL returns the written rows with the upsert;
+        # SQLAlchemy 1.4 has no RETURNING for SQLite, where each chunk takes
+        # a second statement to read them back
+        quotations = []
+
+        async with self.session_factory() as session:
+            dialect_name = session.bind.dialect.name
+            statement = upsert_quotations(dialect_name)
+            if dialect_name == 'postgresql':
+                statement = statement.returning(*CurrencyQuotation.__table__.c)
+
+            for chunk in chunked(
+                    _scaled_rates(values), self.upsert_chunk_size
+            ):
+                result = await session.execute(statement.values(chunk))
+                if dialect_name == 'postgresql':
+                    quotations.extend(
+                        CurrencyQuotation(**row._mapping) for row in result
+                    )
+                    continue
+
+                result = await session.execute(
+                    select(CurrencyQuotation).where(
+                        tuple_(
+                            CurrencyQuotation.currency_id,
+                            CurrencyQuotation.date
+                        ).in_([(v['currency_id'], v['date']) for v in chunk])
+                    )
+                )
+                quotations.extend(result.scalars().all())
+
+            await session.commit()
+            self.versions.bump(
+                CurrencyQuotation.__tablename__,
+                {value['currency_id'] for value in values}
+            )
+
+        return quotations
+
+    async def update_by_id(
+            self,
+            currency_id: int,
+            quotation_id: int,
+            currency_quotation: CurrencyQuotationIn
+    ) -> CurrencyQuotation:
+        async with self.session_factory() as session:
+            quotation_date = currency_quotation.date or date.today()
+
+            try:
+                result = await session.execute(UPDATE_QUOTATION, {
+                    'quotation_id': quotation_id,
+                    'quotation_currency_id': currency_id,
+                    'quotation_exchange_rate':
+                        currency_quotation.exchange_rate,
+                    'quotation_exchange_rate_scaled':
+                        to_scaled(currency_quotation.exchange_rate),
+                    'quotation_base_currency_id':
+                        currency_quotation.base_currency_id,
+                    'quotation_date': quotation_date,
+                })
+                await session.commit()
+            except IntegrityError as e:
+                raise DataBaseIntegrityError(e)
+
+            if not result.rowcount:
+                raise NotFoundError(CurrencyQuotationRepository.__name__)
+
+            self.versions.bump(CurrencyQuotation.__tablename__, (currency_id,))
+
+            return CurrencyQuotation(
+                id=quotation_id,
+                currency_id=currency_id,
+                exchange_rate=currency_quotation.exchange_rate,
+                base_currency_id=currency_quotation.base_currency_id,
+                date=quotation_date
+            )
+
+    async def delete_by_id(self, currency_id: int, quotation_id: int) -> None:
+        async with self.session_factory() as session:
+            result = await session.execute(DELETE_QUOTATION, {
+                'quotation_id': quotation_id,
+                'quotation_currency_id': currency_id,
+            })
+            await session.commit()
+
+            if not result.rowcount:
+                raise NotFoundError(CurrencyQuotationRepository.__name__)
+
+            self.versions.bump(CurrencyQuotation.__tablename__, (currency_id,))
+
 
 class NotFoundError(Exception):
     def __init__(self, entity_name):
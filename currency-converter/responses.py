@@ -0,0 +1,23 @@
+"""Responses module."""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+class DTOResponse(Response):
+    # Returning a Response skips FastAPI's response_model validation and
+    # jsonable_encoder; DTOs are encoded straight from their field values
+    media_type = 'application/json'
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_encode_model)
+
+
+def _encode_model(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+
+    raise TypeError(f'Type is not JSON serializable: {type(obj).__name__}')
@@ -0,0 +1,85 @@
+"""Routes module."""
+
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+from .fixedpoint import RATE_SCALE
+from .quotations import Quotation, QuotationStore
+
+
+class Route(NamedTuple):
+    # Quotations from each side up to the nearest currency both reach; a
+    # quotation converts its currency into its base
+    up: Tuple[Quotation, ...]
+    down: Tuple[Quotation, ...]
+
+    @property
+    def currency_ids(self) -> Set[int]:
+        return {quotation.currency_id for quotation in self.up + self.down}
+
+    @property
+    def rate(self) -> float:
+        rate = 1.0
+        for quotation in self.up:
+            rate *= quotation.exchange_rate
+        for quotation in self.down:
+            rate /= quotation.exchange_rate
+
+        return rate
+
+    @property
+    def scaled_rates(self) -> Tuple[int, int]:
+        # rate as a fraction of scaled rates, both sides at the same scale
+        rate_from = RATE_SCALE ** max(len(self.down) - len(self.up), 0)
+        for quotation in self.up:
+            rate_from *= quotation.scaled_rate
+        rate_to = RATE_SCALE ** max(len(self.up) - len(self.down), 0)
+        for quotation in self.down:
+            rate_to *= quotation.scaled_rate
+
+        return rate_from, rate_to
+
+
+class ConversionGraph:
+    # Currencies are nodes and quotations edges to their base. A currency
+    # has one quotation per date, so the graph on a date is a forest rooted
+    # at the implicit base, and the shortest route between two currencies
+    # is the one through their nearest common ancestor
+
+    def __init__(self, store: QuotationStore) -> None:
+        self._store = store
+
+    def route(
+            self, currency_id_from: int, currency_id_to: int, ordinal: int
+    ) -> Optional[Route]:
+        up = self._chain(currency_id_from, ordinal)
+        down = self._chain(currency_id_to, ordinal)
+
+        # None stands for the implicit base
+        positions = {currency_id_from: 0}
+        for pos, quotation in enumerate(up, 1):
+            positions.setdefault(quotation.base_currency_id, pos)
+
+        nodes = [currency_id_to] + [q.base_currency_id for q in down]
+        for stop, node in enumerate(nodes):
+            if node in positions:
+                return Route(tuple(up[:positions[node]]), tuple(down[:stop]))
+
+        return None
+
+    def _chain(self, currency_id: int, ordinal: int) -> List[Quotation]:
+        # Quotations from currency_id towards the implicit base, stopping at
+        # a currency not quoted on the date or at a cycle
+        chain = []
+        seen = {currency_id}
+        quotation = self._store.as_of(currency_id, ordinal)
+
+        while quotation is not None:
+            chain.append(quotation)
+            base = quotation.base_currency_id
+            if base is None or base in seen:
+                break
+
+            seen.add(base)
+            quotation = self._store.as_of(base, ordinal)
+
+        return chain
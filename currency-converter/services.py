@@ -1,144 +1,471 @@
 """Services module."""
+import asyncio
 import datetime
-from typing import Iterator, Optional
+from bisect import bisect_right
+from typing import (
+    Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+)
+
+import numpy as np
 
+from .caches import ConversionCache, InvalidationBus
+from . import fixedpoint
+from .crossrates import CrossRateStore
 from .dtos import (
     CurrencyIn, CurrencyOut, CurrencyQuotationIn,
-    CurrencyQuotationOut, ConverterIn, ConverterOut
+    CurrencyQuotationOut, ConverterIn, ConverterOut,
+    ConverterBatchIn, ConverterBatchOut, ConverterSeriesOut,
+    QuotationImportOut,
+    QuotationBulkIn, QuotationBulkConflict, QuotationBulkOut
 )
+from .importers import QuotationImporter, read_ptax_csv
+from .indexes import RateIndex, to_dto
+from .metrics import dto_construction_duration
+from .models import Currency, CurrencyQuotation
+from .quotations import Quotation
 from .repositories import (
     CurrencyRepository, CurrencyQuotationRepository,
+    AsyncCurrencyRepository, AsyncCurrencyQuotationRepository,
     NotFoundError
 )
+from .routes import ConversionGraph
 
 
 class CurrencyService:
-    def __init__(self, currency_repository: CurrencyRepository) -> None:
-        self._repository: CurrencyRepository = currency_repository
+    def __init__(
+            self, currency_repository: AsyncCurrencyRepository,
+            rate_index: RateIndex,
+            invalidations: InvalidationBus
+    ) -> None:
+        self._repository: AsyncCurrencyRepository = currency_repository
+        self._rate_index: RateIndex = rate_index
+        self._invalidations: InvalidationBus = invalidations
 
-    def get_currencies(self) -> Iterator[CurrencyOut]:
+    async def get_currencies(self) -> Iterator[CurrencyOut]:
+        # Outputs are built from database rows or already validated inputs,
+        # so construct() skips validating them again
         currencies = map(
-            lambda currency: CurrencyOut(
+            lambda currency: CurrencyOut.construct(
                 abb=currency.abb, name=currency.name, id=currency.id
             ),
-            self._repository.get_all()
+            await self._repository.get_all()
         )
 
-        return list(currencies)
+        with dto_construction_duration.time(CurrencyOut.__name__):
+            return list(currencies)
 
-    def get_currency_by_id(self, currency_id: int) -> CurrencyOut:
-        currency = self._repository.get_by_id(currency_id)
+    async def get_currency_by_id(self, currency_id: int) -> CurrencyOut:
+        currency = await self._repository.get_by_id(currency_id)
 
-        return CurrencyOut(
+        return CurrencyOut.construct(
             abb=currency.abb, name=currency.name, id=currency.id
         )
 
-    def create_currency(self, currency: CurrencyIn) -> CurrencyOut:
-        currency = self._repository.add(currency)
+    async def create_currency(self, currency: CurrencyIn) -> CurrencyOut:
+        currency = await self._repository.add(currency)
+        self._rate_index.put_currency(currency.id, currency.abb)
+        self._invalidations.publish(Currency.__tablename__, (currency.id,))
 
-        return CurrencyOut(
+        return CurrencyOut.construct(
             abb=currency.abb, name=currency.name, id=currency.id
         )
 
-    def update_currency(
+    async def update_currency(
             self, currency_id: int, currency: CurrencyIn
     ) -> CurrencyOut:
-        currency = self._repository.update_by_id(currency_id, currency)
+        currency = await self._repository.update_by_id(currency_id, currency)
+        self._rate_index.put_currency(currency.id, currency.abb)
+        self._invalidations.publish(Currency.__tablename__, (currency.id,))
 
-        return CurrencyOut(
+        return CurrencyOut.construct(
             abb=currency.abb, name=currency.name, id=currency.id
         )
 
-    def delete_currency_by_id(self, currency_id: int) -> None:
-        return self._repository.delete_by_id(currency_id)
+    async def delete_currency_by_id(self, currency_id: int) -> None:
+        await self._repository.delete_by_id(currency_id)
+        self._rate_index.remove_currency(currency_id)
+        self._invalidations.publish(Currency.__tablename__, (currency_id,))
 
 
 class CurrencyQuotationService:
     def __init__(
-            self, currency_quotation_repo: CurrencyQuotationRepository
+            self, currency_quotation_repo: AsyncCurrencyQuotationRepository,
+            rate_index: RateIndex,
+            cross_rates: CrossRateStore,
+            invalidations: InvalidationBus
     ) -> None:
-        self._repository: CurrencyQuotationRepository = currency_quotation_repo
+        self._repository: AsyncCurrencyQuotationRepository = (
+            currency_quotation_repo
+        )
+        self._rate_index: RateIndex = rate_index
+        self._cross_rates: CrossRateStore = cross_rates
+        self._invalidations: InvalidationBus = invalidations
 
-    def get_currency_quotations(self, currency_id: int) -> Iterator[
-        CurrencyQuotationOut
-    ]:
+    async def _sync_cross_rates(
+            self, *quotations: Optional[CurrencyQuotationOut]
+    ) -> None:
+        changes = {(q.currency_id, q.date) for q in quotations if q}
+        if not changes:
+            return
+
+        await asyncio.to_thread(
+            self._cross_rates.update, self._rate_index, changes
+        )
+
+        # Other workers refresh from the table and recompute their own
+        self._invalidations.publish(
+            CurrencyQuotation.__tablename__,
+            {currency_id for currency_id, _ in changes}
+        )
+
+    async def get_currency_quotations(
+            self,
+            currency_id: int,
+            start: Optional[datetime.date] = None,
+            end: Optional[datetime.date] = None,
+            cursor: Optional[str] = None,
+            limit: Optional[int] = None
+    ) -> Iterator[CurrencyQuotationOut]:
         currency_quotations = map(
-            lambda currency_quotation: CurrencyQuotationOut(
+            lambda currency_quotation: CurrencyQuotationOut.construct(
                 id=currency_quotation.id,
                 currency_id=currency_quotation.currency_id,
                 exchange_rate=currency_quotation.exchange_rate,
-                date=currency_quotation.date
+                date=currency_quotation.date,
+                base_currency_id=currency_quotation.base_currency_id
             ),
-            self._repository.get_all(currency_id)
+            await self._repository.get_all(
+                currency_id, start, end, self.parse_cursor(cursor), limit
+            )
         )
 
-        return list(currency_quotations)
+        with dto_construction_duration.time(CurrencyQuotationOut.__name__):
+            return list(currency_quotations)
+
+    async def stream_currency_quotations(
+            self,
+            currency_id: int,
+            output_format: str,
+            start: Optional[datetime.date] = None,
+            end: Optional[datetime.date] = None,
+            cursor: Optional[str] = None,
+            limit: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        rows = self._repository.stream_all(
+            currency_id, start, end, self.parse_cursor(cursor), limit
+        )
+
+        # An empty base_currency_id (null in NDJSON) is the implicit base
+        if output_format == 'csv':
+            yield 'id,currency_id,exchange_rate,date,base_currency_id\n'
+            async for id_, currency_id_, exchange_rate, date, base in rows:
+                yield (
+                    f'{id_},{currency_id_},{exchange_rate!r},{date},'
+                    f'{"" if base is None else base}\n'
+                )
+        else:
+            async for id_, currency_id_, exchange_rate, date, base in rows:
+                yield (
+                    f'{{"id":{id_},"currency_id":{currency_id_},'
+                    f'"exchange_rate":{exchange_rate!r},"date":"{date}",'
+                    f'"base_currency_id":{"null" if base is None else base}}}'
+                    f'\n'
+                )
+
+    @staticmethod
+    def make_cursor(currency_quotation: CurrencyQuotationOut) -> str:
+        return f'{currency_quotation.date}:{currency_quotation.id}'
+
+    @staticmethod
+    def parse_cursor(
+            cursor: Optional[str]
+    ) -> Optional[Tuple[datetime.date, int]]:
+        if cursor is None:
+            return None
+
+        try:
+            date, quotation_id = cursor.split(':')
+            return datetime.date.fromisoformat(date), int(quotation_id)
+        except ValueError:
+            raise InvalidCursorError(cursor)
 
-    def get_currency_quotation_by_id(
+    async def get_currency_quotation_by_id(
             self, currency_id: int, quotation_id: int
     ) -> CurrencyQuotationOut:
-        currency_quotation = self._repository.get_by_id(
+        currency_quotation = await self._repository.get_by_id(
             currency_id, quotation_id
         )
 
-        return CurrencyQuotationOut(
+        return CurrencyQuotationOut.construct(
             id=currency_quotation.id,
             currency_id=currency_quotation.currency_id,
             exchange_rate=currency_quotation.exchange_rate,
-            date=currency_quotation.date
+            date=currency_quotation.date,
+            base_currency_id=currency_quotation.base_currency_id
         )
 
-    def create_currency_quotation(
+    async def create_currency_quotation(
             self, currency_id: int,
             currency_quotation: CurrencyQuotationIn
     ) -> CurrencyQuotationOut:
-        currency_quotation = self._repository.add(
+        currency_quotation = await self._repository.add(
             currency_id, currency_quotation
         )
 
-        return CurrencyQuotationOut(
+        currency_quotation = CurrencyQuotationOut.construct(
             id=currency_quotation.id,
             currency_id=currency_quotation.currency_id,
             exchange_rate=currency_quotation.exchange_rate,
-            date=currency_quotation.date
+            date=currency_quotation.date,
+            base_currency_id=currency_quotation.base_currency_id
         )
+        previous = self._rate_index.put_quotation(currency_quotation)
+        await self._sync_cross_rates(currency_quotation, previous)
+
+        return currency_quotation
 
-    def update_currency_quotation(
+    async def update_currency_quotation(
             self, currency_id: int, quotation_id: int,
             currency_quotation: CurrencyQuotationIn
     ) -> CurrencyQuotationOut:
-        currency_quotation = self._repository.update_by_id(
+        currency_quotation = await self._repository.update_by_id(
             currency_id, quotation_id, currency_quotation
         )
 
-        return CurrencyQuotationOut(
+        currency_quotation = CurrencyQuotationOut.construct(
             id=currency_quotation.id,
             currency_id=currency_quotation.currency_id,
             exchange_rate=currency_quotation.exchange_rate,
-            date=currency_quotation.date
+            date=currency_quotation.date,
+            base_currency_id=currency_quotation.base_currency_id
         )
+        previous = self._rate_index.put_quotation(currency_quotation)
+        await self._sync_cross_rates(currency_quotation, previous)
+
+        return currency_quotation
 
-    def delete_currency_quotation_by_id(
+    async def delete_currency_quotation_by_id(
             self, currency_id: int, quotation_id: int
     ) -> None:
-        return self._repository.delete_by_id(currency_id, quotation_id)
+        await self._repository.delete_by_id(currency_id, quotation_id)
+        previous = self._rate_index.remove_quotation(
+            currency_id, quotation_id
+        )
+        await self._sync_cross_rates(previous)
+
+    async def upsert_currency_quotations(
+            self, currency_quotations: List[QuotationBulkIn]
+    ) -> QuotationBulkOut:
+        current_date = datetime.date.today()
+        values = []
+        conflicts = []
+        keys = set()
+
+        for index, currency_quotation in enumerate(currency_quotations):
+            quotation_date = currency_quotation.date or current_date
+            currency_id = self._rate_index.currency_id(
+                currency_quotation.currency_abb
+            )
+            base_abb = currency_quotation.base_currency_abb
+            base_currency_id = base_abb and \
+                self._rate_index.currency_id(base_abb)
+
+            if currency_id is None:
+                reason = 'Currency not found'
+            elif base_abb is not None and base_currency_id is None:
+                reason = 'Base currency not found'
+            elif (currency_id, quotation_date) in keys:
+                # Nothing says which of the two is meant; a quotation
+                # already in the table is overwritten, as upserts do
+                reason = 'Duplicated currency and date in the batch'
+            else:
+                keys.add((currency_id, quotation_date))
+                values.append({
+                    'currency_id': currency_id,
+                    'exchange_rate': currency_quotation.exchange_rate,
+                    'base_currency_id': base_currency_id,
+                    'date': quotation_date,
+                })
+                continue
+
+            conflicts.append(QuotationBulkConflict.construct(
+                index=index,
+                currency_abb=currency_quotation.currency_abb,
+                date=quotation_date,
+                reason=reason
+            ))
+
+        quotations = [
+            CurrencyQuotationOut.construct(
+                id=currency_quotation.id,
+                currency_id=currency_quotation.currency_id,
+                exchange_rate=currency_quotation.exchange_rate,
+                date=currency_quotation.date,
+                base_currency_id=currency_quotation.base_currency_id
+            )
+            for currency_quotation in (
+                await self._repository.upsert_many(values) if values else []
+            )
+        ]
+        previous = [
+            self._rate_index.put_quotation(quotation)
+            for quotation in quotations
+        ]
+        await self._sync_cross_rates(*quotations, *previous)
+
+        return QuotationBulkOut.construct(
+            quotations=quotations, conflicts=conflicts
+        )
 
 
-class CurrencyConverterService:
+class QuotationImportService:
     def __init__(
-            self, currency_quotation_repo: CurrencyQuotationRepository
+            self,
+            currency_repository: CurrencyRepository,
+            currency_quotation_repo: CurrencyQuotationRepository,
+            rate_index: RateIndex,
+            cross_rates: CrossRateStore,
+            invalidations: InvalidationBus,
+            chunk_size: Optional[int] = None,
+            base_abb: Optional[str] = None
     ) -> None:
+        self._currency_repository: CurrencyRepository = currency_repository
         self._repository: CurrencyQuotationRepository = currency_quotation_repo
+        self._rate_index: RateIndex = rate_index
+        self._cross_rates: CrossRateStore = cross_rates
+        self._invalidations: InvalidationBus = invalidations
+        self._chunk_size: int = chunk_size or 5000
+        self._base_abb: str = base_abb or 'BRL'
+
+    def import_ptax(self, lines: Iterable[str]) -> QuotationImportOut:
+        importer = QuotationImporter(
+            self._currency_repository, self._repository,
+            chunk_size=self._chunk_size, base_abb=self._base_abb
+        )
+        result = importer.run(read_ptax_csv(lines))
+        self.reload_indexes()
 
-    def _get_quotation(self, currency_abb: str, date: Optional[datetime.date]):
-        quotation = self._repository.get_by_abb_and_date(currency_abb, date)
+        return result
 
-        return CurrencyQuotationOut(
-            id=quotation.id,
-            currency_id=quotation.currency_id,
-            exchange_rate=quotation.exchange_rate,
-            date=quotation.date
+    def reload_indexes(self) -> None:
+        fingerprint = self._repository.get_fingerprint()
+        self._rate_index.load(
+            self._currency_repository.get_all(),
+            self._repository.get_history(), fingerprint
         )
+        self._cross_rates.rebuild(self._rate_index)
+        self._invalidations.publish(CurrencyQuotation.__tablename__)
+
+
+class IndexRefreshService:
+    def __init__(
+            self,
+            currency_repository: CurrencyRepository,
+            currency_quotation_repo: CurrencyQuotationRepository,
+            rate_index: RateIndex,
+            cross_rates: CrossRateStore
+    ) -> None:
+        self._currency_repository: CurrencyRepository = currency_repository
+        self._repository: CurrencyQuotationRepository = currency_quotation_repo
+        self._rate_index: RateIndex = rate_index
+        self._cross_rates: CrossRateStore = cross_rates
+
+    def load(self) -> None:
+        # The history comes from the snapshot while it still matches the
+        # table, which spares the full scan
+        currencies = self._currency_repository.get_all()
+        # Taken before the scan: a write in between leaves a snapshot that
+        # is read again next time, never one that misses the write
+        fingerprint = self._repository.get_fingerprint()
+
+        if self._rate_index.store.open(fingerprint):
+            self._rate_index.load(currencies)
+        else:
+            self._rate_index.load(
+                currencies, self._repository.get_history(), fingerprint
+            )
+            self._rate_index.store.save()
+
+        self._cross_rates.rebuild(self._rate_index)
+
+    def save(self) -> None:
+        # Quotations changed here since the load are not known to be all
+        # the table's changes; the history is read again to be saved
+        store = self._rate_index.store
+        if store.snapshot_path is not None and store.fingerprint is None:
+            fingerprint = self._repository.get_fingerprint()
+            store.load(self._repository.get_history(), fingerprint)
+
+        store.save()
+
+    def refresh(self, table: str, currency_ids: Tuple[int, ...]) -> None:
+        # Another worker committed; the cross rates are recomputed here from
+        # the history as read now, on the dates where it differs
+        currencies = self._currency_repository.get_all()
+
+        if not currency_ids:
+            fingerprint = self._repository.get_fingerprint()
+            self._rate_index.load(
+                currencies, self._repository.get_history(), fingerprint
+            )
+            self._cross_rates.rebuild(self._rate_index)
+            return
+
+        before = self._rate_index.series()
+        self._rate_index.refresh(
+            currencies, self._repository.get_history(currency_ids),
+            currency_ids
+        )
+        after = self._rate_index.series()
+
+        changes = set()
+        for currency_id in currency_ids:
+            # Histories are replaced, never changed in place
+            old = set(zip(*before.get(currency_id, ((), ()))))
+            new = set(zip(*after.get(currency_id, ((), ()))))
+            changes.update(
+                (currency_id, datetime.date.fromordinal(ordinal))
+                for ordinal, _ in old ^ new
+            )
+
+        if changes:
+            self._cross_rates.update(self._rate_index, changes)
+
+
+class CurrencyConverterService:
+    def __init__(
+            self,
+            rate_index: RateIndex,
+            cross_rates: CrossRateStore,
+            conversion_cache: ConversionCache,
+            conversion_graph: ConversionGraph,
+            engine: str = 'float',
+            rounding: str = 'half_even',
+            places: int = 3
+    ) -> None:
+        if engine not in ('float', 'fixed'):
+            raise ConversionEngineError(engine)
+
+        self._rate_index: RateIndex = rate_index
+        self._cross_rates: CrossRateStore = cross_rates
+        self._cache: ConversionCache = conversion_cache
+        self._graph: ConversionGraph = conversion_graph
+        # fixed converts with integers only, rounding each result once to
+        # `places` decimals
+        self._fixed: bool = engine == 'fixed'
+        self._rounding: str = fixedpoint.check_rounding(rounding)
+        self._places: int = places
+
+    def _get_quotation(
+            self, currency_abb: str, date: Optional[datetime.date]
+    ) -> Quotation:
+        return self._rate_index.quotation(currency_abb, date)
+
+    def _get_history(self, currency_abb: str, label: str):
+        try:
+            return self._rate_index.history(currency_abb)
+        except NotFoundError:
+            raise NotFoundError(f'{label} not found in the database')
 
     def _get_quotation_from(
             self, currency_abb: str, date: Optional[datetime.date]
@@ -156,19 +483,207 @@ class CurrencyConverterService:
         except NotFoundError:
             raise NotFoundError('QuotationTo not found in the database')
 
-    def convert_currency(self, converter: ConverterIn) -> ConverterOut:
-        quotation_from = self._get_quotation_from(
-            converter.currency_abb_from, converter.date
-        )
-        quotation_to = self._get_quotation_to(
-            converter.currency_abb_to, converter.date
+    def _resolve(
+            self, currency_abb_from: str, currency_abb_to: str,
+            date: Optional[datetime.date]
+    ) -> Tuple[
+        CurrencyQuotationOut, CurrencyQuotationOut, float, Tuple[int, int]
+    ]:
+        generation = self._cache.generation
+        quotation_from = self._get_quotation_from(currency_abb_from, date)
+        quotation_to = self._get_quotation_to(currency_abb_to, date)
+        same_base = quotation_from.base_currency_id == \
+            quotation_to.base_currency_id
+
+        # Keyed on the quotations the date resolves to, so that every date
+        # between two quotations shares one entry; a route also goes through
+        # the quotations of other currencies as of the date, so it keeps it
+        key = f'{quotation_from.id}:{quotation_to.id}'
+        if not same_base:
+            key = f'{key}:{date}'
+        resolved = self._cache.get(key)
+        if resolved is not None:
+            return resolved
+
+        currency_ids = {quotation_from.currency_id, quotation_to.currency_id}
+
+        if same_base:
+            rate = self._cross_rates.get_rate(
+                quotation_from.currency_id, quotation_to.currency_id, date
+            )
+            if rate is None:
+                rate = quotation_from.exchange_rate / \
+                    quotation_to.exchange_rate
+            scaled = quotation_from.scaled_rate, quotation_to.scaled_rate
+        else:
+            # Quoted against different bases: the route is cached with the
+            # conversion, and goes when a quotation along it changes
+            route = self._graph.route(
+                quotation_from.currency_id, quotation_to.currency_id,
+                (date or datetime.date.max).toordinal()
+            )
+            if route is None:
+                raise NotFoundError(
+                    'Route between QuotationFrom and QuotationTo'
+                )
+            rate = route.rate
+            scaled = route.scaled_rates
+            currency_ids |= route.currency_ids
+
+        resolved = (
+            to_dto(quotation_from), to_dto(quotation_to), rate, scaled
         )
+        self._cache.put(key, resolved, currency_ids, generation)
 
-        rate = quotation_from.exchange_rate / quotation_to.exchange_rate
-        value = round(converter.value * rate, 3)
+        return resolved
 
-        return ConverterOut(
-            CurrencyQuotationFrom=quotation_from,
-            CurrencyQuotationTo=quotation_to,
-            value=value
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+    def convert_currency(self, converter: ConverterIn) -> ConverterOut:
+        quotation_from, quotation_to, rate, scaled = self._resolve(
+            converter.currency_abb_from, converter.currency_abb_to,
+            converter.date
+        )
+        if self._fixed:
+            value = fixedpoint.from_scaled(fixedpoint.convert_value(
+                converter.value, *scaled, self._places, self._rounding
+            ), self._places)
+        else:
+            value = round(converter.value * rate, self._places)
+
+        with dto_construction_duration.time(ConverterOut.__name__):
+            return ConverterOut.construct(
+                CurrencyQuotationFrom=quotation_from,
+                CurrencyQuotationTo=quotation_to,
+                value=value
+            )
+
+    def convert_currency_batch(
+            self, converter: Union[List[ConverterIn], ConverterBatchIn]
+    ) -> ConverterBatchOut:
+        if isinstance(converter, ConverterBatchIn):
+            abbs_from = converter.currency_abb_from
+            abbs_to = converter.currency_abb_to
+            dates = converter.date or [None] * len(converter.value)
+            values = converter.value
+        else:
+            abbs_from = [item.currency_abb_from for item in converter]
+            abbs_to = [item.currency_abb_to for item in converter]
+            dates = [item.date for item in converter]
+            values = [item.value for item in converter]
+
+        quotations: Dict[Tuple[str, Optional[datetime.date]], Quotation] = {}
+        for label, abbs in (('QuotationFrom', abbs_from),
+                            ('QuotationTo', abbs_to)):
+            for i, key in enumerate(zip(abbs, dates)):
+                if key in quotations:
+                    continue
+                try:
+                    quotations[key] = self._get_quotation(*key)
+                except NotFoundError:
+                    raise NotFoundError(f'{label} for item {i}')
+
+        rates_from = []
+        rates_to = []
+        for i, (abb_from, abb_to, date) in enumerate(
+                zip(abbs_from, abbs_to, dates)
+        ):
+            quotation_from = quotations[abb_from, date]
+            quotation_to = quotations[abb_to, date]
+
+            if quotation_from.base_currency_id != \
+                    quotation_to.base_currency_id:
+                try:
+                    _, _, rate, scaled = self._resolve(
+                        abb_from, abb_to, date
+                    )
+                except NotFoundError:
+                    raise NotFoundError(f'Route for item {i}')
+                rate_from, rate_to = scaled if self._fixed else (rate, 1.0)
+            elif self._fixed:
+                rate_from = quotation_from.scaled_rate
+                rate_to = quotation_to.scaled_rate
+            else:
+                rate_from = quotation_from.exchange_rate
+                rate_to = quotation_to.exchange_rate
+
+            rates_from.append(rate_from)
+            rates_to.append(rate_to)
+
+        if self._fixed:
+            result = fixedpoint.convert_array(
+                values, rates_from, rates_to, self._places, self._rounding
+            ) / 10 ** self._places
+        else:
+            result = np.round(
+                np.asarray(values, dtype=np.float64) *
+                np.asarray(rates_from) / np.asarray(rates_to),
+                self._places
+            )
+
+        with dto_construction_duration.time(ConverterBatchOut.__name__):
+            return ConverterBatchOut.construct(value=result.tolist())
+
+    def get_series(
+            self,
+            currency_abb_from: str,
+            currency_abb_to: str,
+            start: Optional[datetime.date] = None,
+            end: Optional[datetime.date] = None
+    ) -> ConverterSeriesOut:
+        history_from = self._get_history(currency_abb_from, 'QuotationFrom')
+        history_to = self._get_history(currency_abb_to, 'QuotationTo')
+        # Rates are divided date by date, which needs one common base
+        bases = np.concatenate([
+            np.frombuffer(history_from.bases, dtype=np.int32),
+            np.frombuffer(history_to.bases, dtype=np.int32),
+        ])
+        if (bases != bases[0]).any():
+            raise NotFoundError('Common base for the series')
+
+        dates_from, rates_from = history_from.dates, history_from.rates
+        dates_to, rates_to = history_to.dates, history_to.rates
+
+        low = start.toordinal() if start else min(dates_from[0], dates_to[0])
+        high = end.toordinal() if end else max(dates_from[-1], dates_to[-1])
+        i = bisect_right(dates_from, low) - 1
+        j = bisect_right(dates_to, low) - 1
+
+        # Forward-fill merge: a point wherever either side changes
+        dates = []
+        rates = []
+        current = low
+        while current <= high:
+            if i >= 0 and j >= 0:
+                dates.append(datetime.date.fromordinal(current))
+                rates.append(rates_from[i] / rates_to[j])
+
+            next_from = dates_from[i + 1] \
+                if i + 1 < len(dates_from) else high + 1
+            next_to = dates_to[j + 1] if j + 1 < len(dates_to) else high + 1
+            current = min(next_from, next_to)
+            if next_from == current:
+                i += 1
+            if next_to == current:
+                j += 1
+
+        with dto_construction_duration.time(ConverterSeriesOut.__name__):
+            return ConverterSeriesOut.construct(
+                currency_abb_from=currency_abb_from,
+                currency_abb_to=currency_abb_to,
+                date=dates,
+                rate=rates
+            )
+
+
+class InvalidCursorError(ValueError):
+    def __init__(self, cursor: str):
+        super().__init__(f'Invalid cursor: {cursor}')
+
+
+class ConversionEngineError(ValueError):
+    def __init__(self, engine: str):
+        super().__init__(
+            f'Unknown conversion engine {engine!r}, expected float or fixed'
         )
@@ -0,0 +1,52 @@
+"""Gunicorn configuration for serving with several worker processes.
+
+    gunicorn -c gunicorn.conf.py currency-converter.application:app
+
+The application is loaded once in the parent (config, currency maps, rate
+history, cross rates) and workers are forked from it, sharing those pages
+copy-on-write. The schema is expected to exist (cli migrate).
+"""
+
+import gc
+import importlib
+import os
+import sys
+
+bind = f'{os.environ.get("HOST", "0.0.0.0")}:{os.environ.get("PORT", "8000")}'
+# The local cache backend does not reach other processes: a write handled
+# by one worker would never refresh the rate index of the others
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+accesslog = os.environ.get('ACCESS_LOG')
+
+
+def _application():
+    return importlib.import_module('currency-converter.application')
+
+
+def on_starting(server):
+    # Runs after the preloaded application was created
+    backend = _application().app.container.config.cache.backend()
+    if server.cfg.workers > 1 and backend != 'redis':
+        server.log.error(
+            '%d workers need cache.backend redis (CACHE_BACKEND=redis), '
+            'not %s', server.cfg.workers, backend
+        )
+        sys.exit(1)
+
+
+def when_ready(server):
+    application = _application()
+    application.before_fork(application.app)
+
+    # Objects loaded so far are never collected; without this, the
+    # collector writes to their headers and un-shares the pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    application = _application()
+    application.after_fork(application.app)
@@ -0,0 +1,67 @@
+"""Test configuration.
+
+The package directory, currency-converter, is not a valid identifier; tests
+import its modules with importlib from the repository root.
+"""
+
+import asyncio
+import importlib
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    # The application reads config.yml and its relative database and cross
+    # rate paths from the working directory
+    shutil.copy(os.path.join(ROOT, 'config.yml'), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('DB_CREATE_SCHEMA', 'true')
+
+    # Importing the module creates an application too, here the first time
+    application = importlib.import_module('currency-converter.application')
+    apps = []
+
+    def make():
+        apps.append(application.create_app())
+        return apps[-1]
+
+    yield make
+
+    for app in apps:
+        db = app.container.db()
+        asyncio.run(db._async_engine.dispose())
+        db._engine.dispose()
+        app.container.cache_backend().close()
+
+
+@pytest.fixture
+def client(make_app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(make_app()) as client:
+        yield client
+
+
+@pytest.fixture
+def seeded(client):
+    # BRL, USD and EUR, with quotations for USD and EUR on three days
+    for abb in ('BRL', 'USD', 'EUR'):
+        assert client.post(
+            '/currencies', json={'abb': abb, 'name': abb}
+        ).status_code == 201
+
+    for currency_id, rates in ((2, (5.0, 5.2, 5.4)), (3, (6.0, 6.3, 6.6))):
+        for day, rate in enumerate(rates, start=4):
+            assert client.post(
+                f'/currencies/{currency_id}/quotations',
+                json={'exchange_rate': rate, 'date': f'2021-01-0{day}'}
+            ).status_code == 201
+
+    return client
@@ -0,0 +1,133 @@
+"""Cross rates tests."""
+
+import importlib
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+crossrates = importlib.import_module('currency-converter.crossrates')
+indexes = importlib.import_module('currency-converter.indexes')
+services = importlib.import_module('currency-converter.services')
+
+DAY = date(2021, 1, 4)
+USD, EUR = 1, 2
+CURRENCIES = [
+    SimpleNamespace(id=USD, abb='USD'), SimpleNamespace(id=EUR, abb='EUR')
+]
+
+
+class Table:
+    # What every worker reads from the database
+    def __init__(self) -> None:
+        self.rows = {}
+        for day in range(3):
+            self.put(USD, DAY + timedelta(day), 5.0)
+            self.put(EUR, DAY + timedelta(day), 6.0)
+
+    def put(self, currency_id, date_in, exchange_rate):
+        quotation = self.rows.get((currency_id, date_in))
+        self.rows[currency_id, date_in] = SimpleNamespace(
+            id=quotation.id if quotation else len(self.rows) + 1,
+            currency_id=currency_id, date=date_in,
+            exchange_rate=exchange_rate, base_currency_id=None
+        )
+        return self.rows[currency_id, date_in]
+
+    def get_history(self, currency_ids=None):
+        return [
+            self.rows[key] for key in sorted(self.rows)
+            if currency_ids is None or key[0] in currency_ids
+        ]
+
+    def get_fingerprint(self):
+        return (len(self.rows), len(self.rows), None)
+
+
+def worker(table, path):
+    rate_index = indexes.RateIndex()
+    cross_rates = crossrates.CrossRateStore(path)
+    refresh = services.IndexRefreshService(
+        SimpleNamespace(get_all=lambda: CURRENCIES), table, rate_index,
+        cross_rates
+    )
+    refresh.load()
+    return SimpleNamespace(
+        rate_index=rate_index, cross_rates=cross_rates, refresh=refresh
+    )
+
+
+def write(worker_, quotation):
+    # As CurrencyQuotationService does after committing
+    worker_.rate_index.put_quotation(quotation)
+    worker_.cross_rates.update(
+        worker_.rate_index, [(quotation.currency_id, quotation.date)]
+    )
+
+
+@pytest.fixture
+def table():
+    return Table()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'crossrates')
+
+
+def test_updates_stay_in_the_process(table, path):
+    a, b = worker(table, path), worker(table, path)
+
+    write(a, table.put(USD, DAY, 6.0))
+
+    assert a.cross_rates.get_rate(USD, EUR, DAY) == 1.0
+    assert b.cross_rates.get_rate(USD, EUR, DAY) == 5.0 / 6.0
+    # The file still holds what it was rebuilt from
+    reloaded = crossrates.CrossRateStore(path)
+    assert reloaded.load()
+    assert reloaded.get_rate(USD, EUR, DAY) == 5.0 / 6.0
+
+
+def test_stale_write_is_recomputed_on_refresh(table, path):
+    a, b = worker(table, path), worker(table, path)
+
+    # b commits first but syncs its cross rates last, from its own index
+    b_quotation = table.put(USD, DAY, 5.5)
+    a_quotation = table.put(USD, DAY, 6.0)
+    write(a, a_quotation)
+    write(b, b_quotation)
+
+    # Each then hears of the other's write
+    a.refresh.refresh('currency_quotation', (USD,))
+    b.refresh.refresh('currency_quotation', (USD,))
+
+    for worker_ in (a, b):
+        assert worker_.cross_rates.get_rate(USD, EUR, DAY) == 1.0
+        assert worker_.cross_rates.get_rate(
+            USD, EUR, DAY + timedelta(1)
+        ) == 5.0 / 6.0
+
+
+def test_new_days_go_to_the_headroom(table, path):
+    a = worker(table, path)
+    positions, dates, matrix = a.cross_rates._state
+
+    day = DAY + timedelta(len(dates))
+    write(a, table.put(EUR, day, 4.0))
+
+    assert a.cross_rates._state[2] is matrix
+    assert a.cross_rates.get_rate(USD, EUR, day) == 5.0 / 4.0
+    assert a.cross_rates.get_rate(USD, EUR, day - timedelta(1)) == \
+        5.0 / 6.0
+
+
+def test_full_headroom_rebuilds(table, path):
+    a = worker(table, path)
+    _, dates, matrix = a.cross_rates._state
+
+    last = DAY + timedelta(len(matrix))
+    for day in range(len(dates), len(matrix) + 1):
+        write(a, table.put(EUR, DAY + timedelta(day), 4.0 + day))
+
+    assert a.cross_rates._state[2] is not matrix
+    assert a.cross_rates.get_rate(USD, EUR, last) == 5.0 / (4.0 + len(matrix))
@@ -0,0 +1,268 @@
+"""Endpoints tests."""
+
+import importlib
+import json
+import time
+
+import pytest
+
+dtos = importlib.import_module('currency-converter.dtos')
+repositories = importlib.import_module('currency-converter.repositories')
+
+
+def test_quotations_not_modified(seeded):
+    response = seeded.get('/currencies/2/quotations', params={'limit': 2})
+    etag = response.headers['etag']
+    cursor = response.headers['x-next-cursor']
+
+    for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+        response = seeded.get(
+            '/currencies/2/quotations', params={'limit': 2},
+            headers={'If-None-Match': if_none_match}
+        )
+        assert response.status_code == 304, if_none_match
+        assert response.headers['x-next-cursor'] == cursor
+
+    # Part of the tag is not the tag
+    assert seeded.get(
+        '/currencies/2/quotations', params={'limit': 2},
+        headers={'If-None-Match': etag[:-2] + '"'}
+    ).status_code == 200
+
+
+def test_quotations_etag_is_per_currency(seeded):
+    usd = seeded.get('/currencies/2/quotations').headers['etag']
+    eur = seeded.get('/currencies/3/quotations').headers['etag']
+
+    seeded.post(
+        '/currencies/3/quotations',
+        json={'exchange_rate': 6.9, 'date': '2021-01-07'}
+    )
+
+    assert seeded.get('/currencies/2/quotations').headers['etag'] == usd
+    response = seeded.get(
+        '/currencies/3/quotations', headers={'If-None-Match': eur}
+    )
+    assert response.status_code == 200
+    assert response.headers['etag'] != eur
+    assert len(response.json()) == 4
+
+
+def test_bulk_upsert_conflicts(seeded):
+    response = seeded.post('/quotations/bulk', json=[
+        # Overwrites the quotation stored for USD on the 4th
+        {'currency_abb': 'USD', 'exchange_rate': 5.1, 'date': '2021-01-04'},
+        {'currency_abb': 'EUR', 'exchange_rate': 6.9, 'date': '2021-01-07'},
+        {'currency_abb': 'EUR', 'exchange_rate': 7.0, 'date': '2021-01-07'},
+        {'currency_abb': 'XXX', 'exchange_rate': 1.0, 'date': '2021-01-07'},
+        {'currency_abb': 'EUR', 'exchange_rate': 1.0, 'date': '2021-01-07',
+         'base_currency_abb': 'YYY'},
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    quotations = body['quotations']
+    assert [(q['currency_id'], q['exchange_rate']) for q in quotations] == \
+        [(2, 5.1), (3, 6.9)]
+    assert quotations[0]['id'] == 1
+    assert [(c['index'], c['reason']) for c in body['conflicts']] == [
+        (2, 'Duplicated currency and date in the batch'),
+        (3, 'Currency not found'),
+        (4, 'Base currency not found'),
+    ]
+
+    # Served from the rate index, which the upsert updated
+    assert [q['exchange_rate'] for q in seeded.get(
+        '/currencies/2/quotations'
+    ).json()] == [5.1, 5.2, 5.4]
+
+
+def test_batch_converter_list(seeded):
+    response = seeded.post('/converter/batch', json=[
+        {'currency_abb_from': 'USD', 'currency_abb_to': 'EUR', 'value': 12,
+         'date': '2021-01-04'},
+        # The latest quotations, from the 6th
+        {'currency_abb_from': 'EUR', 'currency_abb_to': 'USD', 'value': 9},
+    ])
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'value': [round(12 * 5.0 / 6.0, 3), round(9 * 6.6 / 5.4, 3)]
+    }
+
+
+def test_batch_converter_columns(seeded):
+    response = seeded.post('/converter/batch', json={
+        'currency_abb_from': ['USD', 'EUR', 'USD'],
+        'currency_abb_to': ['EUR', 'USD', 'USD'],
+        'value': [12, 9, 1.5],
+        'date': ['2021-01-05', None, '2021-01-05'],
+    })
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'value': [round(12 * 5.2 / 6.3, 3), round(9 * 6.6 / 5.4, 3), 1.5]
+    }
+
+
+def test_batch_converter_errors(seeded):
+    response = seeded.post('/converter/batch', json={
+        'currency_abb_from': ['USD', 'JPY'],
+        'currency_abb_to': ['EUR', 'EUR'],
+        'value': [1, 2],
+    })
+    assert response.status_code == 404
+    assert response.text == 'QuotationFrom for item 1 not found'
+
+    # Columns of different lengths
+    assert seeded.post('/converter/batch', json={
+        'currency_abb_from': ['USD', 'EUR'],
+        'currency_abb_to': ['EUR'],
+        'value': [1, 2],
+    }).status_code == 422
+
+
+def test_quotations_keyset_pages(seeded):
+    response = seeded.get('/currencies/2/quotations', params={'limit': 2})
+    assert [q['id'] for q in response.json()] == [1, 2]
+    cursor = response.headers['x-next-cursor']
+    assert cursor == '2021-01-05:2'
+
+    # A quotation before the page does not shift the next one
+    seeded.post(
+        '/currencies/2/quotations',
+        json={'exchange_rate': 4.9, 'date': '2021-01-01'}
+    )
+    response = seeded.get(
+        '/currencies/2/quotations', params={'limit': 2, 'cursor': cursor}
+    )
+    assert [q['id'] for q in response.json()] == [3]
+    assert 'x-next-cursor' not in response.headers
+
+    assert seeded.get(
+        '/currencies/2/quotations', params={'cursor': 'tomorrow'}
+    ).status_code == 422
+
+
+def test_quotations_csv_stream(seeded):
+    response = seeded.get(
+        '/currencies/3/quotations',
+        params={'format': 'csv', 'cursor': '2021-01-04:4'}
+    )
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/csv')
+    assert response.text.splitlines() == [
+        'id,currency_id,exchange_rate,date,base_currency_id',
+        '5,3,6.3,2021-01-05,',
+        '6,3,6.6,2021-01-06,',
+    ]
+
+
+def test_quotations_ndjson_stream(seeded):
+    response = seeded.get(
+        '/currencies/2/quotations',
+        params={'format': 'ndjson', 'start': '2021-01-05', 'limit': 1}
+    )
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith(
+        'application/x-ndjson'
+    )
+    assert [json.loads(line) for line in response.text.splitlines()] == [{
+        'id': 2, 'currency_id': 2, 'exchange_rate': 5.2,
+        'date': '2021-01-05', 'base_currency_id': None,
+    }]
+
+
+def test_series_forward_fills(seeded):
+    seeded.post('/currencies', json={'abb': 'JPY', 'name': 'Yen'})
+    for day, rate in ((4, 0.05), (6, 0.04)):
+        seeded.post(
+            '/currencies/4/quotations',
+            json={'exchange_rate': rate, 'date': f'2021-01-0{day}'}
+        )
+
+    response = seeded.get(
+        '/converter/series', params={'from': 'USD', 'to': 'JPY'}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body['date'] == ['2021-01-04', '2021-01-05', '2021-01-06']
+    # The yen keeps its rate of the 4th on the 5th
+    assert body['rate'] == [5.0 / 0.05, 5.2 / 0.05, 5.4 / 0.04]
+
+    body = seeded.get('/converter/series', params={
+        'from': 'USD', 'to': 'JPY', 'start': '2021-01-05', 'end': '2021-01-05'
+    }).json()
+    assert (body['date'], body['rate']) == (['2021-01-05'], [5.2 / 0.05])
+
+
+def test_series_needs_a_common_base(seeded):
+    seeded.post('/currencies', json={'abb': 'GBP', 'name': 'Pound'})
+    seeded.post(
+        '/currencies/4/quotations',
+        json={'exchange_rate': 0.8, 'date': '2021-01-04',
+              'base_currency_id': 2}
+    )
+
+    response = seeded.get(
+        '/converter/series', params={'from': 'GBP', 'to': 'EUR'}
+    )
+
+    assert response.status_code == 404
+    assert response.text == 'Common base for the series not found'
+
+
+def test_redis_invalidations_reach_other_workers(make_app, monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    from fastapi.testclient import TestClient
+
+    # Both workers share one server, as they would a redis instance
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        'redis.Redis.from_url',
+        lambda url, **kwargs: fakeredis.FakeRedis(server=server)
+    )
+    monkeypatch.setenv('CACHE_BACKEND', 'redis')
+    # Not served here; it only hears of the writes through redis
+    other = make_app().container.currency_converter_service()
+
+    def convert():
+        return other.convert_currency(dtos.ConverterIn(
+            currency_abb_from='USD', currency_abb_to='EUR', value=10
+        )).value
+
+    def eventually(expected):
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                if convert() == expected:
+                    return True
+            except repositories.NotFoundError:
+                pass
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+
+    with TestClient(make_app()) as client:
+        for abb in ('USD', 'EUR'):
+            client.post('/currencies', json={'abb': abb, 'name': abb})
+        for currency_id, rate in ((1, 5.0), (2, 6.0)):
+            client.post(
+                f'/currencies/{currency_id}/quotations',
+                json={'exchange_rate': rate, 'date': '2021-01-04'}
+            )
+        assert eventually(round(10 * 5.0 / 6.0, 3))
+
+        # Cached in redis under the same quotations by both workers
+        assert client.post('/converter', json={
+            'currency_abb_from': 'USD', 'currency_abb_to': 'EUR', 'value': 10
+        }).json()['value'] == round(10 * 5.0 / 6.0, 3)
+
+        client.put(
+            '/currencies/1/quotations/1',
+            json={'exchange_rate': 4.5, 'date': '2021-01-04'}
+        )
+        assert eventually(round(10 * 4.5 / 6.0, 3))
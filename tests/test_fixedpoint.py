@@ -0,0 +1,134 @@
+"""Fixed point tests."""
+
+import importlib
+import random
+from decimal import Decimal, localcontext
+
+import numpy as np
+import pytest
+
+fixedpoint = importlib.import_module('currency-converter.fixedpoint')
+
+MODES = list(fixedpoint.ROUNDING_MODES)
+
+
+def exact(value, rate_from, rate_to, places, rounding):
+    # value * rate_from / rate_to rounded once, with digits to spare
+    with localcontext() as context:
+        context.prec = 80
+        result = Decimal(repr(value)) * rate_from / rate_to
+        return int(result.scaleb(places).to_integral_value(
+            fixedpoint.ROUNDING_MODES[rounding]
+        ))
+
+
+def quotient(numerator, denominator, rounding):
+    with localcontext() as context:
+        context.prec = 80
+        return int((Decimal(numerator) / denominator).to_integral_value(
+            fixedpoint.ROUNDING_MODES[rounding]
+        ))
+
+
+@pytest.mark.parametrize('rounding', MODES)
+def test_divide_matches_decimal(rounding):
+    rng = random.Random(rounding)
+    pairs = [
+        (rng.randint(-10 ** 12, 10 ** 12), rng.randint(1, 10 ** 6))
+        for _ in range(2000)
+    ]
+    # Exact halves, on both sides of zero and of even and odd quotients
+    pairs += [(n, 2) for n in range(-7, 8)] + [(n, 10) for n in range(-25, 26)]
+
+    for numerator, denominator in pairs:
+        assert fixedpoint.divide(numerator, denominator, rounding) == \
+            quotient(numerator, denominator, rounding), \
+            (numerator, denominator)
+
+
+@pytest.mark.parametrize('rounding', MODES)
+def test_divide_array_matches_divide(rounding):
+    rng = np.random.default_rng(len(rounding))
+    numerator = np.concatenate([
+        rng.integers(-10 ** 15, 10 ** 15, 5000), np.arange(-15, 16)
+    ])
+    denominator = np.concatenate([
+        rng.integers(1, 10 ** 8, 5000), np.full(31, 2)
+    ])
+
+    result = fixedpoint.divide_array(numerator, denominator, rounding)
+
+    assert result.tolist() == [
+        fixedpoint.divide(int(n), int(d), rounding)
+        for n, d in zip(numerator, denominator)
+    ]
+
+
+@pytest.mark.parametrize('rounding', MODES)
+def test_convert_matches_decimal(rounding):
+    rng = random.Random(rounding)
+    rows = [
+        (round(rng.uniform(0, 10 ** 6), rng.randint(0, 6)),
+         round(rng.uniform(0.01, 100), rng.randint(2, 8)),
+         round(rng.uniform(0.01, 100), rng.randint(2, 8)))
+        for _ in range(2000)
+    ]
+    values = [value for value, _, _ in rows]
+    rates_from = [fixedpoint.to_scaled(rate) for _, rate, _ in rows]
+    rates_to = [fixedpoint.to_scaled(rate) for _, _, rate in rows]
+    expected = [
+        exact(value, Decimal(repr(rate_from)), Decimal(repr(rate_to)), 3,
+              rounding)
+        for value, rate_from, rate_to in rows
+    ]
+
+    assert [
+        fixedpoint.convert_value(value, rate_from, rate_to, 3, rounding)
+        for value, rate_from, rate_to in zip(values, rates_from, rates_to)
+    ] == expected
+    assert fixedpoint.convert_array(
+        values, rates_from, rates_to, 3, rounding
+    ).tolist() == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    (10.0005, 52503),
+    (0.0004, 2),
+    (0.0001, 1),
+    (1e-10, 0),
+])
+def test_amounts_are_rounded_once(value, expected):
+    # Amounts keep their own decimals: 10.0005 * 5.25 is 52.502625
+    rate = fixedpoint.to_scaled(5.25)
+    one = fixedpoint.to_scaled(1.0)
+
+    assert fixedpoint.convert_value(value, rate, one, 3, 'half_even') == \
+        expected
+    assert fixedpoint.convert_array(
+        [value], [rate], [one], 3, 'half_even'
+    ).tolist() == [expected]
+
+
+def test_convert_array_falls_back_on_overflow():
+    # Products of rates along a route do not fit int64
+    rate_from = fixedpoint.to_scaled(3.3) * fixedpoint.RATE_SCALE ** 2
+    rate_to = fixedpoint.to_scaled(1.1) ** 3
+    values = [1.5, 2.25, 1e6]
+
+    assert fixedpoint.convert_array(
+        values, [rate_from] * 3, [rate_to] * 3, 3, 'half_even'
+    ).tolist() == [
+        fixedpoint.convert_value(value, rate_from, rate_to, 3, 'half_even')
+        for value in values
+    ]
+
+
+def test_to_scaled_rounds_below_the_last_place_to_zero():
+    assert fixedpoint.to_scaled(1e-8) == 1
+    assert fixedpoint.to_scaled(5e-9) == 0
+    assert fixedpoint.to_scaled(4e-9) == 0
+
+
+def test_unknown_rounding_mode():
+    with pytest.raises(fixedpoint.RoundingModeError):
+        fixedpoint.check_rounding('nearest')
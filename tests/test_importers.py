@@ -0,0 +1,46 @@
+"""Importers tests."""
+
+import importlib
+from datetime import date
+from types import SimpleNamespace
+
+importers = importlib.import_module('currency-converter.importers')
+
+CSV = [
+    '04012021;220;A;USD;5,2000;5,2500;1;1',
+    '04012021;978;A;EUR;6,3000;6,3500;1;1',
+    '04012021;999;A;XXX;1,0000;1,0000;1;1',
+    '05012021;220;A;USD;5,3000;5,3500;1;1',
+]
+
+
+def run(lines, chunk_size=5000):
+    written = []
+    importer = importers.QuotationImporter(
+        SimpleNamespace(get_all=lambda: [
+            SimpleNamespace(id=1, abb='BRL'), SimpleNamespace(id=2, abb='USD'),
+            SimpleNamespace(id=3, abb='EUR'),
+        ]),
+        SimpleNamespace(upsert_many=written.extend),
+        chunk_size=chunk_size
+    )
+    return importer.run(importers.read_ptax_csv(lines)), written
+
+
+def test_base_rows_are_not_counted():
+    result, written = run(CSV)
+
+    assert (result.read, result.imported, result.skipped) == (4, 3, 1)
+    # One BRL row per date, written but not in the file
+    assert sorted(
+        (value['date'], value['exchange_rate'])
+        for value in written if value['currency_id'] == 1
+    ) == [(date(2021, 1, 4), 1.0), (date(2021, 1, 5), 1.0)]
+
+
+def test_rates_are_against_the_implicit_base():
+    # Each value names it, so an upsert replaces whatever base was there
+    _, written = run(CSV, chunk_size=2)
+
+    assert written
+    assert all(value['base_currency_id'] is None for value in written)
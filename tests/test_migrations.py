@@ -0,0 +1,133 @@
+"""Migrations tests."""
+
+import importlib
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+
+migrations = importlib.import_module('currency-converter.migrations')
+baseline = importlib.import_module(
+    'currency-converter.migrations.versions.r0001_baseline'
+)
+
+RATES = [5.25, 5.123456789, 0.00012345]
+
+
+def execute(engine, statement, *params):
+    with engine.begin() as connection:
+        result = connection.exec_driver_sql(statement, *params)
+        return result.fetchall() if result.returns_rows else None
+
+
+def version(engine):
+    return execute(
+        engine,
+        "SELECT version FROM table_version "
+        "WHERE table_name = 'currency_quotation'"
+    )[0][0]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # A database created before migrations, with data in it
+    engine = create_engine(f'sqlite:///{tmp_path / "baseline.sqlite"}')
+    baseline.metadata.create_all(engine)
+    execute(
+        engine, 'INSERT INTO currency (id, abb, name) VALUES (?, ?, ?)',
+        [(1, 'USD', 'Dollar'), (2, 'EUR', 'Euro')]
+    )
+    execute(
+        engine,
+        'INSERT INTO currency_quotation (currency_id, exchange_rate, date) '
+        'VALUES (?, ?, ?)',
+        [(1, rate, date(2021, 1, day)) for day, rate in enumerate(RATES, 4)]
+    )
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def migrated(engine):
+    reports = migrations.Migrator(engine).upgrade()
+    assert [report.revision for report in reports] == \
+        [module.revision for module in migrations.Migrator.revisions()]
+    return engine
+
+
+def test_scaled_rates_are_backfilled(migrated):
+    assert [row[0] for row in execute(
+        migrated,
+        'SELECT exchange_rate_scaled FROM currency_quotation ORDER BY date'
+    )] == [525000000, 512345679, 12345]
+
+
+def test_writes_bump_table_version(migrated):
+    before = version(migrated)
+
+    execute(
+        migrated,
+        "INSERT INTO currency_quotation (currency_id, exchange_rate, date) "
+        "VALUES (2, 6.5, '2021-01-04')"
+    )
+    assert version(migrated) == before + 1
+
+    execute(
+        migrated,
+        'UPDATE currency_quotation SET exchange_rate = 6.6 '
+        'WHERE currency_id = 2'
+    )
+    assert version(migrated) == before + 2
+
+    execute(migrated, 'DELETE FROM currency_quotation WHERE currency_id = 2')
+    assert version(migrated) == before + 3
+
+
+def test_invalid_base_is_rejected(migrated):
+    with pytest.raises(IntegrityError):
+        execute(
+            migrated, 'UPDATE currency_quotation SET base_currency_id = 99'
+        )
+    with pytest.raises(IntegrityError):
+        execute(
+            migrated,
+            "INSERT INTO currency_quotation "
+            "(currency_id, exchange_rate, date, base_currency_id) "
+            "VALUES (2, 1.2, '2021-01-04', 99)"
+        )
+
+    execute(migrated, 'UPDATE currency_quotation SET base_currency_id = 2')
+    # The base can no longer go
+    with pytest.raises(IntegrityError):
+        execute(migrated, 'DELETE FROM currency WHERE id = 2')
+
+
+def test_second_run_is_a_noop(migrated):
+    migrator = migrations.Migrator(migrated)
+    rows = execute(migrated, 'SELECT * FROM currency_quotation ORDER BY id')
+    before = version(migrated)
+
+    assert migrator.upgrade() == []
+    assert migrator.current() == len(migrator.revisions())
+
+    # Revisions interrupted before being recorded run again as well
+    for module in migrator.revisions():
+        module.upgrade(migrations.Operations(migrated))
+
+    assert execute(
+        migrated, 'SELECT * FROM currency_quotation ORDER BY id'
+    ) == rows
+    assert version(migrated) == before
+
+
+def test_as_of_index_is_replaced(migrated):
+    operations = migrations.Operations(migrated)
+
+    assert operations.has_index(
+        'currency_quotation', 'ix_currency_quotation_as_of_include'
+    )
+    assert not operations.has_index(
+        'currency_quotation', 'ix_currency_quotation_as_of'
+    )
@@ -0,0 +1,123 @@
+"""Quotation store tests."""
+
+import importlib
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+quotations = importlib.import_module('currency-converter.quotations')
+
+FINGERPRINT = (4, 4, 7)
+
+
+def rows():
+    # Ordered by (currency_id, date), as the repository reads them
+    return [
+        SimpleNamespace(
+            id=1, currency_id=1, date=date(2021, 1, 4), exchange_rate=5.25,
+            exchange_rate_scaled=525000000, base_currency_id=None
+        ),
+        SimpleNamespace(
+            id=3, currency_id=1, date=date(2021, 1, 5), exchange_rate=5.5,
+            exchange_rate_scaled=None, base_currency_id=None
+        ),
+        SimpleNamespace(
+            id=2, currency_id=2, date=date(2021, 1, 4), exchange_rate=1.2,
+            exchange_rate_scaled=120000000, base_currency_id=1
+        ),
+        SimpleNamespace(
+            id=4, currency_id=2, date=date(2021, 1, 6), exchange_rate=1.25,
+            exchange_rate_scaled=125000000, base_currency_id=1
+        ),
+    ]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / 'quotations.snapshot')
+
+
+@pytest.fixture
+def saved(snapshot_path):
+    store = quotations.QuotationStore(snapshot_path)
+    store.load(rows(), FINGERPRINT)
+    assert store.save()
+    return store
+
+
+def test_save_and_open_round_trip(saved, snapshot_path):
+    store = quotations.QuotationStore(snapshot_path)
+
+    assert store.open(FINGERPRINT)
+    assert store.fingerprint == FINGERPRINT
+    assert len(store) == 4
+    for currency_id in (1, 2):
+        assert [list(column) for column in store.history(currency_id)] == \
+            [list(column) for column in saved.history(currency_id)]
+
+    assert store.get(1, 3) == quotations.Quotation(
+        3, 1, date(2021, 1, 5).toordinal(), 5.5, 550000000, None
+    )
+    assert store.as_of(2, date(2021, 1, 5).toordinal()) == \
+        quotations.Quotation(
+            2, 2, date(2021, 1, 4).toordinal(), 1.2, 120000000, 1
+        )
+
+
+@pytest.mark.parametrize('fingerprint', [
+    (5, 5, 8),
+    # An update in place changes neither the count nor the highest id
+    (4, 4, 8),
+    (4, 4, None),
+])
+def test_stale_snapshot_is_not_opened(saved, snapshot_path, fingerprint):
+    store = quotations.QuotationStore(snapshot_path)
+
+    assert not store.open(fingerprint)
+    assert len(store) == 0
+
+
+def test_truncated_snapshot_is_not_opened(saved, snapshot_path):
+    with open(snapshot_path, 'r+b') as f:
+        f.truncate(100)
+
+    assert not quotations.QuotationStore(snapshot_path).open(FINGERPRINT)
+
+
+def test_changed_history_is_not_saved(saved, snapshot_path):
+    store = quotations.QuotationStore(snapshot_path)
+    store.open(FINGERPRINT)
+    store.put(quotations.Quotation(5, 1, date(2021, 1, 6).toordinal(), 5.75))
+
+    # Nothing says which table version the history now matches
+    assert store.fingerprint is None
+    assert not store.save()
+
+
+def test_history_without_table_version_is_not_saved(snapshot_path):
+    store = quotations.QuotationStore(snapshot_path)
+    store.load(rows(), (4, 4, None))
+
+    assert not store.save()
+
+
+@pytest.mark.parametrize('start, end, after, limit, ids', [
+    (None, None, None, None, [1, 3]),
+    (date(2021, 1, 5), None, None, None, [3]),
+    (None, date(2021, 1, 4), None, None, [1]),
+    (None, None, (date(2021, 1, 4), 1), None, [3]),
+    (None, None, (date(2021, 1, 4), 0), None, [1, 3]),
+    (None, None, None, 1, [1]),
+    (date(2021, 1, 6), None, None, None, []),
+])
+def test_page(saved, start, end, after, limit, ids):
+    page = saved.page(
+        1,
+        start.toordinal() if start else None,
+        end.toordinal() if end else None,
+        (after[0].toordinal(), after[1]) if after else None,
+        limit
+    )
+
+    assert [quotation.id for quotation in page] == ids
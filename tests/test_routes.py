@@ -0,0 +1,87 @@
+"""Routes tests."""
+
+import importlib
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+quotations = importlib.import_module('currency-converter.quotations')
+routes = importlib.import_module('currency-converter.routes')
+
+DAY = date(2021, 1, 4)
+ORDINAL = DAY.toordinal()
+
+USD, EUR, GBP, JPY, CHF, AAA, BBB, XXX = range(1, 9)
+
+
+def graph(bases):
+    # One quotation per currency on DAY, at 1 + currency_id / 10
+    store = quotations.QuotationStore()
+    store.load(
+        SimpleNamespace(
+            id=currency_id, currency_id=currency_id, date=DAY,
+            exchange_rate=1 + currency_id / 10, base_currency_id=base
+        )
+        for currency_id, base in sorted(bases.items())
+    )
+    return routes.ConversionGraph(store)
+
+
+@pytest.fixture
+def forest():
+    # USD and CHF on the implicit base, EUR and JPY on USD, GBP on EUR; AAA
+    # and BBB on each other; XXX on a currency without quotations
+    return graph({
+        USD: None, EUR: USD, GBP: EUR, JPY: USD, CHF: None,
+        AAA: BBB, BBB: AAA, XXX: 99,
+    })
+
+
+def currencies(quotations_):
+    return [quotation.currency_id for quotation in quotations_]
+
+
+@pytest.mark.parametrize('currency_from, currency_to, up, down', [
+    (GBP, JPY, [GBP, EUR], [JPY]),
+    (JPY, GBP, [JPY], [GBP, EUR]),
+    (GBP, USD, [GBP, EUR], []),
+    (USD, GBP, [], [GBP, EUR]),
+    (GBP, CHF, [GBP, EUR, USD], [CHF]),
+    (EUR, EUR, [], []),
+])
+def test_route_through_nearest_common_currency(
+        forest, currency_from, currency_to, up, down
+):
+    route = forest.route(currency_from, currency_to, ORDINAL)
+
+    assert currencies(route.up) == up
+    assert currencies(route.down) == down
+
+
+def test_route_rates(forest):
+    route = forest.route(GBP, JPY, ORDINAL)
+    rate_from, rate_to = route.scaled_rates
+
+    assert route.rate == pytest.approx(1.3 * 1.2 / 1.4)
+    # Both sides carry the same scale: two rates against one
+    assert (rate_from, rate_to) == (130000000 * 120000000, 140000000 * 10 ** 8)
+    assert route.currency_ids == {GBP, EUR, JPY}
+
+
+def test_cycle_ends_the_chain(forest):
+    # AAA -> BBB -> AAA never reaches the implicit base
+    assert forest.route(AAA, USD, ORDINAL) is None
+    assert currencies(forest.route(AAA, BBB, ORDINAL).up) == [AAA]
+    assert currencies(forest.route(BBB, AAA, ORDINAL).up) == [BBB]
+
+
+def test_unquoted_base_ends_the_chain(forest):
+    # XXX is quoted against 99, which has no quotation
+    assert forest.route(XXX, USD, ORDINAL) is None
+    assert forest.route(USD, XXX, ORDINAL) is None
+    assert currencies(forest.route(XXX, 99, ORDINAL).up) == [XXX]
+
+
+def test_no_route_before_the_first_quotation(forest):
+    assert forest.route(GBP, JPY, ORDINAL - 1) is None